@@ -0,0 +1,273 @@
+# api/server.py
+'''
+Read-only JSON API over the services, for calendar tools and scripts that poll.
+
+    python -m api.server --host 127.0.0.1 --port 8765
+
+    GET /clients?country=DE&city=Berlin                 active clients, by name
+    GET /cases?client_id=3&status=filed&jurisdiction=EP&ipr_type=PAT&procedure_type=prosecution
+                                                        open cases, by case_id
+    GET /deadlines?case_id=7&client_id=3&deadline_type=statutory&status=Overdue&due_from=2026-01-01&due_to=2026-12-31
+                                                        open deadlines with case and client, by due date
+    GET /clients/<id>, /cases/<id>, /deadlines/<id>     one record
+    GET /clients?q=..., /cases?q=...                    full-text search, best match first
+
+Lists answer {"items": [...], "next": cursor or null}; send the cursor back as
+after=<cursor> for the following page, and limit=N (at most API_MAX_PAGE_SIZE) to size it.
+q cannot be combined with the other filters.
+
+Every response carries an ETag built from DatabaseHandler.change_token over the tables
+it reads. A poll whose If-None-Match still matches is answered 304 Not Modified before
+any query runs, so an unchanged docket costs one PRAGMA per poll. Bodies of at least
+API_GZIP_MIN_BYTES are gzipped for clients that accept it.
+'''
+import argparse
+import base64
+import binascii
+import gzip
+import json
+import uuid
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from config.settings import API_GZIP_MIN_BYTES, API_HOST, API_MAX_PAGE_SIZE, API_PORT, PAGE_SIZE
+from database_handler.database_handler import DatabaseHandler
+from services.cases_service import CasesService
+from services.clients_service import ClientsService
+from services.deadline_service import DeadlineService
+
+PAGING_PARAMS = ('after', 'limit')
+SEARCH_PARAM = 'q'
+# Ranked search pages by offset: its cursor is (offset,)
+SEARCH_KEY = (int,)
+
+
+@dataclass(frozen=True)
+class Resource:
+    '''One collection of the API and the service calls behind it.'''
+    tables: Tuple[str, ...]  # Every table its rows are read from, for the ETag
+    filters: Dict[str, type]  # Query parameters passed to the page method as filters, with their type
+    page_key: Tuple[type, ...]  # Types of the keyset cursor of get_page, e.g. (due_date, deadline_id)
+    get_page: Callable
+    get_record: Callable
+    search: Optional[Callable] = None
+
+
+class ApiError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ApiServer(ThreadingHTTPServer):
+    '''Serves the API on one thread per request; the database handler bounds the concurrent reads.'''
+    def __init__(
+            self,
+            address: Tuple[str, int],
+            clients_service: ClientsService,
+            cases_service: CasesService,
+            deadline_service: DeadlineService
+            ):
+        super().__init__(address, ApiRequestHandler)
+        self.db_handler: DatabaseHandler = clients_service.clients_repo.db_handler
+        # Restoring a backup takes the generations back, so ETags of a previous run must never match
+        self.instance = uuid.uuid4().hex[:8]
+        self.resources = {
+            'clients': Resource(
+                tables=('clients',),
+                filters={'country': str, 'city': str},
+                page_key=(str, int),
+                get_page=clients_service.get_active_clients_page,
+                get_record=clients_service.get_client_by_id,
+                search=clients_service.search
+            ),
+            'cases': Resource(
+                tables=('cases', 'clients'),
+                filters={'client_id': int, 'status': str, 'jurisdiction': str, 'ipr_type': str, 'procedure_type': str},
+                page_key=(int,),
+                get_page=cases_service.get_open_cases_page,
+                get_record=cases_service.get_case_by_id,
+                search=cases_service.search
+            ),
+            'deadlines': Resource(
+                tables=('deadlines', 'cases', 'clients'),
+                filters={
+                    'case_id': int, 'client_id': int, 'deadline_type': str, 'status': str,
+                    'due_from': str, 'due_to': str
+                },
+                page_key=(str, int),
+                get_page=deadline_service.get_open_deadlines_board_page,
+                get_record=deadline_service.get_deadline_by_id
+            ),
+        }
+
+    def etag(self, resource: Resource) -> str:
+        return f'W/"{self.instance}-{self.db_handler.change_token(resource.tables)}"'
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    server: ApiServer
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; with Nagle on, keep-alive clients wait for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self._respond(send_body=True)
+
+    def do_HEAD(self) -> None:
+        self._respond(send_body=False)
+
+    def _respond(self, send_body: bool) -> None:
+        try:
+            url = urlsplit(self.path)
+            resource, record_id = self._route(url.path)
+            # Taken before the query: a write that lands meanwhile changes the next poll's ETag
+            etag = self.server.etag(resource)
+            if _etag_matches(self.headers.get('If-None-Match'), etag):
+                self._send(HTTPStatus.NOT_MODIFIED, etag=etag)
+                return
+            if record_id is None:
+                payload = self._list(resource, parse_qs(url.query, keep_blank_values=True))
+            else:
+                payload = self._record(resource, record_id)
+        except ApiError as e:
+            self._send(e.status, json.dumps({'error': str(e)}).encode('utf-8'), send_body=send_body)
+            return
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+        self._send(HTTPStatus.OK, body, etag, send_body)
+
+    # --- Request parsing and service calls --- #
+    def _route(self, path: str) -> Tuple[Resource, Optional[int]]:
+        parts = [part for part in path.split('/') if part]
+        resource = self.server.resources.get(parts[0]) if parts else None
+        if resource is None or len(parts) > 2:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown path {path}; try /{', /'.join(self.server.resources)}")
+        if len(parts) == 1:
+            return (resource, None)
+        try:
+            return (resource, int(parts[1]))
+        except ValueError:
+            raise ApiError(HTTPStatus.NOT_FOUND, f'Record ids are integers, got {parts[1]}')
+
+    def _list(self, resource: Resource, params: Dict[str, list]) -> dict:
+        allowed = set(resource.filters) | set(PAGING_PARAMS) | ({SEARCH_PARAM} if resource.search else set())
+        for name, values in params.items():
+            if name not in allowed:
+                raise ApiError(HTTPStatus.BAD_REQUEST, f"Unknown parameter {name}; expected one of {', '.join(sorted(allowed))}")
+            if len(values) > 1:
+                raise ApiError(HTTPStatus.BAD_REQUEST, f'Parameter {name} given more than once')
+        values = {name: values[0] for name, values in params.items()}
+        key = SEARCH_KEY if SEARCH_PARAM in values else resource.page_key
+        after = _decode_cursor(values['after'], key) if values.get('after') else None
+        limit = _parse_int('limit', values.get('limit', str(PAGE_SIZE)))
+        if not 1 <= limit <= API_MAX_PAGE_SIZE:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f'limit must be between 1 and {API_MAX_PAGE_SIZE}')
+        filters = {
+            name: _parse_int(name, values[name]) if kind is int else values[name]
+            for name, kind in resource.filters.items()
+            if values.get(name)
+        }
+        if SEARCH_PARAM in values:
+            if filters:
+                raise ApiError(HTTPStatus.BAD_REQUEST, f'{SEARCH_PARAM} cannot be combined with filters')
+            success, page = resource.search(values[SEARCH_PARAM], after, limit)
+        else:
+            success, page = resource.get_page(after, limit, filters)
+        if not success:
+            raise _service_error(page)
+        next_after = page['next_after']
+        return {'items': page['rows'], 'next': _encode_cursor(next_after) if next_after else None}
+
+    def _record(self, resource: Resource, record_id: int) -> dict:
+        success, record = resource.get_record(record_id)
+        if not success:
+            raise _service_error(record)
+        if record is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f'No record {record_id}')
+        return record
+
+    # --- Response writing --- #
+    def _send(self, status: HTTPStatus, body: bytes = b'', etag: Optional[str] = None, send_body: bool = True) -> None:
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+            # Clients may keep the body but must revalidate it on every use
+            self.send_header('Cache-Control', 'no-cache')
+        if status != HTTPStatus.NOT_MODIFIED:
+            if len(body) >= API_GZIP_MIN_BYTES and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                body = gzip.compress(body, compresslevel=6)
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body and status != HTTPStatus.NOT_MODIFIED:
+            self.wfile.write(body)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    '''Weak comparison, as If-None-Match requires: W/ prefixes are ignored.'''
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(candidate.strip().removeprefix('W/') == opaque for candidate in if_none_match.split(','))
+
+
+def _encode_cursor(after: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(after)).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor: str, key: Tuple[type, ...]) -> tuple:
+    '''The key a cursor encodes; anything but a key of the expected types (a cursor of another list, a forged one) is a 400.'''
+    try:
+        after = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, 'after must be a cursor returned as next')
+    # type() rather than isinstance(): JSON true and false are bools, which isinstance counts as int
+    if (
+            not isinstance(after, list) or len(after) != len(key)
+            or any(type(value) is not kind for value, kind in zip(after, key))
+            or (key == SEARCH_KEY and after[0] < 0)):
+        raise ApiError(HTTPStatus.BAD_REQUEST, 'after must be a cursor returned as next')
+    return tuple(after)
+
+
+def _parse_int(name: str, value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f'{name} must be an integer')
+
+
+def _service_error(error: Exception) -> ApiError:
+    if isinstance(error, ValueError):
+        return ApiError(HTTPStatus.BAD_REQUEST, str(error))
+    return ApiError(HTTPStatus.INTERNAL_SERVER_ERROR, f'{type(error).__name__}: {error}')
+
+
+def main() -> None:
+    from gui.create_services import create_services
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--port', type=int, default=API_PORT)
+    args = parser.parse_args()
+
+    clients_service, cases_service, deadline_service, _, _ = create_services()
+    server = ApiServer((args.host, args.port), clients_service, cases_service, deadline_service)
+    print(f'Serving the case manager API on http://{args.host}:{server.server_port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_api_polling.py
+'''
+What a poll of the JSON API costs when nothing changed, against a full answer.
+
+    python -m benchmarks.bench_api_polling --clients 1000 --cases-per-client 20 --polls 200
+
+Starts api.server on a free port over a generated docket, then times polls of the
+deadline board: unconditional (200, the page is queried and serialized) and with the
+ETag of the previous answer (304, no query). The query cache is off, so every 200 hits
+the database. Also reports the body size with and without gzip.
+'''
+import argparse
+import http.client
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from api.server import ApiServer
+from benchmarks.datagen import generate_docket
+from database_handler.database_handler import DatabaseHandler
+from gui.create_services import build_services
+
+
+def poll(port: int, path: str, headers: dict, polls: int) -> tuple:
+    '''Median latency in ms, the last status and body size, over polls requests on one keep-alive connection.'''
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    timings = []
+    for _ in range(polls):
+        start = time.perf_counter()
+        conn.request('GET', path, headers=headers)
+        response = conn.getresponse()
+        body = response.read()
+        timings.append(time.perf_counter() - start)
+    conn.close()
+    return (statistics.median(timings) * 1000, response.status, len(body), response.getheader('ETag'))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--cases-per-client', type=int, default=20)
+    parser.add_argument('--deadlines-per-case', type=int, default=3)
+    parser.add_argument('--limit', type=int, default=200)
+    parser.add_argument('--polls', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_handler = DatabaseHandler(Path(tmp_dir) / 'bench.db')
+        with db_handler as conn:
+            generate_docket(conn, args.clients, args.cases_per_client, args.deadlines_per_case)
+        clients_service, cases_service, deadline_service, _, audit_service = build_services(db_handler)
+        audit_service.detach()
+        db_handler.query_cache.max_entries = 0
+        server = ApiServer(('127.0.0.1', 0), clients_service, cases_service, deadline_service)
+        # One line per request would dominate the timings
+        server.RequestHandlerClass.log_message = lambda *_: None
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        path = f'/deadlines?limit={args.limit}&due_from=2026-03-01'
+        plain = poll(server.server_port, path, {}, args.polls)
+        gzipped = poll(server.server_port, path, {'Accept-Encoding': 'gzip'}, args.polls)
+        not_modified = poll(server.server_port, path, {'If-None-Match': plain[3]}, args.polls)
+        server.shutdown()
+        server.server_close()
+        db_handler.close()
+
+    print(f'GET {path}, median of {args.polls} polls')
+    for label, (latency, status, size, _) in (
+            ('full answer', plain), ('full answer, gzip', gzipped), ('If-None-Match', not_modified)):
+        print(f'  {label:<18} {status:>4} {latency:>8.2f}ms {size:>9} bytes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+# benchmarks/bench_async_load.py
+'''
+100 concurrent coroutines against the async service facade (by default).
+
+    python -m benchmarks.bench_async_load --coroutines 100 --calls 20 --streams 8
+
+Each coroutine makes a mix of reads (deadline board pages, client lookups, case
+searches) and, one call in ten, a write (completing a deadline). Alongside them, --streams
+coroutines each stream every client and await a case lookup per client, more streams
+than there are reader connections; 'streams s' is the time the slowest one took. The
+same workload runs
+twice: through AsyncServices, and calling the synchronous services directly from the
+coroutines, which blocks the event loop for the whole of every query. Reported are
+throughput, call latency percentiles and the event loop's worst lag, measured by a
+ticker coroutine that should wake every millisecond. A blocked loop shows up there: its
+call latencies look short only because the other coroutines cannot even start meanwhile.
+'''
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from benchmarks.datagen import generate_docket
+from database_handler.database_handler import DatabaseHandler
+from gui.create_services import build_services
+from services.async_service import AsyncServices
+
+SEARCHES = ['REF 00', 'Case 12', 'REF-0042', 'Case 7']
+TICK_SECONDS = 0.001
+
+
+class SyncFacade:
+    '''The synchronous service called as if it were async: every call runs on the loop thread.'''
+    def __init__(self, service: object):
+        self._service = service
+
+    def __getattr__(self, name: str):
+        method = getattr(self._service, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        async def stream(*args, **kwargs):
+            for row in method(*args, **kwargs):
+                yield row
+        return stream if name.startswith('iter_') else call
+
+
+async def worker(services, rng: random.Random, calls: int, clients: int, deadlines: list, latencies: list) -> None:
+    for _ in range(calls):
+        roll = rng.random()
+        start = time.perf_counter()
+        if roll < 0.1 and deadlines:
+            success, result = await services.deadlines.mark_deadline_completed(deadlines.pop())
+        elif roll < 0.4:
+            success, result = await services.deadlines.get_open_deadlines_board_page()
+        elif roll < 0.7:
+            success, result = await services.clients.get_client_by_id(rng.randint(1, clients))
+        else:
+            success, result = await services.cases.search(rng.choice(SEARCHES))
+        if not success:
+            raise SystemExit(result)
+        latencies.append(time.perf_counter() - start)
+
+
+async def streamer(services, rng: random.Random, cases: int, durations: list) -> None:
+    start = time.perf_counter()
+    async for _ in services.clients.iter_all_clients():
+        success, result = await services.cases.get_case_by_id(rng.randint(1, cases))
+        if not success:
+            raise SystemExit(result)
+    durations.append(time.perf_counter() - start)
+
+
+async def ticker(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(time.perf_counter() - start - TICK_SECONDS)
+
+
+async def run_load(services, args: argparse.Namespace, deadlines: list) -> dict:
+    rng = random.Random(11)
+    latencies, lags, durations = [], [], []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(services, random.Random(rng.random()), args.calls, args.clients, deadlines, latencies)
+        for _ in range(args.coroutines)
+    ), *(
+        streamer(services, random.Random(rng.random()), args.clients * args.cases_per_client, durations)
+        for _ in range(args.streams)
+    ))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    latencies.sort()
+    return {
+        'calls/s': len(latencies) / elapsed,
+        'p50 ms': statistics.median(latencies) * 1000,
+        'p99 ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'loop lag max ms': max(lags, default=0) * 1000,
+        'streams s': max(durations, default=0)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--cases-per-client', type=int, default=20)
+    parser.add_argument('--deadlines-per-case', type=int, default=3)
+    parser.add_argument('--coroutines', type=int, default=100)
+    parser.add_argument('--calls', type=int, default=20)
+    parser.add_argument('--streams', type=int, default=8, help='Coroutines streaming every client meanwhile.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_handler = DatabaseHandler(Path(tmp_dir) / 'bench.db')
+        with db_handler as conn:
+            generate_docket(conn, args.clients, args.cases_per_client, args.deadlines_per_case)
+        clients_service, cases_service, deadline_service, _, audit_service = build_services(db_handler)
+        audit_service.detach()
+        # Every read would otherwise be served from the query cache after the first one
+        db_handler.query_cache.max_entries = 0
+        total_deadlines = args.clients * args.cases_per_client * args.deadlines_per_case
+        # Each run completes its own deadlines, so both runs do the same number of writes
+        deadline_ids = random.Random(3).sample(range(1, total_deadlines + 1), total_deadlines)
+        half = len(deadline_ids) // 2
+
+        sync_services = SimpleNamespace(
+            clients=SyncFacade(clients_service), cases=SyncFacade(cases_service), deadlines=SyncFacade(deadline_service)
+        )
+        results = {'sync on loop': asyncio.run(run_load(sync_services, args, deadline_ids[:half]))}
+
+        async def run_async() -> dict:
+            async with AsyncServices(clients_service, cases_service, deadline_service) as services:
+                return await run_load(services, args, deadline_ids[half:])
+        results['AsyncServices'] = asyncio.run(run_async())
+
+        print(
+            f'{args.coroutines} coroutines x {args.calls} calls, {args.streams} streams, '
+            f'{db_handler.max_readers} reader threads'
+        )
+        columns = list(results['AsyncServices'])
+        print(f"  {'':<14}" + ''.join(f'{column:>17}' for column in columns))
+        for label, result in results.items():
+            print(f'  {label:<14}' + ''.join(f'{result[column]:>17.1f}' for column in columns))
+        db_handler.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_batch_writes.py
+'''
+Rows per second of the single-record write path (insert_new_record / update_by_id, one
+commit per call) against the batch API (insert_many / update_many / upsert_many).
+
+    python -m benchmarks.bench_batch_writes --sizes 1000 10000 100000 [--audit]
+
+--audit attaches the AuditService, so every write is also chained into audit_records.
+'''
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.datagen import TIMESTAMP, generate_docket
+from database_handler.database_handler import DatabaseHandler
+from gui.create_services import build_services
+
+CLIENTS = 100
+
+
+def case_records(size: int, prefix: str) -> list:
+    return [
+        {
+            'client_id': 1 + i % CLIENTS,
+            'client_ref': f'{prefix}-{i:07d}',
+            'title': f'Case {i}',
+            'jurisdiction': 'EP',
+            'created_at': TIMESTAMP,
+            'updated_at': TIMESTAMP,
+        }
+        for i in range(size)
+    ]
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    success, result = function()
+    if not success:
+        raise RuntimeError(result)
+    return time.perf_counter() - start
+
+
+def bench_size(size: int, audit: bool) -> dict:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_handler = DatabaseHandler(Path(tmp_dir) / 'bench.db')
+        with db_handler as conn:
+            generate_docket(conn, CLIENTS, 0, 0)
+        _, cases_service, _, _, audit_service = build_services(db_handler)
+        cases_repo = cases_service.cases_repo
+        if not audit:
+            audit_service.detach()
+
+        def insert_single() -> tuple:
+            for record in case_records(size, 'S'):
+                success, result = cases_repo.insert_new_record(record)
+                if not success:
+                    return (False, result)
+            return (True, None)
+
+        def update_single() -> tuple:
+            for case_id in range(1, size + 1):
+                success, result = cases_repo.update_by_id('case_id', case_id, {'title': 'Updated', 'updated_at': TIMESTAMP})
+                if not success:
+                    return (False, result)
+            return (True, None)
+
+        results = {
+            'insert_new_record': timed(insert_single),
+            'insert_many': timed(lambda: cases_repo.insert_many(case_records(size, 'M'))),
+            'update_by_id': timed(update_single),
+            'update_many': timed(lambda: cases_repo.update_many(
+                {'case_id': case_id, 'title': 'Batch', 'updated_at': TIMESTAMP} for case_id in range(1, size + 1)
+            )),
+            # Half of the keys exist, half are new
+            'upsert_many': timed(lambda: cases_repo.upsert_many(
+                case_records(size // 2, 'M') + case_records(size - size // 2, 'U')
+            )),
+        }
+        db_handler.close()
+    return {name: size / seconds for name, seconds in results.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='*', default=[1000, 10000, 100000])
+    parser.add_argument('--audit', action='store_true')
+    args = parser.parse_args()
+
+    print(f"rows/s{' (audited)' if args.audit else ''}")
+    print(f"  {'rows':>8} " + ' '.join(f'{name:>18}' for name in (
+        'insert_new_record', 'insert_many', 'update_by_id', 'update_many', 'upsert_many'
+    )))
+    for size in args.sizes:
+        results = bench_size(size, args.audit)
+        print(f'  {size:>8} ' + ' '.join(f'{value:>18,.0f}' for value in results.values()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_change_detection.py
+'''
+Backend cost of an idle Streamlit rerun when several processes share the database.
+
+    python -m benchmarks.bench_change_detection --clients 1000 --cases-per-client 20 --reruns 50
+
+A rerun here is the service reads of the Home, Clients, Cases and Deadlines pages. Timed:
+- no cache: every read queries the database (what a process must do when it cannot
+  tell whether another process wrote);
+- idle rerun: cached reads, the change tracker finds nothing new;
+- after another process completed a deadline: the tracker drops the reads of the
+  deadlines table only.
+Each rerun starts after the poll interval, so every rerun pays its change check.
+'''
+import argparse
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.datagen import generate_docket
+from config.settings import CHANGE_POLL_INTERVAL_MS
+from database_handler.database_handler import DatabaseHandler
+from gui.create_services import build_services
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--cases-per-client', type=int, default=20)
+    parser.add_argument('--deadlines-per-case', type=int, default=3)
+    parser.add_argument('--reruns', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / 'bench.db'
+        db_handler = DatabaseHandler(db_path)
+        with db_handler as conn:
+            generate_docket(conn, args.clients, args.cases_per_client, args.deadlines_per_case)
+        clients_service, cases_service, deadline_service, _, audit_service = build_services(db_handler)
+        audit_service.detach()
+        # Stands in for another Streamlit worker or an import script
+        other_process = sqlite3.connect(db_path)
+
+        def rerun() -> None:
+            start_date, end_date = deadline_service.get_agenda_window()
+            for success, result in (
+                    deadline_service.get_deadline_load_by_week(start_date, end_date),
+                    deadline_service.get_deadline_load_by_client(None, end_date),
+                    clients_service.get_active_clients_page(),
+                    clients_service.get_client_by_id(1),
+                    cases_service.get_open_cases_by_client(1),
+                    cases_service.get_open_cases_page(),
+                    clients_service.get_active_clients(),
+                    deadline_service.get_overdue_count(),
+                    deadline_service.get_open_deadlines_board_page(),
+                    cases_service.get_open_cases_with_clients()):
+                if not success:
+                    raise SystemExit(result)
+
+        def external_write(n: int) -> None:
+            other_process.execute(
+                "UPDATE deadlines SET status='Done', completed=1, completed_at=? WHERE deadline_id=?",
+                ('2026-01-02 09:00:00', n + 1)
+            )
+            other_process.commit()
+
+        def timed(before_each=None) -> list:
+            samples = []
+            for n in range(args.reruns):
+                if before_each:
+                    before_each(n)
+                # Past the poll interval, as consecutive reruns of a user are
+                time.sleep(CHANGE_POLL_INTERVAL_MS / 1000)
+                start = time.perf_counter()
+                rerun()
+                samples.append((time.perf_counter() - start) * 1000)
+            return samples
+
+        max_entries = db_handler.query_cache.max_entries
+        db_handler.query_cache.max_entries = 0
+        results = {'no cache': timed()}
+        db_handler.query_cache.max_entries = max_entries
+        rerun()
+        polls_before = db_handler.changes.polls
+        results['idle rerun'] = timed()
+        polls = db_handler.changes.polls - polls_before
+        results['after another process wrote deadlines'] = timed(external_write)
+        other_process.close()
+        db_handler.close()
+
+    print(f'Backend cost of one rerun, {args.reruns} reruns ({polls} change checks in {args.reruns} idle reruns)')
+    for label, samples in results.items():
+        print(f'  {label:<38} median {statistics.median(samples):8.3f} ms   max {max(samples):8.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
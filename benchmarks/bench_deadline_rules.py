@@ -0,0 +1,100 @@
+# benchmarks/bench_deadline_rules.py
+'''
+Statutory deadline generation over a generated docket (100k cases by default).
+
+    python -m benchmarks.bench_deadline_rules --clients 1000 --cases-per-client 100
+
+Times the vectorized rule evaluation against a per-case Python loop computing the same
+deadlines (and checks that both agree), then a first generate_statutory_deadlines run,
+which inserts everything, and a second one, which finds nothing missing.
+'''
+import argparse
+import calendar
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.datagen import generate_docket
+from database_handler.database_handler import DatabaseHandler
+from gui.create_services import build_services
+from utils.deadline_rules import RULES, add_months, compute_deadlines
+
+TODAY = date(2026, 1, 1)
+HORIZON_MONTHS = 24
+
+
+def python_add_months(day: date, months: int, end_of_month: bool) -> date:
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    last_day = calendar.monthrange(year, month)[1]
+    return date(year, month, last_day if end_of_month else min(day.day, last_day))
+
+
+def compute_per_case(cases: dict, start: date, end: date) -> list:
+    '''Reference implementation: one Python loop iteration per case and rule.'''
+    deadlines = []
+    for case_id, filing_date, jurisdiction, ipr_type, procedure_type in zip(
+            cases['case_id'], cases['filing_date'], cases['jurisdiction'], cases['ipr_type'], cases['procedure_type']):
+        filed = date.fromisoformat(filing_date)
+        for index, rule in enumerate(RULES):
+            if ipr_type not in rule.ipr_types:
+                continue
+            if rule.jurisdictions is not None and jurisdiction not in rule.jurisdictions:
+                continue
+            if jurisdiction in rule.excluded_jurisdictions:
+                continue
+            if rule.procedure_types is not None and procedure_type not in rule.procedure_types:
+                continue
+            due_date = python_add_months(filed, rule.months, rule.end_of_month)
+            if start <= due_date <= end:
+                deadlines.append((case_id, index, due_date))
+    return deadlines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--cases-per-client', type=int, default=100)
+    parser.add_argument('--audit', action='store_true', help='Chain the inserted deadlines into audit_records.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_handler = DatabaseHandler(Path(tmp_dir) / 'bench.db')
+        with db_handler as conn:
+            generate_docket(conn, args.clients, args.cases_per_client, 1)
+        _, cases_service, deadline_service, _, audit_service = build_services(db_handler)
+        if not args.audit:
+            audit_service.detach()
+
+        success, cases = cases_service.cases_repo.get_all_open_filed_cases('columnar')
+        if not success:
+            raise SystemExit(cases)
+        print(f"{len(cases['case_id'])} open cases with a filing date")
+        start = np.datetime64(TODAY, 'D')
+        end = add_months(np.array([start]), HORIZON_MONTHS)[0]
+
+        began = time.perf_counter()
+        case_ids, _, _ = compute_deadlines(cases, start, end)
+        vectorized = time.perf_counter() - began
+        began = time.perf_counter()
+        reference = compute_per_case(cases, TODAY, end.astype(date))
+        per_case = time.perf_counter() - began
+        if len(reference) != len(case_ids):
+            raise SystemExit(f'Vectorized and per-case results differ: {len(case_ids)} != {len(reference)}')
+        print(f'  rule evaluation, vectorized  {vectorized:>8.3f}s ({len(case_ids)} deadlines)')
+        print(f'  rule evaluation, per case    {per_case:>8.3f}s ({per_case / vectorized:.0f}x slower)')
+
+        for run in ('first run (all missing)', 'second run (none missing)'):
+            began = time.perf_counter()
+            success, result = deadline_service.generate_statutory_deadlines(TODAY, HORIZON_MONTHS)
+            if not success:
+                raise SystemExit(result)
+            print(f"  generate, {run:<26} {time.perf_counter() - began:>8.3f}s, {result['inserted']} inserted")
+        db_handler.close()
+
+
+if __name__ == '__main__':
+    main()
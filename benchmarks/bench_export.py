@@ -0,0 +1,108 @@
+# benchmarks/bench_export.py
+'''
+Throughput and memory of the streaming exports (services.export_service), per format,
+on a realistic generated docket.
+
+    python -m benchmarks.bench_export --rows 1000000 --dataset docket
+
+Every format runs in a fresh interpreter, so 'peak RSS' is the high-water mark of that
+export alone and 'growth' what it added to the process after its imports; with
+streaming, both stay flat as --rows grows. The export is written to /dev/null:
+the figures are those of reading and encoding, not of the disk.
+'''
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.datagen import generate_realistic_docket, scaled_counts
+from database_handler.database_handler import DatabaseHandler
+from services.export_service import EXPORT_DATASETS, parquet_available
+
+
+def peak_rss_mb() -> float:
+    '''High-water mark of this process' resident memory.'''
+    # ru_maxrss survives fork and exec, so a worker would report the parent's peak: prefer VmHWM
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # In KiB on Linux, in bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 2 ** 20 if sys.platform == 'darwin' else maxrss / 1024
+
+
+def run_export(db_path: Path, dataset: str, export_format: str) -> dict:
+    '''The worker: one export in this process, reported as a dict.'''
+    from repos.cases_repo import CasesRepo
+    from repos.clients_repo import ClientsRepo
+    from repos.deadlines_repo import DeadlinesRepo
+    from services.export_service import ExportService
+    if export_format == 'parquet':
+        import pyarrow.parquet  # noqa: F401  Loaded before the baseline, like the rest of the code
+
+    db_handler = DatabaseHandler(db_path)
+    export_service = ExportService(ClientsRepo(db_handler), CasesRepo(db_handler), DeadlinesRepo(db_handler))
+    rss_before = peak_rss_mb()
+    with open(os.devnull, 'wb') as out:
+        success, report = export_service.export_to_file(dataset, export_format, out)
+    db_handler.close()
+    if not success:
+        raise SystemExit(f'{export_format} export failed: {report}')
+    rss_peak = peak_rss_mb()
+    return {'rows': report.rows, 'bytes': report.bytes, 'seconds': report.seconds, 'peak_mb': rss_peak, 'growth_mb': rss_peak - rss_before}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help='Deadlines; the other tables are scaled from it.')
+    parser.add_argument('--dataset', choices=EXPORT_DATASETS, default='docket')
+    parser.add_argument('--formats', nargs='*', default=None)
+    parser.add_argument('--worker', nargs=3, metavar=('DB', 'DATASET', 'FORMAT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        db_path, dataset, export_format = args.worker
+        print(json.dumps(run_export(Path(db_path), dataset, export_format)))
+        return
+
+    formats = args.formats or ['csv', 'jsonl'] + (['parquet'] if parquet_available() else [])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / 'bench.db'
+        counts = scaled_counts(args.rows)
+        db_handler = DatabaseHandler(db_path)
+        with db_handler as conn:
+            generate_realistic_docket(conn, counts['clients'], counts['cases'], counts['deadlines'])
+        # Fold the WAL into the database, so no worker pays for it
+        with db_handler as conn:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        db_handler.close()
+
+        print(f"{args.dataset} export, {counts['clients']} clients, {counts['cases']} cases, {counts['deadlines']} deadlines")
+        print(f"  {'format':<8} {'rows':>9} {'seconds':>8} {'rows/s':>10} {'MB':>8} {'MB/s':>7} {'peak RSS MB':>12} {'growth MB':>10}")
+        for export_format in formats:
+            worker = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_export', '--worker', str(db_path), args.dataset, export_format],
+                capture_output=True,
+                text=True
+            )
+            if worker.returncode != 0:
+                print(f'  {export_format:<8} failed: {worker.stderr.strip().splitlines()[-1:]}')
+                continue
+            result = json.loads(worker.stdout.strip().splitlines()[-1])
+            megabytes = result['bytes'] / 1e6
+            print(
+                f"  {export_format:<8} {result['rows']:>9} {result['seconds']:>8.2f} {result['rows'] / result['seconds']:>10,.0f} "
+                f"{megabytes:>8.1f} {megabytes / result['seconds']:>7.1f} {result['peak_mb']:>12.1f} {result['growth_mb']:>10.1f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/bench_rerun_latency.py
+'''
+Backend cost of one Streamlit rerun, before and after the process-wide services.
+
+before: every rerun built a new DatabaseHandler, reconnected and re-ran the migration
+        check (CREATE TABLE IF NOT EXISTS schema_migrations, SELECT, glob) - replayed here.
+after:  create_services() returns the services built by the first rerun.
+
+    python -m benchmarks.bench_rerun_latency --reruns 200
+'''
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+
+def legacy_rerun(db_path: Path) -> None:
+    '''What gui/create_services.py did on every rerun before the services were shared.'''
+    import sqlite3
+
+    from config.settings import MIGRATIONS_DIR
+    from gui.create_services import build_services
+    from utils.query_stats import QueryStats
+
+    class LegacyHandler:
+        pass
+
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA foreign_keys = ON;')
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT UNIQUE NOT NULL,
+            applied_at TEXT NOT NULL CHECK(LENGTH(applied_at)=19)
+        )
+    ''')
+    conn.commit()
+    cursor.execute('SELECT filename FROM schema_migrations')
+    applied = {row['filename'] for row in cursor.fetchall()}
+    pending = [f for f in sorted(MIGRATIONS_DIR.glob('*.sql')) if f.name not in applied]
+    assert not pending
+    conn.commit()
+    handler = LegacyHandler()
+    handler.conn = conn
+    # Disabled, as the handler's own; the audit service hangs its slow-query hook on it
+    handler.query_stats = QueryStats()
+    build_services(handler)
+    conn.close()
+
+
+def timed(function, reruns: int) -> list:
+    samples = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label: str, samples: list) -> None:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f'  {label:<40} mean {statistics.mean(samples):8.3f} ms   p95 {p95:8.3f} ms')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reruns', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / 'rerun.db'
+        # Point the process-wide services at the scratch database before anything reads the settings
+        os.environ['PCM_DB_PATH'] = str(db_path)
+        from database_handler.database_handler import DatabaseHandler
+        from gui.create_services import build_services, create_services
+
+        start = time.perf_counter()
+        create_services()
+        cold_ms = (time.perf_counter() - start) * 1000
+
+        print(f'Backend cost per rerun over {args.reruns} reruns (database already migrated)')
+        report('before: rebuild + migration check', timed(lambda: legacy_rerun(db_path), args.reruns))
+
+        def handler_per_rerun() -> None:
+            db_handler = DatabaseHandler(db_path)
+            build_services(db_handler)
+            db_handler.close()
+
+        report('rebuild with user_version check', timed(handler_per_rerun, args.reruns))
+        report('after: shared services', timed(create_services, args.reruns))
+        print(f'  {"first rerun of the process (cold build)":<40} {cold_ms:8.3f} ms')
+        create_services()[0].clients_repo.db_handler.close()
+
+
+if __name__ == '__main__':
+    main()
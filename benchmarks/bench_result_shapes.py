@@ -0,0 +1,68 @@
+# benchmarks/bench_result_shapes.py
+'''
+Time and memory of every repo result shape (repos.records) on a generated cases table.
+
+    python -m benchmarks.bench_result_shapes --clients 10000 --cases-per-client 10
+
+'retained' is the memory still held by the result, 'peak' the high-water mark while
+building it; both come from tracemalloc, which also slows every shape down a little.
+Buffers allocated outside the Python allocator (pyarrow-backed pandas strings) are not
+traced, so the dataframe's retained figure is a lower bound; its peak still counts the rows.
+'''
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.datagen import generate_docket
+from database_handler.database_handler import DatabaseHandler
+from repos.cases_repo import CasesRepo
+from repos.records import RESULT_SHAPES
+
+
+def measure(cases_repo: CasesRepo, shape: str, repeats: int) -> dict:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        success, result = cases_repo.get_all_cases(shape)
+        timings.append(time.perf_counter() - start)
+        if not success:
+            raise RuntimeError(result)
+        del result
+    gc.collect()
+    tracemalloc.start()
+    success, result = cases_repo.get_all_cases(shape)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': min(timings), 'retained_mb': retained / 2 ** 20, 'peak_mb': peak / 2 ** 20}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=10000)
+    parser.add_argument('--cases-per-client', type=int, default=10)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--shapes', nargs='*', default=list(RESULT_SHAPES))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_handler = DatabaseHandler(Path(tmp_dir) / 'bench.db')
+        with db_handler as conn:
+            generate_docket(conn, args.clients, args.cases_per_client, 0)
+        cases_repo = CasesRepo(db_handler)
+        print(f'{args.clients * args.cases_per_client} cases')
+        print(f"  {'shape':<10} {'seconds':>9} {'retained MB':>12} {'peak MB':>9}")
+        for shape in args.shapes:
+            try:
+                results = measure(cases_repo, shape, args.repeats)
+            except RuntimeError as e:
+                print(f'  {shape:<10} failed: {e}')
+                continue
+            print(f"  {shape:<10} {results['seconds']:>9.3f} {results['retained_mb']:>12.1f} {results['peak_mb']:>9.1f}")
+        db_handler.close()
+
+
+if __name__ == '__main__':
+    main()
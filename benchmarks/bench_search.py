@@ -0,0 +1,123 @@
+# benchmarks/bench_search.py
+'''
+FTS5 search against LIKE scans over 200k cases (by default).
+
+    python -m benchmarks.bench_search --clients 2000 --cases-per-client 100
+
+Gives the generated cases titles, notes and filing numbers drawn from a technical
+vocabulary (Zipf-distributed, so some words are common and most are rare), then times
+one page of CasesService.search against the LIKE query the search replaces, ANDing a
+'%word%' match over client_ref, filing_number, title and notes per word.
+'''
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.datagen import generate_docket
+from database_handler.database_handler import DatabaseHandler
+from gui.create_services import build_services
+from utils.search import fts_query
+
+VOCABULARY = '''
+    valve pump rotor stator bearing seal housing shaft impeller gasket piston cylinder nozzle
+    actuator sensor controller circuit battery electrode cathode anode membrane polymer coating
+    substrate wafer laser optical lens mirror fiber antenna signal receiver transmitter
+    modulation encoder decoder processor memory cache network packet protocol router switch
+    display pixel panel touch screen camera image filter catalyst reactor compound formulation
+    tablet capsule dosage antibody peptide enzyme vaccine assay diagnostic implant stent catheter
+    syringe needle bandage adhesive textile fabric yarn fastener hinge latch lock drawer shelf
+    frame bracket clamp spring damper brake clutch gear transmission engine turbine blade
+    compressor condenser evaporator heat exchanger insulation panel roof facade window glazing
+    concrete cement asphalt steel alloy aluminium copper magnet coil transformer inverter
+    charger grid meter lamp diode luminaire packaging bottle closure cap container label
+    printer cartridge ink toner paper folding cutting welding soldering drilling milling
+'''.split()
+
+NOTE_WORDS = '''
+    client requested amendment examiner objection novelty inventive step clarity response
+    deadline extension priority claim translation validation annuity renewal opposition
+    appeal hearing oral proceedings search report communication reply filed granted
+'''.split()
+
+QUERIES = ['valve', 'pump housing', 'milling', 'electro', 'EP0012', 'REF-0042', 'examiner clarity']
+
+
+def add_case_texts(conn, cases: int, seed: int = 7) -> None:
+    '''Overwrites the generated titles with vocabulary text and adds notes and filing numbers.'''
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, len(VOCABULARY) + 1)]
+    rows = (
+        (
+            ' '.join(rng.choices(VOCABULARY, weights, k=rng.randint(3, 8))).capitalize(),
+            ' '.join(rng.choices(NOTE_WORDS, k=rng.randint(5, 25))).capitalize() + '.',
+            f'EP{rng.randrange(10 ** 7):07d}.{rng.randrange(10)}',
+            case_id
+        )
+        for case_id in range(1, cases + 1)
+    )
+    conn.executemany('UPDATE cases SET title=?, notes=?, filing_number=? WHERE case_id=?', rows)
+    conn.commit()
+
+
+def like_query(words: list, limit: int) -> tuple:
+    fields = ('client_ref', 'filing_number', 'title', 'notes')
+    conditions = ' AND '.join('(' + ' OR '.join(f'{field} LIKE ?' for field in fields) + ')' for _ in words)
+    params = [f'%{word}%' for word in words for _ in fields]
+    return (f'SELECT case_id, client_ref, title FROM cases WHERE {conditions} LIMIT ?', tuple(params) + (limit,))
+
+
+def like_count_query(words: list) -> tuple:
+    query, params = like_query(words, 0)
+    return (query.replace('SELECT case_id, client_ref, title', 'SELECT COUNT(*)').replace(' LIMIT ?', ''), params[:-1])
+
+
+def best_of(function, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=2000)
+    parser.add_argument('--cases-per-client', type=int, default=100)
+    parser.add_argument('--page-size', type=int, default=50)
+    args = parser.parse_args()
+    cases = args.clients * args.cases_per_client
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_handler = DatabaseHandler(Path(tmp_dir) / 'bench.db')
+        with db_handler as conn:
+            generate_docket(conn, args.clients, args.cases_per_client, 0)
+            start = time.perf_counter()
+            add_case_texts(conn, cases)
+            print(f'{cases} cases; writing their texts through the FTS triggers took {time.perf_counter() - start:.1f}s')
+        _, cases_service, _, _, audit_service = build_services(db_handler)
+        audit_service.detach()
+        # Every call would otherwise be served from the query cache after the first one
+        db_handler.query_cache.max_entries = 0
+
+        print(f"  {'query':<18} {'hits':>7} {'FTS5 page':>10} {'LIKE page':>10} {'LIKE count':>11}")
+        for text in QUERIES:
+            words = text.split()
+            success, page = cases_service.search(text, limit=args.page_size)
+            if not success:
+                raise SystemExit(page)
+            with db_handler.read() as conn:
+                hits = conn.execute(
+                    'SELECT COUNT(*) FROM cases_fts WHERE cases_fts MATCH ?', (fts_query(text),)
+                ).fetchone()[0]
+                like_page = best_of(lambda: conn.execute(*like_query(words, args.page_size)).fetchall())
+                like_count = best_of(lambda: conn.execute(*like_count_query(words)).fetchone(), repeat=1)
+            fts_page = best_of(lambda: cases_service.search(text, limit=args.page_size))
+            print(f'  {text:<18} {hits:>7} {fts_page * 1000:>8.1f}ms {like_page * 1000:>8.1f}ms {like_count * 1000:>9.1f}ms')
+        db_handler.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_storage_profiles.py
+'''
+Read and write throughput of every storage profile in config.settings on a generated docket.
+
+    python -m benchmarks.bench_storage_profiles --clients 2000 --cases-per-client 10
+'''
+import argparse
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.datagen import TIMESTAMP, generate_docket
+from config.settings import STORAGE_PROFILES
+from database_handler.database_handler import DatabaseHandler
+from repos.cases_repo import CasesRepo
+from repos.clients_repo import ClientsRepo
+from repos.deadlines_repo import DeadlinesRepo
+
+
+def build_database(db_path: Path, profile: str, args: argparse.Namespace) -> None:
+    # A read-only profile cannot create its own data, so the file is built with a writable profile
+    build_profile = profile if not STORAGE_PROFILES[profile]['read_only'] else 'desktop-safe'
+    db_handler = DatabaseHandler(db_path, profile=build_profile)
+    with db_handler as conn:
+        generate_docket(conn, args.clients, args.cases_per_client, args.deadlines_per_case)
+    db_handler.close()
+
+
+def bench_writes(db_handler: DatabaseHandler, total_cases: int, writes: int) -> dict:
+    deadlines_repo = DeadlinesRepo(db_handler)
+    rng = random.Random(1)
+
+    def deadline() -> dict:
+        return {
+            'case_id': rng.randrange(1, total_cases + 1),
+            'description': 'Benchmark deadline',
+            'due_date': '2027-06-30',
+            'deadline_type': 'internal',
+            'status': 'Pending',
+            'completed': 0,
+            'created_at': TIMESTAMP,
+            'updated_at': TIMESTAMP,
+        }
+
+    start = time.perf_counter()
+    for _ in range(writes):
+        success, result = deadlines_repo.insert_deadline(deadline())
+        if not success:
+            raise RuntimeError(result)
+    single = writes / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with db_handler:
+        for _ in range(writes):
+            deadlines_repo.insert_deadline(deadline())
+    batched = writes / (time.perf_counter() - start)
+    return {'single_commit_writes_per_s': single, 'batched_writes_per_s': batched}
+
+
+def bench_reads(db_handler: DatabaseHandler, total_cases: int, reads: int, threads: int) -> dict:
+    cases_repo = CasesRepo(db_handler)
+    clients_repo = ClientsRepo(db_handler)
+    deadlines_repo = DeadlinesRepo(db_handler)
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        for i in range(reads):
+            if i % 50 == 0:
+                deadlines_repo.get_open_deadlines_board(limit=200)
+                clients_repo.get_active_clients()
+            else:
+                case_id = rng.randrange(1, total_cases + 1)
+                cases_repo.get_case_by_id(case_id)
+                deadlines_repo.get_open_deadlines_by_case(case_id)
+
+    results = {}
+    for thread_count in (1, threads):
+        workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(thread_count)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        results[f'reads_per_s_{thread_count}_threads'] = thread_count * reads / (time.perf_counter() - start)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--cases-per-client', type=int, default=10)
+    parser.add_argument('--deadlines-per-case', type=int, default=3)
+    parser.add_argument('--writes', type=int, default=500)
+    parser.add_argument('--reads', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--profiles', nargs='*', default=list(STORAGE_PROFILES))
+    args = parser.parse_args()
+    total_cases = args.clients * args.cases_per_client
+
+    print(f'Dataset: {args.clients} clients, {total_cases} cases, {total_cases * args.deadlines_per_case} deadlines')
+    for profile in args.profiles:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = Path(tmp_dir) / 'bench.db'
+            build_database(db_path, profile, args)
+            db_handler = DatabaseHandler(db_path, profile=profile, max_readers=args.threads)
+            results = {}
+            if not db_handler.read_only:
+                results.update(bench_writes(db_handler, total_cases, args.writes))
+            results.update(bench_reads(db_handler, total_cases, args.reads, args.threads))
+            db_handler.close()
+        print(f'\n{profile}')
+        for name, value in results.items():
+            print(f'  {name:<32} {value:>12,.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+# benchmarks/bench_table_rebuild.py
+'''
+Time of a schema change SQLite's ALTER TABLE cannot make - a new value in the CHECK of
+deadlines.status - on a realistic generated docket, made with the 12-step table rebuild.
+
+    python -m benchmarks.bench_table_rebuild --rows 1000000
+
+  migration      a .py migration calling rebuild_table, applied by the migration engine:
+                 batched copy, indexes and triggers recreated afterwards, then
+                 PRAGMA foreign_key_check and the commit
+  one batch      rebuild_table copying everything with a single INSERT ... SELECT
+  indexes first  the new table gets its indexes before the copy, which then maintains
+                 all six of them row by row (its triggers cannot be created before the
+                 copy at all: the deadline_load ones would count every deadline twice)
+
+Every variant works on its own copy of the same database, in one transaction.
+'''
+import argparse
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.datagen import generate_realistic_docket, scaled_counts
+from config.settings import MIGRATION_BATCH_ROWS, MIGRATIONS_DIR
+from database_handler.database_handler import DatabaseHandler
+from database_handler.migrations import list_migrations, migrate, rebuild_table
+
+MIGRATION = '''
+from database_handler.migrations import rebuild_table
+from benchmarks.bench_table_rebuild import new_deadlines_sql
+
+
+def upgrade(conn, progress):
+    rebuild_table(conn, 'deadlines', new_deadlines_sql(conn), progress=progress)
+'''
+
+
+def new_deadlines_sql(conn: sqlite3.Connection) -> str:
+    sql = conn.execute("SELECT sql FROM sqlite_schema WHERE type = 'table' AND name = 'deadlines'").fetchone()[0]
+    return sql.replace("IN ('Pending', 'Done', 'Overdue')", "IN ('Pending', 'Done', 'Overdue', 'Cancelled')")
+
+
+def run_migration(db_path: Path, migrations_dir: Path) -> float:
+    batches = []
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA foreign_keys = ON')
+    start = time.perf_counter()
+    migrate(conn, list_migrations(migrations_dir), progress=lambda table, copied, total: batches.append(copied))
+    seconds = time.perf_counter() - start
+    conn.close()
+    print(f'    {len(batches)} progress reports, last {batches[-1]} rows')
+    return seconds
+
+
+def run_one_batch(db_path: Path) -> float:
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    start = time.perf_counter()
+    conn.execute('BEGIN IMMEDIATE')
+    rebuild_table(conn, 'deadlines', new_deadlines_sql(conn), batch_rows=2 ** 62)
+    conn.execute('COMMIT')
+    seconds = time.perf_counter() - start
+    conn.close()
+    return seconds
+
+
+def run_indexes_first(db_path: Path) -> float:
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    start = time.perf_counter()
+    conn.execute('BEGIN IMMEDIATE')
+    create_sql = new_deadlines_sql(conn).replace('CREATE TABLE deadlines', 'CREATE TABLE new_deadlines', 1)
+    dependents = conn.execute("SELECT type, sql FROM sqlite_schema WHERE tbl_name = 'deadlines' AND sql IS NOT NULL").fetchall()
+    conn.execute(create_sql)
+    for object_type, sql in dependents:
+        if object_type == 'index':
+            conn.execute(sql.replace(' ON deadlines(', ' ON new_deadlines(').replace('CREATE INDEX idx_', 'CREATE INDEX new_idx_'))
+    conn.execute('INSERT INTO new_deadlines SELECT * FROM deadlines')
+    conn.execute('DROP TABLE deadlines')
+    conn.execute('PRAGMA legacy_alter_table = ON')
+    conn.execute('ALTER TABLE new_deadlines RENAME TO deadlines')
+    for object_type, sql in dependents:
+        if object_type == 'trigger':
+            conn.execute(sql)
+    conn.execute('COMMIT')
+    seconds = time.perf_counter() - start
+    conn.close()
+    return seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help='Deadlines; the other tables are scaled from it.')
+    parser.add_argument('--db', type=Path, help='Use a copy of this database instead of generating one.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        source = tmp_dir / 'source.db'
+        if args.db:
+            shutil.copyfile(args.db, source)
+        else:
+            counts = scaled_counts(args.rows)
+            db_handler = DatabaseHandler(source)
+            with db_handler as conn:
+                generate_realistic_docket(conn, counts['clients'], counts['cases'], counts['deadlines'])
+            db_handler.close()
+        conn = sqlite3.connect(source)
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        conn.execute('PRAGMA journal_mode = DELETE')
+        rows = conn.execute('SELECT COUNT(*) FROM deadlines').fetchone()[0]
+        load_before = conn.execute('SELECT SUM(open_count) FROM deadline_load').fetchone()[0]
+        conn.close()
+
+        # The project's migrations plus the rebuild, as the next migration
+        migrations_dir = tmp_dir / 'migrations'
+        shutil.copytree(MIGRATIONS_DIR, migrations_dir)
+        (migrations_dir / f'{list_migrations()[-1].version + 1:04d}_deadlines_cancelled_status.py').write_text(MIGRATION)
+
+        print(f'deadlines rebuild, {rows} rows, batches of {MIGRATION_BATCH_ROWS}')
+        print(f"  {'variant':<14} {'seconds':>8} {'rows/s':>10}")
+        for name, run in (
+                ('migration', lambda path: run_migration(path, migrations_dir)),
+                ('one batch', run_one_batch),
+                ('indexes first', run_indexes_first)):
+            db_path = tmp_dir / 'rebuild.db'
+            shutil.copyfile(source, db_path)
+            seconds = run(db_path)
+            conn = sqlite3.connect(db_path)
+            assert conn.execute('SELECT COUNT(*) FROM deadlines').fetchone()[0] == rows
+            assert conn.execute('SELECT SUM(open_count) FROM deadline_load').fetchone()[0] == load_before
+            assert "'Cancelled'" in new_deadlines_sql(conn)
+            conn.close()
+            print(f'  {name:<14} {seconds:>8.2f} {rows / seconds:>10,.0f}')
+            db_path.unlink()
+
+
+if __name__ == '__main__':
+    main()
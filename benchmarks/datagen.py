@@ -0,0 +1,267 @@
+# benchmarks/datagen.py
+'''
+Deterministic synthetic docket data for the benchmark scripts.
+
+generate_docket fills a docket with uniform shapes (every client the same number of
+cases, every case the same number of deadlines). generate_realistic_docket follows what
+a real practice looks like: a few clients own most cases, EP/DE/US dominate, older cases
+are granted or closed, deadlines cluster in the coming months and at month ends, past
+ones are mostly done; it also writes hash-chained audit_records and audit_logs.
+
+    python -m benchmarks.datagen --rows 100000 --db /tmp/docket.db
+'''
+import argparse
+import calendar
+import itertools
+import random
+import sqlite3
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from database_handler.database_handler import DatabaseHandler
+from utils.audit import chain_rows, encode_value
+
+JURISDICTIONS = ['EP', 'DE', 'US', 'IT', 'FR', 'GB', 'CN', 'JP', 'KR', 'WO']
+STATUSES = ['filed', 'pending', 'granted', 'refused', 'withdrawn', 'expired']
+IPR_TYPES = ['PAT', 'TM', 'DES', 'UM']
+PROCEDURE_TYPES = ['prosecution', 'opposition', 'general counselling']
+DEADLINE_TYPES = ['statutory', 'client', 'internal']
+TIMESTAMP = '2026-01-01 09:00:00'
+TODAY = date(2026, 1, 1)
+AUDIT_START = datetime(2020, 1, 1, 8, 0)
+
+# --- Realistic distributions: value -> relative weight --- #
+COUNTRY_WEIGHTS = {'DE': 45, 'IT': 15, 'FR': 10, 'CH': 8, 'AT': 7, 'US': 8, 'GB': 7}
+CITIES = ['Munich', 'Berlin', 'Milan', 'Turin', 'Paris', 'Lyon', 'Zurich', 'Vienna', 'Boston', 'London', None]
+JURISDICTION_WEIGHTS = {'EP': 30, 'DE': 20, 'US': 15, 'WO': 10, 'IT': 6, 'FR': 5, 'GB': 5, 'CN': 4, 'JP': 3, 'KR': 2}
+IPR_TYPE_WEIGHTS = {'PAT': 70, 'TM': 20, 'DES': 7, 'UM': 3}
+PROCEDURE_TYPE_WEIGHTS = {'prosecution': 80, 'opposition': 10, 'general counselling': 10}
+# Case status by age: young cases are still being prosecuted, old ones granted or closed
+YOUNG_CASE_DAYS = 540
+YOUNG_STATUS_WEIGHTS = {'filed': 50, 'pending': 45, 'withdrawn': 5}
+OLD_STATUS_WEIGHTS = {'pending': 20, 'granted': 55, 'refused': 7, 'withdrawn': 8, 'expired': 10}
+OPEN_STATUSES = {'filed', 'pending', 'granted'}
+DEADLINE_TYPE_WEIGHTS = {'statutory': 60, 'client': 25, 'internal': 15}
+DEADLINE_DESCRIPTIONS = {
+    'statutory': ['Response to communication', 'Annuity payment', 'Priority year', 'Validation', 'Opposition period'],
+    'client': ['Client instructions', 'Report to client', 'Cost estimate'],
+    'internal': ['Docket review', 'Draft claims', 'Prior art search'],
+}
+TITLE_WORDS = '''
+    valve pump rotor bearing seal housing shaft piston nozzle actuator sensor controller battery
+    electrode membrane polymer coating substrate laser lens antenna encoder processor memory
+    display camera filter catalyst compound tablet antibody enzyme implant catheter fastener
+    hinge spring brake gear turbine compressor inverter charger lamp bottle closure printer
+'''.split()
+AUDIT_LOG_ACTIONS = {'backup': 40, 'import': 25, 'verify': 20, 'export': 15}
+AUDIT_LOG_LEVELS = {'INFO': 90, 'WARNING': 8, 'ERROR': 2}
+# Clients own cases along a Zipf curve with this exponent
+CLIENT_SIZE_EXPONENT = 0.9
+MAX_CLIENTS = 36 ** 3
+
+
+def generate_docket(
+        conn: sqlite3.Connection,
+        clients: int,
+        cases_per_client: int,
+        deadlines_per_case: int,
+        seed: int = 42
+        ) -> None:
+    '''Inserts clients, their cases and the cases' deadlines in one transaction.'''
+    rng = random.Random(seed)
+    today = date(2026, 1, 1)
+    conn.executemany(
+        'INSERT INTO clients (client_code, name, country, is_active, created_at, updated_at) VALUES (?, ?, ?, 1, ?, ?)',
+        ((_code(i), f'Client {i:06d}', 'DE', TIMESTAMP, TIMESTAMP) for i in range(clients))
+    )
+    case_rows = (
+        (
+            client_id, f'REF-{n:04d}', f'Case {client_id}-{n}',
+            rng.choice(JURISDICTIONS), rng.choice(STATUSES), rng.choice(IPR_TYPES), rng.choice(PROCEDURE_TYPES),
+            (today - timedelta(days=rng.randrange(0, 3650))).isoformat(), TIMESTAMP, TIMESTAMP
+        )
+        for client_id in range(1, clients + 1)
+        for n in range(cases_per_client)
+    )
+    conn.executemany(
+        'INSERT INTO cases (client_id, client_ref, title, jurisdiction, status, ipr_type, procedure_type, '
+        'filing_date, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        case_rows
+    )
+    deadline_rows = (
+        (
+            case_id, f'Deadline {case_id}-{n}', (today + timedelta(days=rng.randrange(0, 730))).isoformat(),
+            rng.choice(DEADLINE_TYPES), TIMESTAMP, TIMESTAMP
+        )
+        for case_id in range(1, clients * cases_per_client + 1)
+        for n in range(deadlines_per_case)
+    )
+    conn.executemany(
+        'INSERT INTO deadlines (case_id, description, due_date, deadline_type, created_at, updated_at) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        deadline_rows
+    )
+    conn.commit()
+
+
+def scaled_counts(rows: int) -> Dict[str, int]:
+    '''Table sizes of a realistic docket whose largest table, deadlines, has rows rows.'''
+    cases = max(1, rows // 3)
+    return {
+        'clients': max(1, min(MAX_CLIENTS // 2, cases // 25)),
+        'cases': cases,
+        'deadlines': rows,
+        'audit_records': rows // 2,
+        'audit_logs': max(1, rows // 100),
+    }
+
+
+def generate_realistic_docket(
+        conn: sqlite3.Connection,
+        clients: int,
+        cases: int,
+        deadlines: int,
+        audit_records: int = 0,
+        audit_logs: int = 0,
+        seed: int = 42
+        ) -> None:
+    '''Inserts a realistically distributed docket, plus chained audit rows, in one transaction.'''
+    rng = random.Random(seed)
+    conn.executemany(
+        'INSERT INTO clients (client_code, name, city, country, is_active, deactivated_at, created_at, updated_at) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        (
+            (_code(i), f'Client {i:06d}', rng.choice(CITIES), country, active, None if active else TIMESTAMP, TIMESTAMP, TIMESTAMP)
+            for i in range(clients)
+            for country, active in [(_weighted(rng, COUNTRY_WEIGHTS), int(rng.random() > 0.08))]
+        )
+    )
+
+    # Cases: a few large clients, many small ones
+    client_weights = list(itertools.accumulate(1 / rank ** CLIENT_SIZE_EXPONENT for rank in range(1, clients + 1)))
+    owners = rng.choices(range(1, clients + 1), cum_weights=client_weights, k=cases)
+    refs_per_client: Dict[int, int] = {}
+    open_flags: List[int] = []
+    case_rows = []
+    for client_id in owners:
+        n = refs_per_client[client_id] = refs_per_client.get(client_id, 0) + 1
+        age = int(rng.triangular(0, 7300, 0))
+        filing_date = TODAY - timedelta(days=age)
+        status = _weighted(rng, YOUNG_STATUS_WEIGHTS if age < YOUNG_CASE_DAYS else OLD_STATUS_WEIGHTS)
+        is_open = int(status in OPEN_STATUSES)
+        jurisdiction = _weighted(rng, JURISDICTION_WEIGHTS)
+        open_flags.append(is_open)
+        case_rows.append((
+            client_id, f'REF-{n:05d}', ' '.join(rng.sample(TITLE_WORDS, 3)).capitalize(), jurisdiction, status,
+            _weighted(rng, IPR_TYPE_WEIGHTS), _weighted(rng, PROCEDURE_TYPE_WEIGHTS), filing_date.isoformat(),
+            None if status == 'filed' and rng.random() < 0.3 else f'{jurisdiction}{filing_date.year}{len(case_rows):07d}',
+            is_open, None if is_open else TIMESTAMP, TIMESTAMP, TIMESTAMP
+        ))
+    conn.executemany(
+        'INSERT INTO cases (client_id, client_ref, title, jurisdiction, status, ipr_type, procedure_type, '
+        'filing_date, filing_number, is_open, closed_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        case_rows
+    )
+    del case_rows
+
+    # Deadlines: mostly on open cases; past ones mostly done, future ones mostly pending
+    case_weights = list(itertools.accumulate(1.0 if is_open else 0.1 for is_open in open_flags))
+    deadline_cases = rng.choices(range(1, cases + 1), cum_weights=case_weights, k=deadlines)
+    conn.executemany(
+        'INSERT INTO deadlines (case_id, description, due_date, deadline_type, status, completed, completed_at, '
+        'created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        (_deadline_row(rng, case_id) for case_id in deadline_cases)
+    )
+
+    if audit_records:
+        _append_chain(conn, 'audit_records', (
+            {
+                'table_name': table_name,
+                'action': 'insert' if i % 4 else 'update',
+                'table_record_id': 1 + i % size,
+                'new_value': encode_value({'updated_at': TIMESTAMP, 'row': i}),
+                'timestamp': _audit_timestamp(i),
+            }
+            for i in range(audit_records)
+            for table_name, size in [[('clients', clients), ('cases', cases), ('deadlines', deadlines)][i % 3]]
+        ))
+    if audit_logs:
+        _append_chain(conn, 'audit_logs', (
+            {
+                'log_level': _weighted(rng, AUDIT_LOG_LEVELS),
+                'action': action,
+                'description': f'{action.capitalize()} run {i}',
+                'timestamp': _audit_timestamp(i * 97),
+            }
+            for i in range(audit_logs)
+            for action in [_weighted(rng, AUDIT_LOG_ACTIONS)]
+        ))
+    conn.commit()
+
+
+def _weighted(rng: random.Random, weights: Dict[str, int]) -> str:
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _deadline_row(rng: random.Random, case_id: int) -> tuple:
+    deadline_type = _weighted(rng, DEADLINE_TYPE_WEIGHTS)
+    if rng.random() < 0.35:
+        due_date = TODAY - timedelta(days=rng.randrange(1, 730))
+        status = 'Done' if rng.random() < 0.9 else 'Overdue'
+    else:
+        due_date = TODAY + timedelta(days=int(rng.triangular(0, 730, 30)))
+        status = 'Done' if rng.random() < 0.03 else 'Pending'
+    if deadline_type == 'statutory' and rng.random() < 0.4:
+        # Statutory periods often end on the last day of a month
+        due_date = due_date.replace(day=calendar.monthrange(due_date.year, due_date.month)[1])
+    done = status == 'Done'
+    return (
+        case_id, rng.choice(DEADLINE_DESCRIPTIONS[deadline_type]), due_date.isoformat(), deadline_type, status,
+        int(done), TIMESTAMP if done else None, TIMESTAMP, TIMESTAMP
+    )
+
+
+def _audit_timestamp(minutes: int) -> str:
+    '''Ascending timestamps, minutes after AUDIT_START.'''
+    return (AUDIT_START + timedelta(minutes=minutes)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _append_chain(conn: sqlite3.Connection, chain: str, rows, batch_size: int = 10000) -> None:
+    '''Hash-chains rows in order and inserts them in batches, continuing from the chain's last row.'''
+    last = conn.execute(f'SELECT hash FROM {chain} ORDER BY rowid DESC LIMIT 1').fetchone()
+    previous_hash = last[0] if last else None
+    columns = None
+    for batch in iter(lambda: list(itertools.islice(rows, batch_size)), []):
+        previous_hash = chain_rows(chain, previous_hash, batch)
+        columns = columns or tuple(batch[0])
+        conn.executemany(
+            f"INSERT INTO {chain} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            [tuple(row[column] for column in columns) for row in batch]
+        )
+
+
+def _code(i: int) -> str:
+    '''Unique three-character client code (base 36, up to 46656 clients).'''
+    digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    return ''.join(digits[(i // 36 ** k) % 36] for k in (2, 1, 0))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='Deadlines; the other tables are scaled from it.')
+    parser.add_argument('--db', type=Path, required=True, help='Database file to create (must not exist).')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    if args.db.exists():
+        raise SystemExit(f'{args.db} already exists')
+    counts = scaled_counts(args.rows)
+    db_handler = DatabaseHandler(args.db)
+    with db_handler as conn:
+        generate_realistic_docket(conn, seed=args.seed, **counts)
+    db_handler.close()
+    print(', '.join(f'{count} {table}' for table, count in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,624 @@
+# benchmarks/suite.py
+'''
+Times every public repo and service method over realistic dockets of several sizes and
+compares the timings with a stored baseline.
+
+    python -m benchmarks.suite --sizes 1k 100k 1m --baseline benchmarks/baseline.json --threshold 0.25
+    python -m benchmarks.suite --sizes 1k 100k --update-baseline
+
+A size is the number of deadlines; clients, cases and audit rows are scaled from it (see
+datagen.scaled_counts). Methods are discovered from the repo and service classes, so a
+new public method fails the run until CALL_ARGS knows how to call it or SKIPPED says why
+it is not timed. BaseRepo's generic write methods are timed once, on CasesRepo.
+
+Reads run first with the query cache off, each after one untimed warm-up call; iter_*
+generators are drained. Writes run after, with the audit trail attached as in the app,
+each call on fresh data. A method is repeated until it has used its time budget. Every
+round times the whole list on a fresh copy of the docket, so a burst of load on the
+machine slows one round of a method rather than all of its calls. Each round keeps a
+method's fastest call; the median of those over --rounds rounds is the method's time.
+
+The baseline also records each method's spread: how far apart its rounds were. The run
+fails (exit 1) when a call fails, or when a method's time exceeds its baseline by more
+than the largest of --threshold of it, NOISE_SPREADS times its spread and --min-delta-ms,
+and still does after --confirm-rounds more rounds of just the methods that looked slower.
+
+Shared and laptop machines change speed from one minute to the next, slowing every
+method alike. A fixed calibration workload (Python loops and an in-memory SQLite insert
+and aggregate) is therefore timed around each round, each method's time is taken
+relative to its round's calibration, and the median relative time is compared with the
+baseline's (--no-calibrate to compare raw times).
+
+--db-dir keeps the generated dockets (docket-<size>.db) and reuses them on later runs;
+every run works on a copy, so the kept files stay pristine.
+'''
+import argparse
+import gc
+import inspect
+import io
+import json
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from benchmarks.datagen import MAX_CLIENTS, TIMESTAMP, _code, generate_realistic_docket, scaled_counts
+from database_handler.database_handler import DatabaseHandler
+from gui.create_services import build_services
+from repos.base_repo import BaseRepo
+from utils.audit import chain_rows, encode_value
+from utils.query_plan_check import REPO_CLASSES
+
+DEFAULT_SIZES = ['1k', '100k']
+DEFAULT_BASELINE = Path(__file__).with_name('baseline.json')
+DEFAULT_THRESHOLD = 0.25
+# Differences below this are timer and scheduler noise, whatever the ratio
+DEFAULT_MIN_DELTA_MS = 1.0
+# A method may be this many times its recorded spread slower before it counts as a regression
+NOISE_SPREADS = 2.0
+# Seconds of calls per method and round, at most MAX_REPEATS of them
+TIME_BUDGET = 0.2
+MAX_REPEATS = 50
+READ_METHOD_PREFIXES = ('get_', 'iter_', 'search', 'prepare_', 'verify_')
+# Rows per call of the batch write methods
+BATCH_ROWS = 100
+SIZE_SUFFIXES = {'k': 1000, 'm': 1000000}
+DEFAULT_ROUNDS = 5
+DEFAULT_CONFIRM_ROUNDS = 2
+CALIBRATION_ROWS = 20000
+CALIBRATION_REPEATS = 7
+
+
+@dataclass
+class Context:
+    '''The docket a run works on and the objects whose methods are timed.'''
+    counts: Dict[str, int]
+    targets: Dict[str, object]
+    _serial: int = field(default=0)
+
+    def serial(self) -> int:
+        '''A number no earlier call of the run got, for unique codes and refs.'''
+        self._serial += 1
+        return self._serial
+
+    def new_client_code(self) -> str:
+        # Generated clients use the low codes, so counting down from the top never collides
+        return _code(MAX_CLIENTS - self.serial())
+
+    def record_id(self, table: str, n: int) -> int:
+        '''The n-th existing id of table, cycling, so repeated writes touch different rows.'''
+        return 1 + (n * 7919) % self.counts[table]
+
+    def new_record(self, repo_label: str, insert: str, record: dict) -> int:
+        '''Inserts record (outside the timing) and returns its id, for writes that need a childless row.'''
+        success, record_id = getattr(self.targets[repo_label], insert)(_stamped(record))
+        if not success:
+            raise RuntimeError(record_id)
+        return record_id
+
+    def chained(self, chain: str, rows: List[dict]) -> List[dict]:
+        '''rows hash-chained onto the current end of chain.'''
+        audit_service = self.targets['AuditService']
+        repo = audit_service.audit_records_repo if chain == 'audit_records' else audit_service.audit_logs_repo
+        success, last = repo.get_last_audit_record() if chain == 'audit_records' else repo.get_last_audit_log()
+        if not success:
+            raise RuntimeError(last)
+        chain_rows(chain, last['hash'] if last else None, rows)
+        return rows
+
+
+def _future(days: int = 30) -> str:
+    return (date.today() + timedelta(days=days)).isoformat()
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _client(ctx: Context) -> dict:
+    return {'client_code': ctx.new_client_code(), 'name': 'Benchmark client', 'country': 'DE'}
+
+
+def _case(ctx: Context, n: int) -> dict:
+    return {
+        'client_id': ctx.record_id('clients', n), 'client_ref': f'BENCH-{ctx.serial():07d}', 'title': 'Benchmark case',
+        'jurisdiction': 'EP', 'filing_date': '2025-06-30', 'status': 'filed',
+    }
+
+
+def _stamped(record: dict) -> dict:
+    record.update(created_at=TIMESTAMP, updated_at=TIMESTAMP)
+    return record
+
+
+def _deadline(ctx: Context, n: int) -> dict:
+    return {
+        'case_id': ctx.record_id('cases', n), 'description': 'Benchmark deadline', 'due_date': _future(),
+        'deadline_type': 'statutory', 'status': 'Pending',
+    }
+
+
+def _audit_record(n: int) -> dict:
+    return {
+        'table_name': 'cases', 'action': 'update', 'table_record_id': n + 1,
+        'new_value': encode_value({'title': 'Benchmark'}), 'timestamp': _now(),
+    }
+
+
+def _audit_log(n: int) -> dict:
+    return {'log_level': 'INFO', 'action': 'benchmark', 'description': f'Benchmark {n}', 'timestamp': _now()}
+
+
+def _csv(header: List[str], rows: List[list]) -> io.StringIO:
+    lines = [','.join(header)] + [','.join(str(value) for value in row) for row in rows]
+    return io.StringIO('\n'.join(lines) + '\n')
+
+
+# --- How to call each method with required arguments: (ctx, call number) -> args --- #
+ArgsFactory = Callable[[Context, int], tuple]
+CALL_ARGS: Dict[str, ArgsFactory] = {
+    # Reads
+    'ClientsRepo.get_client_by_id': lambda ctx, n: (ctx.record_id('clients', n),),
+    'ClientsRepo.get_existing_client_codes': lambda ctx, n: ([_code(i) for i in range(0, 2000, 20)],),
+    'ClientsRepo.get_existing_client_ids': lambda ctx, n: (list(range(1, 101)),),
+    'ClientsRepo.get_search_page': lambda ctx, n: ('"client"*',),
+    'CasesRepo.get_case_by_id': lambda ctx, n: (ctx.record_id('cases', n),),
+    'CasesRepo.get_cases_by_client': lambda ctx, n: (1,),
+    'CasesRepo.get_open_cases_by_client': lambda ctx, n: (1,),
+    'CasesRepo.get_cases_by_ipr_type': lambda ctx, n: ('DES',),
+    'CasesRepo.get_cases_by_jurisdiction': lambda ctx, n: ('JP',),
+    'CasesRepo.get_cases_by_procedure': lambda ctx, n: ('opposition',),
+    'CasesRepo.get_cases_by_status': lambda ctx, n: ('refused',),
+    'CasesRepo.get_search_page': lambda ctx, n: ('"valve"*',),
+    'DeadlinesRepo.get_deadline_by_id': lambda ctx, n: (ctx.record_id('deadlines', n),),
+    'DeadlinesRepo.get_open_deadlines_by_case': lambda ctx, n: (ctx.record_id('cases', n),),
+    'DeadlineLoadRepo.get_load_by_day': lambda ctx, n: ('2026-01-01', '2026-12-31'),
+    'AuditRecordsRepo.get_audit_record_by_id': lambda ctx, n: (ctx.record_id('audit_records', n),),
+    'AuditLogsRepo.get_audit_log_by_id': lambda ctx, n: (ctx.record_id('audit_logs', n),),
+    'AuditLogsRepo.get_audit_logs_by_level': lambda ctx, n: ('WARNING',),
+    'AuditLogsRepo.get_audit_logs_by_action': lambda ctx, n: ('backup',),
+    'AuditCheckpointsRepo.get_checkpoints': lambda ctx, n: ('audit_records',),
+    'AuditCheckpointsRepo.get_last_checkpoint': lambda ctx, n: ('audit_records',),
+    'ClientsService.get_client_by_id': lambda ctx, n: (ctx.record_id('clients', n),),
+    'ClientsService.prepare_new_client': lambda ctx, n: (_client(ctx),),
+    'ClientsService.search': lambda ctx, n: ('client',),
+    'CasesService.get_case_by_id': lambda ctx, n: (ctx.record_id('cases', n),),
+    'CasesService.get_cases_by_client': lambda ctx, n: (1,),
+    'CasesService.get_open_cases_by_client': lambda ctx, n: (1,),
+    'CasesService.get_cases_by_ipr_type': lambda ctx, n: ('DES',),
+    'CasesService.get_cases_by_jurisdiction': lambda ctx, n: ('JP',),
+    'CasesService.get_cases_by_procedure': lambda ctx, n: ('opposition',),
+    'CasesService.get_cases_by_status': lambda ctx, n: ('refused',),
+    'CasesService.prepare_new_case': lambda ctx, n: (_case(ctx, n),),
+    'CasesService.search': lambda ctx, n: ('valve',),
+    'DeadlineService.get_deadline_by_id': lambda ctx, n: (ctx.record_id('deadlines', n),),
+    'DeadlineService.get_open_deadlines_by_case': lambda ctx, n: (ctx.record_id('cases', n),),
+    'DeadlineService.get_deadline_load_by_day': lambda ctx, n: ('2026-01-01', '2026-12-31'),
+    'DeadlineService.get_deadline_load_by_week': lambda ctx, n: ('2026-01-01', '2026-12-31'),
+    'AuditService.get_audit_logs_by_action': lambda ctx, n: ('backup',),
+    # The whole chain, not the rows after the last checkpoint
+    'AuditService.verify_chain': lambda ctx, n: ('audit_records', False),
+    # Writes
+    'ClientsRepo.insert_client': lambda ctx, n: (_stamped(_client(ctx)),),
+    'ClientsRepo.update_client': lambda ctx, n: ({'city': 'Munich', 'updated_at': TIMESTAMP}, ctx.record_id('clients', n)),
+    'ClientsRepo.deactivate_client': lambda ctx, n: (ctx.record_id('clients', n),),
+    'CasesRepo.insert_case': lambda ctx, n: (_stamped(_case(ctx, n)),),
+    'CasesRepo.update_case': lambda ctx, n: ({'title': 'Renamed', 'updated_at': TIMESTAMP}, ctx.record_id('cases', n)),
+    'CasesRepo.close_case': lambda ctx, n: (ctx.record_id('cases', n),),
+    'CasesRepo.insert_new_record': lambda ctx, n: (_stamped(_case(ctx, n)),),
+    'CasesRepo.update_by_id': lambda ctx, n: ('case_id', ctx.record_id('cases', n), {'title': 'Renamed', 'updated_at': TIMESTAMP}),
+    'CasesRepo.insert_many': lambda ctx, n: ([_stamped(_case(ctx, n + i)) for i in range(BATCH_ROWS)],),
+    'CasesRepo.update_many': lambda ctx, n: (
+        [{'case_id': ctx.record_id('cases', n * BATCH_ROWS + i), 'title': 'Batch', 'updated_at': TIMESTAMP} for i in range(BATCH_ROWS)],
+    ),
+    'CasesRepo.upsert_many': lambda ctx, n: ([_stamped(_case(ctx, n + i)) for i in range(BATCH_ROWS)],),
+    'CasesRepo.import_records': lambda ctx, n: ([[(i, _stamped(_case(ctx, n + i))) for i in range(BATCH_ROWS)]],),
+    'DeadlinesRepo.insert_deadline': lambda ctx, n: (_stamped(dict(_deadline(ctx, n), completed=0)),),
+    'DeadlinesRepo.update_deadline': lambda ctx, n: ({'description': 'Moved', 'updated_at': TIMESTAMP}, ctx.record_id('deadlines', n)),
+    'DeadlinesRepo.mark_deadline_completed': lambda ctx, n: (ctx.record_id('deadlines', n),),
+    'DeadlinesRepo.mark_overdue': lambda ctx, n: (date.today().isoformat(), _now()),
+    'DeadlineSweepsRepo.insert_sweep': lambda ctx, n: (
+        {'swept_before': date.today().isoformat(), 'deadlines_marked': 0, 'swept_at': _now()},
+    ),
+    'AuditRecordsRepo.insert_audit_record': lambda ctx, n: (ctx.chained('audit_records', [_audit_record(n)])[0],),
+    'AuditRecordsRepo.append_audit_records': lambda ctx, n: (ctx.chained('audit_records', [_audit_record(n + i) for i in range(BATCH_ROWS)]),),
+    'AuditLogsRepo.insert_audit_log': lambda ctx, n: (ctx.chained('audit_logs', [_audit_log(n)])[0],),
+    'AuditLogsRepo.append_audit_logs': lambda ctx, n: (ctx.chained('audit_logs', [_audit_log(n + i) for i in range(BATCH_ROWS)]),),
+    'AuditCheckpointsRepo.insert_checkpoint': lambda ctx, n: (
+        {'chain_table': 'audit_logs', 'last_id': 1, 'last_hash': 'benchmark', 'rows_verified': 1, 'verified_at': _now()},
+    ),
+    'ClientsService.insert_client': lambda ctx, n: (_client(ctx),),
+    'ClientsService.update_client': lambda ctx, n: (
+        {'client_id': ctx.record_id('clients', n), 'name': 'Renamed client', 'country': 'DE', 'updated_at': TIMESTAMP},
+    ),
+    # Clients with open cases and cases with open deadlines are refused, so these act on new rows
+    'ClientsService.deactivate_client': lambda ctx, n: (ctx.new_record('ClientsRepo', 'insert_client', _client(ctx)),),
+    'CasesService.insert_case': lambda ctx, n: (_case(ctx, n),),
+    'CasesService.update_case': lambda ctx, n: (dict(_case(ctx, n), case_id=ctx.record_id('cases', n), updated_at=TIMESTAMP),),
+    'CasesService.close_case': lambda ctx, n: (ctx.new_record('CasesRepo', 'insert_case', _case(ctx, n)),),
+    'DeadlineService.insert_deadline': lambda ctx, n: (_deadline(ctx, n),),
+    'DeadlineService.update_deadline': lambda ctx, n: (dict(_deadline(ctx, n), deadline_id=ctx.record_id('deadlines', n)),),
+    'DeadlineService.mark_deadline_completed': lambda ctx, n: (ctx.record_id('deadlines', n),),
+    # Re-checks every due date; without full a repeated call returns before any query
+    'DeadlineService.sweep_overdue_deadlines': lambda ctx, n: (None, True),
+    'ImportService.import_clients': lambda ctx, n: (
+        _csv(['client_code', 'name', 'country'], [[ctx.new_client_code(), f'Imported {i}', 'IT'] for i in range(BATCH_ROWS)]),
+    ),
+    'ImportService.import_cases': lambda ctx, n: (
+        _csv(['client_id', 'client_ref', 'title', 'filing_date'], [
+            [ctx.record_id('clients', n + i), f'IMP-{ctx.serial():07d}', 'Imported case', '2025-06-30'] for i in range(BATCH_ROWS)
+        ]),
+    ),
+    'AuditService.record_changes': lambda ctx, n: ('cases', 'update', [(ctx.record_id('cases', n), {'title': 'Audited'})]),
+    'AuditService.log_slow_queries': lambda ctx, n: ([
+        {'method': 'CasesRepo.get_cases_by_status', 'ms': 312.5, 'rows': 4000, 'statement': 'SELECT * FROM cases WHERE status=?', 'timestamp': _now()}
+    ],),
+    'AuditService.log_events': lambda ctx, n: ([
+        {'log_level': 'INFO', 'action': 'backup', 'description': 'Benchmark backup', 'timestamp': _now()}
+    ],),
+}
+
+# Public methods that are not timed, with the reason
+SKIPPED = {
+    'AuditService.attach': 'wiring: registers the audit hook',
+    'AuditService.detach': 'wiring: removes the audit hook',
+    'AuditService.set_query_stats_enabled': 'wiring: switches query instrumentation',
+    'AuditService.reset_query_stats': 'clears in-memory counters, runs no query',
+}
+
+
+@dataclass
+class Timing:
+    name: str
+    seconds: Optional[float] = None
+    calls: int = 0
+    error: Optional[str] = None
+    # Per round: the fastest call, in seconds and in units of the round's calibration
+    round_seconds: List[float] = field(default_factory=list)
+    round_relatives: List[float] = field(default_factory=list)
+
+    @property
+    def relative(self) -> Optional[float]:
+        '''The median over rounds of the fastest call, relative to calibration.'''
+        return statistics.median(self.round_relatives) if self.round_relatives else None
+
+    @property
+    def typical_seconds(self) -> Optional[float]:
+        return statistics.median(self.round_seconds) if self.round_seconds else None
+
+    @property
+    def relative_spread(self) -> float:
+        '''How far apart the rounds were, relative to calibration: the noise of this method on this machine.'''
+        return max(self.round_relatives) - min(self.round_relatives) if self.round_relatives else 0.0
+
+
+@dataclass
+class SizeRun:
+    '''The timings of one docket size, with the calibration time of each round.'''
+    timings: List[Timing] = field(default_factory=list)
+    calibrations: List[float] = field(default_factory=list)
+
+    @property
+    def calibration(self) -> float:
+        return statistics.median(self.calibrations)
+
+
+def parse_size(label: str) -> int:
+    label = label.strip().lower()
+    if label and label[-1] in SIZE_SUFFIXES:
+        return int(float(label[:-1]) * SIZE_SUFFIXES[label[-1]])
+    return int(label)
+
+
+def discover_methods(targets: Dict[str, object]) -> List[Tuple[str, Callable]]:
+    '''(qualified name, bound method) of every public method, reads first.'''
+    base_methods = {name for name, _ in inspect.getmembers(BaseRepo, inspect.isfunction) if not name.startswith('_')}
+    methods = []
+    for label, target in targets.items():
+        for name, _ in inspect.getmembers(type(target), inspect.isfunction):
+            if name.startswith('_'):
+                continue
+            if isinstance(target, BaseRepo) and name in base_methods and label != 'CasesRepo':
+                continue
+            methods.append((f'{label}.{name}', getattr(target, name)))
+    return sorted(methods, key=lambda item: (not _is_read(item[0]), item[0]))
+
+
+def _is_read(qualified_name: str) -> bool:
+    return qualified_name.split('.', 1)[1].startswith(READ_METHOD_PREFIXES)
+
+
+def _has_required_params(method: Callable) -> bool:
+    return any(
+        param.default is inspect.Parameter.empty
+        and param.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+        for param in inspect.signature(method).parameters.values()
+    )
+
+
+def _call(method: Callable, args: tuple) -> None:
+    '''Calls method to completion (draining generators); raises RuntimeError when it reports a failure.'''
+    result = method(*args)
+    if inspect.isgenerator(result):
+        for _ in result:
+            pass
+    elif isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], bool):
+        success, value = result
+        if not success:
+            raise RuntimeError(value)
+        if getattr(value, 'failed', 0):
+            raise RuntimeError(f'{value.failed} rows failed: {value.errors[0].message}')
+
+
+def time_method(ctx: Context, qualified_name: str, method: Callable) -> Timing:
+    timing = Timing(qualified_name)
+    factory = CALL_ARGS.get(qualified_name)
+    if factory is None and _has_required_params(method):
+        timing.error = 'No arguments registered in CALL_ARGS'
+        return timing
+    read = _is_read(qualified_name)
+    try:
+        if read:
+            _call(method, factory(ctx, 0) if factory else ())
+        spent = 0.0
+        while timing.calls < MAX_REPEATS and spent < TIME_BUDGET:
+            args = factory(ctx, timing.calls + 1) if factory else ()
+            # As timeit does: a collection triggered by earlier calls is not this call's cost
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                _call(method, args)
+                elapsed = time.perf_counter() - start
+            finally:
+                gc.enable()
+            spent += elapsed
+            timing.calls += 1
+            timing.seconds = elapsed if timing.seconds is None else min(timing.seconds, elapsed)
+    except (RuntimeError, sqlite3.Error, ValueError, TypeError, KeyError) as e:
+        timing.error = f'{type(e).__name__}: {e}'
+    return timing
+
+
+def calibrate() -> float:
+    '''Fastest run of a fixed workload shaped like the methods timed: row building and SQLite.'''
+    fastest = None
+    for _ in range(CALIBRATION_REPEATS):
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            conn = sqlite3.connect(':memory:')
+            conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, label TEXT, amount REAL)')
+            conn.executemany('INSERT INTO t (label, amount) VALUES (?, ?)', ((f'L{i % 97}', i * 0.5) for i in range(CALIBRATION_ROWS)))
+            rows = [dict(zip(('label', 'total'), row)) for row in conn.execute('SELECT label, SUM(amount) FROM t GROUP BY label ORDER BY 2')]
+            rows += [{'id': row[0], 'label': row[1]} for row in conn.execute('SELECT id, label FROM t')]
+            conn.close()
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        fastest = elapsed if fastest is None else min(fastest, elapsed)
+    return fastest
+
+
+def prepare_docket(rows: int, label: str, work_dir: Path, db_dir: Optional[Path]) -> Path:
+    '''The pristine database of the given size: kept in db_dir, or generated into work_dir.'''
+    db_path = (db_dir or work_dir) / f'docket-{label}.db'
+    if db_path.exists():
+        return db_path
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    db_handler = DatabaseHandler(db_path)
+    with db_handler as conn:
+        generate_realistic_docket(conn, **scaled_counts(rows))
+    db_handler.close()
+    return db_path
+
+
+def time_round(rows: int, pristine: Path, work_dir: Path, only: Optional[Set[str]] = None) -> Dict[str, Timing]:
+    '''Times every method (or those in only) once over a fresh copy of pristine, so earlier writes never change what later reads see.'''
+    db_path = work_dir / 'round.db'
+    for leftover in work_dir.glob('round.db*'):
+        leftover.unlink()
+    shutil.copyfile(pristine, db_path)
+    db_handler = DatabaseHandler(db_path)
+    services = build_services(db_handler)
+    targets = {repo_class.__name__: repo_class(db_handler) for repo_class in REPO_CLASSES}
+    targets.update({type(service).__name__: service for service in services})
+    ctx = Context(scaled_counts(rows), targets)
+    db_handler.query_cache.max_entries = 0
+    try:
+        return {
+            qualified_name: time_method(ctx, qualified_name, method)
+            for qualified_name, method in discover_methods(targets)
+            if qualified_name not in SKIPPED and (only is None or qualified_name in only)
+        }
+    finally:
+        db_handler.close()
+
+
+def run_size(
+        rows: int,
+        label: str,
+        rounds: int,
+        pristine: Path,
+        work_dir: Path,
+        progress: Callable[[str], None],
+        only: Optional[Set[str]] = None,
+        run: Optional[SizeRun] = None
+        ) -> SizeRun:
+    '''Times the methods over rounds fresh copies of pristine, keeping each one's fastest call per round; adds to run if given.'''
+    run = run or SizeRun()
+    timings = {timing.name: timing for timing in run.timings}
+    for round_number in range(1, rounds + 1):
+        before = calibrate()
+        round_timings = time_round(rows, pristine, work_dir, only)
+        calibration = (before + calibrate()) / 2
+        run.calibrations.append(calibration)
+        for qualified_name, timing in round_timings.items():
+            best = timings.setdefault(qualified_name, Timing(qualified_name))
+            best.calls += timing.calls
+            best.error = best.error or timing.error
+            if timing.seconds is None:
+                continue
+            best.seconds = timing.seconds if best.seconds is None else min(best.seconds, timing.seconds)
+            best.round_seconds.append(timing.seconds)
+            best.round_relatives.append(timing.seconds / calibration)
+        progress(f'[{label}] round {round_number} of {rounds} done')
+    run.timings = list(timings.values())
+    return run
+
+
+@dataclass
+class Regression:
+    label: str
+    name: str
+    before: float
+    now: float
+    allowed: float
+
+    def __str__(self) -> str:
+        return (
+            f'[{self.label}] {self.name}: {_ms(self.before)} -> {_ms(self.now)} ({self.now / self.before - 1:+.0%}, '
+            f'allowed +{_ms(self.allowed)})'
+        )
+
+
+def compare(
+        runs: Dict[str, SizeRun],
+        baseline: Dict[str, dict],
+        threshold: float,
+        min_delta: float,
+        calibrated: bool = True
+        ) -> List[Regression]:
+    '''Methods slower than their baseline by more than threshold of it, NOISE_SPREADS spreads and min_delta seconds.'''
+    regressions = []
+    for label, run in runs.items():
+        if label not in baseline:
+            continue
+        reference = baseline[label]['methods']
+        calibration = baseline[label]['calibration']
+        for timing in run.timings:
+            recorded = reference.get(timing.name)
+            if timing.relative is None or recorded is None:
+                continue
+            before = recorded['seconds']
+            # In the baseline's seconds: as fast as the machine was when the baseline was recorded
+            now = timing.relative * calibration if calibrated else timing.typical_seconds
+            allowed = max(before * threshold, recorded['spread'] * NOISE_SPREADS, min_delta)
+            if now - before > allowed:
+                regressions.append(Regression(label, timing.name, before, now, allowed))
+    return regressions
+
+
+def _ms(seconds: float) -> str:
+    return f'{seconds * 1000:.3f} ms'
+
+
+def _describe(timing: Timing) -> str:
+    if timing.error:
+        return f'{timing.name:<55} ERROR {timing.error}'
+    return f'{timing.name:<55} {_ms(timing.typical_seconds):>14} ({timing.calls} calls)'
+
+
+def load_baseline(path: Path) -> Dict[str, dict]:
+    '''{size label: {'calibration': seconds, 'methods': {qualified name: {'seconds', 'spread'}}}}'''
+    if not path.exists():
+        return {}
+    with path.open(encoding='utf-8') as f:
+        return json.load(f)['sizes']
+
+
+def save_baseline(path: Path, runs: Dict[str, SizeRun]) -> None:
+    '''Records runs as the baseline of their sizes, keeping the baseline of the other sizes.'''
+    sizes = load_baseline(path)
+    for label, run in runs.items():
+        sizes[label] = {
+            'calibration': round(run.calibration, 7),
+            # Relative times at the median calibration, so a slow round does not skew the baseline
+            'methods': {
+                timing.name: {
+                    'seconds': round(timing.relative * run.calibration, 7),
+                    'spread': round(timing.relative_spread * run.calibration, 7),
+                }
+                for timing in run.timings if timing.relative is not None
+            },
+        }
+    document = {
+        'meta': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'machine': platform.machine(),
+            'recorded_at': _now(),
+        },
+        'sizes': sizes,
+    }
+    with path.open('w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help='Deadlines per docket, e.g. 1k 100k 1m.')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help='Passes over all methods per size.')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Allowed slowdown, 0.25 = 25%%.')
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS)
+    parser.add_argument('--confirm-rounds', type=int, default=DEFAULT_CONFIRM_ROUNDS, help='Re-timings of slower methods before failing.')
+    parser.add_argument('--no-calibrate', action='store_true', help='Compare raw times, not calibrated ones.')
+    parser.add_argument('--update-baseline', action='store_true', help='Record this run as the baseline of its sizes.')
+    parser.add_argument('--db-dir', type=Path, help='Keep generated dockets here and reuse them.')
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args()
+
+    progress = (lambda _: None) if args.quiet else (lambda line: print(line, flush=True))
+    sizes = {label.lower(): parse_size(label) for label in args.sizes}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = Path(tmp_dir)
+        pristines, runs = {}, {}
+        for label, rows in sizes.items():
+            started = time.perf_counter()
+            pristines[label] = prepare_docket(rows, label, work_dir, args.db_dir)
+            progress(f'[{label}] docket ready in {time.perf_counter() - started:.1f}s')
+            runs[label] = run_size(rows, label, args.rounds, pristines[label], work_dir, progress)
+            for timing in runs[label].timings:
+                progress(f'[{label}] {_describe(timing)}')
+            progress(f'[{label}] calibration {_ms(runs[label].calibration)}')
+        errors = [f'[{label}] {_describe(timing)}' for label, run in runs.items() for timing in run.timings if timing.error]
+        if errors:
+            if args.quiet:
+                print('\n'.join(errors))
+            print(f'{len(errors)} methods could not be timed.')
+            sys.exit(1)
+        if args.update_baseline:
+            save_baseline(args.baseline, runs)
+            print(f'Baseline written to {args.baseline}.')
+            return
+        baseline = load_baseline(args.baseline)
+        missing = [label for label in runs if label not in baseline]
+        if missing:
+            print(f"No baseline for {', '.join(missing)} in {args.baseline}; run with --update-baseline to record one.")
+        regressions = compare(runs, baseline, args.threshold, args.min_delta_ms / 1000, not args.no_calibrate)
+        for _ in range(args.confirm_rounds):
+            if not regressions:
+                break
+            # A slowdown that survives fresh rounds is the code's, a burst of load on the machine rarely does
+            progress(f'Re-timing {len(regressions)} methods that look slower')
+            for label in {regression.label for regression in regressions}:
+                only = {regression.name for regression in regressions if regression.label == label}
+                run_size(sizes[label], label, args.rounds, pristines[label], work_dir, progress, only, runs[label])
+            regressions = compare(runs, baseline, args.threshold, args.min_delta_ms / 1000, not args.no_calibrate)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    if regressions:
+        print(f'{len(regressions)} methods are slower than the baseline by more than their allowed margin.')
+        sys.exit(1)
+    print('No regressions against the baseline.')
+
+if __name__ == '__main__':
+    main()
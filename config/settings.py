@@ -0,0 +1,104 @@
+# config/settings.py
+import os
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / 'migrations'
+# Rows copied per statement by database_handler.migrations.rebuild_table
+MIGRATION_BATCH_ROWS = int(os.environ.get('PCM_MIGRATION_BATCH_ROWS', 50000))
+
+# --- Database location, overridable per environment --- #
+DB_PATH = Path(os.environ.get('PCM_DB_PATH', BASE_DIR / 'patent_case_manager.db'))
+
+# --- Connection pool --- #
+MAX_READ_CONNECTIONS = int(os.environ.get('PCM_MAX_READ_CONNECTIONS', 4))
+BUSY_TIMEOUT_MS = int(os.environ.get('PCM_BUSY_TIMEOUT_MS', 5000))
+
+# --- Streaming reads and pagination --- #
+FETCH_BATCH_SIZE = int(os.environ.get('PCM_FETCH_BATCH_SIZE', 500))
+PAGE_SIZE = int(os.environ.get('PCM_PAGE_SIZE', 50))
+
+# --- Exports: rows per fetchmany batch, and rows per Parquet row group (bounds the memory of an export) --- #
+EXPORT_BATCH_SIZE = int(os.environ.get('PCM_EXPORT_BATCH_SIZE', 5000))
+EXPORT_PARQUET_ROW_GROUP_ROWS = int(os.environ.get('PCM_EXPORT_PARQUET_ROW_GROUP_ROWS', 65536))
+
+# --- Statutory deadline generation: how far ahead deadlines are derived from filing dates --- #
+DEADLINE_HORIZON_MONTHS = int(os.environ.get('PCM_DEADLINE_HORIZON_MONTHS', 24))
+
+# --- Agenda dashboard on the Home page: how many months ahead it shows --- #
+AGENDA_MONTHS = int(os.environ.get('PCM_AGENDA_MONTHS', 12))
+
+# --- Overdue sweeper: interval of 'python -m services.deadline_service --every' --- #
+OVERDUE_SWEEP_INTERVAL_SECONDS = int(os.environ.get('PCM_OVERDUE_SWEEP_INTERVAL_SECONDS', 3600))
+
+# --- Online backups (python -m services.backup_service): gzip snapshots, the newest BACKUP_KEEP kept --- #
+BACKUP_DIR = Path(os.environ.get('PCM_BACKUP_DIR', DB_PATH.parent / 'backups'))
+BACKUP_KEEP = int(os.environ.get('PCM_BACKUP_KEEP', 14))
+BACKUP_GZIP_LEVEL = int(os.environ.get('PCM_BACKUP_GZIP_LEVEL', 6))
+# Pages copied per backup step, and the pause after each step that lets writers in
+BACKUP_PAGES_PER_STEP = int(os.environ.get('PCM_BACKUP_PAGES_PER_STEP', 1024))
+BACKUP_STEP_SLEEP_MS = int(os.environ.get('PCM_BACKUP_STEP_SLEEP_MS', 20))
+# Writes between steps restart the copy; after this many restarts it is taken in one step
+BACKUP_MAX_RESTARTS = int(os.environ.get('PCM_BACKUP_MAX_RESTARTS', 3))
+# Interval of 'python -m services.backup_service --every'
+BACKUP_INTERVAL_SECONDS = int(os.environ.get('PCM_BACKUP_INTERVAL_SECONDS', 86400))
+
+# --- Headless JSON API (python -m api.server) --- #
+API_HOST = os.environ.get('PCM_API_HOST', '127.0.0.1')
+API_PORT = int(os.environ.get('PCM_API_PORT', 8765))
+API_MAX_PAGE_SIZE = int(os.environ.get('PCM_API_MAX_PAGE_SIZE', 500))
+# Smaller bodies are sent uncompressed: gzip would barely shrink them
+API_GZIP_MIN_BYTES = int(os.environ.get('PCM_API_GZIP_MIN_BYTES', 1024))
+
+# --- Read cache for reference lists and single-record lookups (0 disables it) --- #
+QUERY_CACHE_MAX_ENTRIES = int(os.environ.get('PCM_QUERY_CACHE_MAX_ENTRIES', 256))
+
+# --- Query instrumentation (Admin page): off by default, it costs a trace callback per statement --- #
+QUERY_STATS_ENABLED = os.environ.get('PCM_QUERY_STATS', '0') == '1'
+# Repo calls at least this slow are written to audit_logs with log_level 'PERF'
+SLOW_QUERY_MS = float(os.environ.get('PCM_SLOW_QUERY_MS', 250))
+
+# --- Render profiler (debug mode): times every window section and counts its queries --- #
+RENDER_PROFILER_ENABLED = os.environ.get('PCM_RENDER_PROFILER', '0') == '1'
+# One statement run more often than this by a single render section is flagged as an N+1 loop
+RENDER_PROFILER_REPEAT_LIMIT = int(os.environ.get('PCM_RENDER_PROFILER_REPEAT_LIMIT', 5))
+
+# --- Cross-process change detection: how stale a cached read may get after another process writes --- #
+CHANGE_POLL_INTERVAL_MS = int(os.environ.get('PCM_CHANGE_POLL_INTERVAL_MS', 100))
+
+# --- Storage performance profiles, applied by DatabaseHandler on every connection --- #
+# cache_size follows SQLite's convention: negative values are KiB, positive values are pages.
+# Numbers come from benchmarks/bench_storage_profiles.py; rerun it before changing them.
+STORAGE_PROFILES = {
+    # Single-user laptop: every commit is durable, modest memory footprint
+    'desktop-safe': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'mmap_size': 0,
+        'cache_size': -8192,
+        'temp_store': 'DEFAULT',
+        'wal_autocheckpoint': 1000,
+        'read_only': False,
+    },
+    # Shared server with several sessions: WAL+NORMAL can only lose the last commits on power loss
+    'server-throughput': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,
+        'cache_size': -65536,
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': 4000,
+        'read_only': False,
+    },
+    # Reporting copy that is never written through this process: no migrations, no writes
+    'read-only-replica': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'mmap_size': 1073741824,
+        'cache_size': -131072,
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': 0,
+        'read_only': True,
+    },
+}
+DEFAULT_STORAGE_PROFILE = os.environ.get('PCM_STORAGE_PROFILE', 'desktop-safe')
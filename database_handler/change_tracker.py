@@ -0,0 +1,115 @@
+# database_handler/change_tracker.py
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+from config.settings import CHANGE_POLL_INTERVAL_MS
+
+if TYPE_CHECKING:
+    from database_handler.database_handler import DatabaseHandler
+
+# Tables whose writes bump table_generations (migrations/0010_table_generations.sql)
+TRACKED_TABLES = ('clients', 'cases', 'deadlines')
+
+
+class ChangeTracker:
+    '''
+    Tells this process which tables other processes (and scripts) have written since it
+    last looked, so results cached in the process can be reused until they actually go stale.
+
+    A poll costs one PRAGMA data_version on a connection of its own, which changes after
+    any commit to the file. Only then is table_generations read (one row per tracked table,
+    bumped by triggers), and the tables whose generation moved are dropped from the query
+    cache. refresh() polls at most every CHANGE_POLL_INTERVAL_MS, so a Streamlit rerun
+    issuing several cached reads checks the database once.
+    '''
+    def __init__(self, db_handler: 'DatabaseHandler', poll_interval_ms: Optional[int] = None):
+        self.db_handler = db_handler
+        interval_ms = CHANGE_POLL_INTERVAL_MS if poll_interval_ms is None else poll_interval_ms
+        self.poll_interval = interval_ms / 1000
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._data_version: Optional[int] = None
+        self._generations: Dict[str, int] = {}
+        self._polled_at = float('-inf')
+        self.polls = 0
+        self.reloads = 0
+
+    def refresh(self) -> None:
+        '''Polls unless the last poll is more recent than the poll interval.'''
+        if time.monotonic() - self._polled_at >= self.poll_interval:
+            self.poll()
+
+    def poll(self) -> Dict[str, int]:
+        '''
+        Checks for commits since the last poll, invalidates the cached reads of every table
+        they changed and returns the current {table: generation}.
+        '''
+        with self._lock:
+            conn = self._connection()
+            data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+            self._polled_at = time.monotonic()
+            self.polls += 1
+            if data_version == self._data_version:
+                return dict(self._generations)
+            try:
+                generations = dict(conn.execute('SELECT table_name, generation FROM table_generations').fetchall())
+            except sqlite3.OperationalError:
+                # A read-only copy migrated before table_generations existed: any commit may have changed any table
+                generations = {table: data_version for table in TRACKED_TABLES}
+            self.reloads += 1
+            if self._data_version is None:
+                # Nothing to compare with: whatever was cached before the first poll is suspect
+                changed = list(generations)
+            else:
+                changed = [table for table, generation in generations.items() if self._generations.get(table) != generation]
+            self._data_version = data_version
+            self._generations = generations
+        if changed:
+            self.db_handler.query_cache.invalidate(changed)
+        return dict(generations)
+
+    def generations(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        '''Current generation of each table; raises ValueError for a table that is not tracked.'''
+        current = self.poll()
+        try:
+            return tuple(current[table] for table in tables)
+        except KeyError as e:
+            raise ValueError(f'Table {e.args[0]} is not tracked by table_generations') from None
+
+    def read_generations(self, conn: sqlite3.Connection, tables: Iterable[str]) -> Tuple[int, ...]:
+        '''
+        Generation of each table as conn sees it, without polling: inside a write
+        transaction, including the transaction's own writes.
+        '''
+        tables = tuple(tables)
+        generations = dict(conn.execute(
+            f"SELECT table_name, generation FROM table_generations WHERE table_name IN ({', '.join('?' for _ in tables)})",
+            tables
+        ).fetchall())
+        try:
+            return tuple(generations[table] for table in tables)
+        except KeyError as e:
+            raise ValueError(f'Table {e.args[0]} is not tracked by table_generations') from None
+
+    def changed_since(self, table: str, generation: int) -> bool:
+        '''True when table has been written since it was at generation.'''
+        return self.generations((table,))[0] != generation
+
+    def stats(self) -> Dict[str, int]:
+        return {'polls': self.polls, 'reloads': self.reloads}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._data_version = None
+            self._polled_at = float('-inf')
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # Never writes, so its data_version moves on every commit, this process's included
+            self._conn = self.db_handler._open_connection(read_only=True)
+        return self._conn
@@ -1,46 +1,325 @@
 # database_handler/database_handler.py
 
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, List, Tuple, Union
+from typing import Callable, Iterator, Optional, List, Tuple, Union
 
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-DB_PATH = BASE_DIR / 'patent_case_manager.db'
-MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / 'migrations'
+from config.settings import (
+    BACKUP_MAX_RESTARTS,
+    BACKUP_PAGES_PER_STEP,
+    BACKUP_STEP_SLEEP_MS,
+    BUSY_TIMEOUT_MS,
+    DB_PATH,
+    DEFAULT_STORAGE_PROFILE,
+    MAX_READ_CONNECTIONS,
+    QUERY_CACHE_MAX_ENTRIES,
+    QUERY_STATS_ENABLED,
+    SLOW_QUERY_MS,
+    STORAGE_PROFILES,
+)
+from database_handler.change_tracker import ChangeTracker
+from database_handler.migrations import MigrationError, migrate, print_progress
+from utils.cache import QueryCache
+from utils.query_stats import QueryStats
 
 class DatabaseHandler:
-    def __init__(self, db_path: Optional[Path] = None):
-        self.db_path = db_path or DB_PATH
+    '''
+    Owns the SQLite connections: one dedicated writer connection, serialized by a
+    re-entrant lock, and a bounded pool of read-only connections, all in WAL mode.
+
+    'with db_handler as conn' checks out the writer for the duration of the block and
+    commits (or rolls back) when the outermost block of the thread exits.
+    'with db_handler.read() as conn' checks out a pooled reader; inside a write block
+    the thread keeps using the writer, so it sees its own uncommitted changes.
+
+    Every connection gets the PRAGMAs of the chosen storage profile (config.settings).
+    A read_only profile opens every connection query_only and skips migrations.
+
+    query_cache holds repo read results; repos report the tables they write through
+    mark_written() and the cache drops them once the writing transaction has ended.
+    changes (a ChangeTracker) drops them as well when another process writes the tables.
+
+    change_token(tables) is a cheap validator for HTTP caching: it changes whenever one
+    of the tables is written, without querying them.
+
+    audit_hook, when set (see services.audit_service), is called by the repos inside the
+    write block of every insert and update as audit_hook(table_name, action, changes),
+    with changes a list of (record id, written values); raising rolls the change back.
+
+    query_stats (a QueryStats) measures the repo helpers per calling method while enabled;
+    set_query_stats() switches it and the trace callback of every connection together.
+
+    backup(target_path) copies the live database with SQLite's online backup API.
+
+    Migrations run on creation (init_database), each in its own transaction, and are
+    refused when an applied migration file has been edited since.
+    '''
+    def __init__(
+            self,
+            db_path: Optional[Path] = None,
+            profile: Optional[str] = None,
+            max_readers: Optional[int] = None
+            ):
+        self.db_path = Path(db_path or DB_PATH)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self.conn: Optional[sqlite3.Connection] = None
-        self.init_database()
+        self.profile_name = profile or DEFAULT_STORAGE_PROFILE
+        if self.profile_name not in STORAGE_PROFILES:
+            raise ValueError(f'Unknown storage profile {self.profile_name}')
+        self.profile = STORAGE_PROFILES[self.profile_name]
+        self.read_only = self.profile['read_only']
+        self.max_readers = max_readers or MAX_READ_CONNECTIONS
+        self.conn: Optional[sqlite3.Connection] = None  # The writer connection
+        self._writer_lock = threading.RLock()
+        self._idle_readers: queue.LifoQueue = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(self.max_readers)
+        self._readers_lock = threading.Lock()
+        self._readers: List[sqlite3.Connection] = []
+        # Per-thread checkout state, so nested blocks reuse the connection they started with
+        self._local = threading.local()
+        self.query_cache = QueryCache(QUERY_CACHE_MAX_ENTRIES)
+        self.changes = ChangeTracker(self)
+        self.audit_hook: Optional[Callable[[str, str, List[Tuple[int, dict]]], None]] = None
+        self.query_stats = QueryStats(QUERY_STATS_ENABLED, SLOW_QUERY_MS)
+        success, result = self.init_database()
+        if not success:
+            print(f'Database initialization failed. Error: {result}')
+        elif result:
+            print(f'✅ Migrations applied: {result}')
 
+    # --- Writer checkout: 'with db_handler as conn' --- #
     def __enter__(self) -> sqlite3.Connection:
         # This will be called by the 'with' statement
-        if not self.conn or self.is_closed():
-            self.connect()
+        self._writer_lock.acquire()
+        try:
+            if not self.conn or self.is_closed():
+                self.connect()
+        except sqlite3.Error:
+            self._writer_lock.release()
+            raise
+        self._state().write_depth += 1
         return self.conn
 
     def __exit__(self, exc_type, exc_value, traceback) -> None:
         # We will no longer close the connection here automatically.
         # This allows the connection to persist across multiple 'with' blocks.
-        if self.conn and exc_type is None:
-            self.conn.commit()
-        elif self.conn:
-            self.conn.rollback()
+        state = self._state()
+        state.write_depth -= 1
+        try:
+            if state.write_depth > 0:
+                # Nested block: only the outermost one ends the transaction
+                return
+            try:
+                if self.conn and exc_type is None:
+                    self.conn.commit()
+                elif self.conn:
+                    self.conn.rollback()
+            finally:
+                # After commit or rollback, so no reader can cache the pre-commit rows again
+                if state.dirty_tables:
+                    self.query_cache.invalidate(state.dirty_tables)
+                    state.dirty_tables = set()
+        finally:
+            self._writer_lock.release()
+
+    def mark_written(self, table_name: str) -> None:
+        '''Records that the current write block modified table_name.'''
+        self._state().dirty_tables.add(table_name)
+
+    def in_write_block(self) -> bool:
+        '''True while the current thread holds the writer connection.'''
+        return self._state().write_depth > 0
+
+    def cached(self, key: tuple, tables: Tuple[str, ...], loader: Callable[[], Tuple[bool, object]]) -> Tuple[bool, object]:
+        '''
+        Serves loader's result through query_cache, after letting the change tracker drop
+        what other processes made stale. Inside a write block the cache is bypassed, since
+        the thread may be reading its own uncommitted rows.
+        '''
+        if self.in_write_block() or not self.query_cache.enabled:
+            return loader()
+        try:
+            self.changes.refresh()
+        except sqlite3.Error as e:
+            return (False, e)
+        return self.query_cache.get_or_load(key, tables, loader)
+
+    def change_token(self, tables: Tuple[str, ...]) -> str:
+        '''
+        Token that changes whenever any of tables is written, by this process or another
+        one: their table_generations, as polled by the change tracker.
+        '''
+        return '.'.join(str(generation) for generation in self.changes.generations(tables))
+
+    # --- Reader checkout: 'with db_handler.read() as conn' --- #
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        state = self._state()
+        if state.write_depth > 0:
+            yield self.conn
+            return
+        if state.reader is not None:
+            state.read_depth += 1
+            try:
+                yield state.reader
+            finally:
+                state.read_depth -= 1
+            return
+        self._reader_slots.acquire()
+        try:
+            reader = self._acquire_reader()
+        except sqlite3.Error:
+            self._reader_slots.release()
+            raise
+        state.reader, state.read_depth = reader, 1
+        try:
+            yield reader
+        finally:
+            state.reader, state.read_depth = None, 0
+            self._release_reader(reader)
+            self._reader_slots.release()
+
+    def _state(self) -> threading.local:
+        state = self._local
+        if not hasattr(state, 'write_depth'):
+            state.write_depth = 0
+            state.read_depth = 0
+            state.reader = None
+            state.dirty_tables = set()
+        return state
+
+    def _open_connection(self, read_only: bool) -> sqlite3.Connection:
+        # check_same_thread=False: pooled connections are handed to whichever thread checks them out
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS};')
+        conn.execute('PRAGMA foreign_keys = ON;')
+        self._apply_profile(conn, read_only or self.read_only)
+        if not read_only:
+            # Take the write lock when the transaction starts instead of upgrading mid-way
+            conn.isolation_level = 'IMMEDIATE'
+        return conn
+
+    def _apply_profile(self, conn: sqlite3.Connection, read_only: bool) -> None:
+        '''Applies the storage profile PRAGMAs; values come from settings, never from users.'''
+        profile = self.profile
+        if not read_only:
+            # The journal mode is stored in the file, so only a writing connection sets it
+            conn.execute(f"PRAGMA journal_mode = {profile['journal_mode']};")
+            conn.execute(f"PRAGMA wal_autocheckpoint = {int(profile['wal_autocheckpoint'])};")
+        conn.execute(f"PRAGMA synchronous = {profile['synchronous']};")
+        conn.execute(f"PRAGMA mmap_size = {int(profile['mmap_size'])};")
+        conn.execute(f"PRAGMA cache_size = {int(profile['cache_size'])};")
+        conn.execute(f"PRAGMA temp_store = {profile['temp_store']};")
+        if read_only:
+            conn.execute('PRAGMA query_only = ON;')
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self._idle_readers.get_nowait()
+        except queue.Empty:
+            reader = self._open_connection(read_only=True)
+            with self._readers_lock:
+                # Under the lock, so a concurrent set_query_stats() cannot miss it
+                self._apply_trace(reader)
+                self._readers.append(reader)
+            return reader
+
+    def _release_reader(self, reader: sqlite3.Connection) -> None:
+        try:
+            # Ends any read transaction left open by a partially consumed cursor
+            reader.rollback()
+            self._idle_readers.put(reader)
+        except sqlite3.ProgrammingError:
+            # The pool was closed while the reader was checked out
+            pass
 
     def connect(self) -> None:
-        '''Establishes a database connection.'''
-        if not self.conn or self.is_closed():
-            self.conn = sqlite3.connect(self.db_path, check_same_thread=False) # Added for Streamlit
-            self.conn.row_factory = sqlite3.Row
-            self.conn.execute('PRAGMA foreign_keys = ON;')
+        '''Establishes the writer connection.'''
+        with self._writer_lock:
+            if not self.conn or self.is_closed():
+                self.conn = self._open_connection(read_only=False)
+                self._apply_trace(self.conn)
+
+    # --- Query instrumentation --- #
+    def set_query_stats(self, enabled: bool) -> None:
+        '''Switches query_stats and the trace callback of the writer and every pooled reader.'''
+        with self._writer_lock, self._readers_lock:
+            self.query_stats.enabled = enabled
+            for conn in ([self.conn] if self.conn else []) + self._readers:
+                self._apply_trace(conn)
+
+    def _apply_trace(self, conn: sqlite3.Connection) -> None:
+        # Disabled, no callback at all: SQLite does not even build the statement text
+        conn.set_trace_callback(self.query_stats.trace if self.query_stats.enabled else None)
+
+    # --- Online backup --- #
+    def backup(
+            self,
+            target_path: Path,
+            pages: int = BACKUP_PAGES_PER_STEP,
+            sleep_ms: int = BACKUP_STEP_SLEEP_MS,
+            max_restarts: int = BACKUP_MAX_RESTARTS,
+            progress: Optional[Callable[[int, int], None]] = None
+            ) -> Tuple[bool, Union[dict, Exception]]:
+        '''
+        Copies the database into target_path, a new SQLite file, with the backup API on a
+        connection of its own: pages at a time, sleeping sleep_ms after each step so writers
+        are never locked out for long. progress(pages_copied, page_count) follows every step.
+
+        A write between two steps restarts the copy from the first page. After max_restarts
+        restarts the copy is taken in one step instead: a consistent snapshot that, in WAL
+        mode, still does not block writers. Returns {'pages', 'restarts', 'single_step'}.
+        '''
+        counts = {'pages': 0, 'restarts': 0, 'single_step': False}
+        remaining_before = None
+
+        def on_step(status: int, remaining: int, page_count: int) -> None:
+            nonlocal remaining_before
+            if remaining_before is not None and remaining > remaining_before:
+                counts['restarts'] += 1
+                if counts['restarts'] > max_restarts:
+                    raise _BackupRestarted()
+            remaining_before = remaining
+            counts['pages'] = page_count
+            if progress:
+                progress(page_count - remaining, page_count)
+
+        try:
+            source = self._open_connection(read_only=True)
+            target = sqlite3.connect(target_path)
+            try:
+                try:
+                    source.backup(target, pages=pages, progress=on_step, sleep=sleep_ms / 1000)
+                except _BackupRestarted:
+                    counts['restarts'] -= 1
+                    counts['single_step'] = True
+                    source.backup(target, pages=-1)
+                    counts['pages'] = target.execute('PRAGMA page_count').fetchone()[0]
+                    if progress:
+                        progress(counts['pages'], counts['pages'])
+            finally:
+                target.close()
+                source.close()
+        except sqlite3.Error as e:
+            return (False, e)
+        return (True, counts)
 
     def close(self) -> None:
-        '''Closes the database connection.'''
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        '''Closes the writer connection and every pooled reader.'''
+        with self._writer_lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
+        with self._readers_lock:
+            for reader in self._readers:
+                reader.close()
+            self._readers.clear()
+        while not self._idle_readers.empty():
+            self._idle_readers.get_nowait()
+        self.changes.close()
 
     def is_closed(self) -> bool:
         '''Checks if the connection is closed or not initialized.'''
@@ -51,44 +330,23 @@ class DatabaseHandler:
         except (sqlite3.ProgrammingError, AttributeError):
             return True
 
-    #TODO: Stub the prints arguments out to return a tuple(Boolen, Union[str, Error]) for logging
-    def init_database(self) -> None:
-        '''Initializes the database and applies migrations.'''
-        if not self.conn:
-            self.connect()
+    def init_database(self) -> Tuple[bool, Union[List[str], Exception]]:
+        '''
+        Initializes the database and applies the pending migrations (see
+        database_handler.migrations), each in its own transaction. Returns the applied
+        file names; fails without applying anything when an applied migration file was
+        edited. PRAGMA user_version records the latest applied migration, so a warm start
+        only compares the checksums of schema_migrations with the files.
+        '''
+        if self.read_only:
+            # A replica is migrated by the process that writes it
+            return (True, [])
         try:
             with self as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS schema_migrations (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        filename TEXT UNIQUE NOT NULL,
-                        applied_at TEXT NOT NULL CHECK(LENGTH(applied_at)=19)
-                    )
-                ''')
-                conn.commit()
-
-                cursor.execute('SELECT filename FROM schema_migrations')
-                applied = {row['filename'] for row in cursor.fetchall()}
-                new_migrations_file_names = []
-
-                for migration_file in sorted(MIGRATIONS_DIR.glob('*.sql')):
-                    if migration_file.name not in applied:
-                        print(f'Applying migration: {migration_file.name}')
-                        with open(migration_file, 'r', encoding='utf-8') as f:
-                            sql = f.read()
-                        cursor.executescript(sql)
-                        cursor.execute(
-                            'INSERT INTO schema_migrations (filename, applied_at) VALUES (?, datetime(strftime("%s","now"), "unixepoch"))',
-                            (migration_file.name,)
-                        )
-                        conn.commit()
-                        new_migrations_file_names.append(migration_file.name)
-                
-                if new_migrations_file_names:
-                    print(f'✅ Migrations applied: {new_migrations_file_names}')
-                else:
-                    print('✅ Database schema is up to date.')
+                return (True, migrate(conn, progress=print_progress))
+        except (MigrationError, sqlite3.Error, OSError) as e:
+            return (False, e)
 
-        except sqlite3.Error as e:
-            print(f'Database initialization failed. Error: {e}')
\ No newline at end of file
+
+class _BackupRestarted(Exception):
+    '''Raised from the backup progress callback to abandon a copy that writes keep restarting.'''
@@ -0,0 +1,416 @@
+# database_handler/migrations.py
+'''
+Versioned schema migrations, applied by DatabaseHandler.init_database.
+
+A migration is a file in migrations/ named NNNN_description.sql or NNNN_description.py,
+NNNN being its version. A .py migration defines upgrade(conn, progress), for changes SQL
+alone cannot make safely, such as rebuild_table().
+
+- Every migration runs in a transaction of its own (BEGIN IMMEDIATE ... COMMIT) together
+  with its schema_migrations row and PRAGMA user_version: it is applied entirely or not
+  at all. SQL files are split into statements with sqlite3.complete_statement and run one
+  by one; a statement that ends the transaction (COMMIT, VACUUM...) fails the migration.
+- .py migrations run with foreign keys off, as SQLite's table rebuild requires, and
+  PRAGMA foreign_key_check must come back clean before they commit. SQL migrations keep
+  foreign keys enforced.
+- schema_migrations stores the SHA-256 of every applied file. A file edited after it was
+  applied, or removed, stops migrate() with MigrationChecksumError: change the schema in
+  a new migration instead. Rows applied before checksums were kept take the checksum of
+  the file as found the first time. A file whose comments alone were corrected after
+  release lists its earlier checksums in CORRECTED_CHECKSUMS, which are still accepted.
+- PRAGMA user_version holds the latest applied version, so an up-to-date database is
+  recognised without reading schema_migrations; the checksums are still compared.
+
+    python -m database_handler.migrations status
+'''
+import argparse
+import hashlib
+import importlib.util
+import re
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config.settings import DB_PATH, MIGRATION_BATCH_ROWS, MIGRATIONS_DIR
+
+# progress(table, rows_copied, rows_total), reported by rebuild_table after every batch
+Progress = Callable[[str, int, int], None]
+
+MIGRATION_SUFFIXES = ('.sql', '.py')
+
+# {file name: earlier checksums}: applied files whose comments were corrected since, and
+# nothing else, so databases that applied an earlier version are not refused
+CORRECTED_CHECKSUMS: Dict[str, Tuple[str, ...]] = {
+    '0006_deadline_overdue_sweeps.sql': ('6a5fcc16996078fd624bd69889c56897e90617c7631d5c51e110e51790feec99',),
+}
+
+SCHEMA_MIGRATIONS_DDL = '''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        filename TEXT UNIQUE NOT NULL,
+        applied_at TEXT NOT NULL CHECK(LENGTH(applied_at)=19),
+        checksum TEXT,
+        duration_ms REAL
+    )
+'''
+
+_CREATE_TABLE = re.compile(
+    r'\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(?P<name>"(?:[^"]|"")+"|`[^`]+`|\[[^\]]+\]|\w+)',
+    re.IGNORECASE
+)
+_COMMENTS = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+_TRANSACTION_CONTROL = re.compile(r'(BEGIN|COMMIT|END|ROLLBACK)\b', re.IGNORECASE)
+
+
+class MigrationError(Exception):
+    '''A migration cannot be applied; the database is left as it was before it.'''
+
+
+class MigrationChecksumError(MigrationError):
+    '''Applied migration files were edited or removed.'''
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    path: Path
+    checksum: str  # SHA-256 of the file, hex
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+
+@lru_cache(maxsize=None)
+def list_migrations(migrations_dir: Path = MIGRATIONS_DIR) -> Tuple[Migration, ...]:
+    '''The migration files of migrations_dir, sorted by version; read and hashed once per process.'''
+    migrations = []
+    for path in sorted(migrations_dir.iterdir()):
+        if path.suffix not in MIGRATION_SUFFIXES or not path.name.split('_', 1)[0].isdigit():
+            continue
+        migrations.append(Migration(int(path.name.split('_', 1)[0]), path, hashlib.sha256(path.read_bytes()).hexdigest()))
+    versions = [migration.version for migration in migrations]
+    duplicates = sorted({version for version in versions if versions.count(version) > 1})
+    if duplicates:
+        raise MigrationError(f'Several migrations share the versions {duplicates}')
+    return tuple(migrations)
+
+
+# --- Applying --- #
+def migrate(
+        conn: sqlite3.Connection,
+        migrations: Optional[Tuple[Migration, ...]] = None,
+        progress: Optional[Progress] = None
+        ) -> List[str]:
+    '''
+    Applies the pending migrations in version order and returns their file names.
+    Raises MigrationChecksumError before applying anything when applied files changed,
+    MigrationError or sqlite3.Error when a migration fails (earlier ones stay applied).
+    '''
+    migrations = list_migrations() if migrations is None else migrations
+    latest_version = migrations[-1].version if migrations else 0
+    isolation_level = conn.isolation_level
+    # Transactions are begun and ended explicitly below, never implicitly by the sqlite3 module
+    conn.isolation_level = None
+    try:
+        up_to_date = conn.execute('PRAGMA user_version').fetchone()[0] >= latest_version
+        _prepare_schema_migrations(conn, migrations)
+        problems = check_applied(conn, migrations)
+        if problems:
+            raise MigrationChecksumError(
+                '; '.join(f'{name} {problem}' for name, problem in problems.items())
+                + '. Applied migrations must not change: add a new migration instead.'
+            )
+        if up_to_date:
+            return []
+        applied = _applied_checksums(conn)
+        names = []
+        for migration in migrations:
+            if migration.name not in applied:
+                _apply(conn, migration, progress)
+                names.append(migration.name)
+        if conn.execute('PRAGMA user_version').fetchone()[0] < latest_version:
+            # Every file was applied before user_version was kept
+            conn.execute(f'PRAGMA user_version = {int(latest_version)}')
+        return names
+    finally:
+        conn.isolation_level = isolation_level
+
+
+def check_applied(conn: sqlite3.Connection, migrations: Tuple[Migration, ...]) -> Dict[str, str]:
+    '''{file name: problem} for applied migrations whose file was edited or removed since.'''
+    files = {migration.name: migration.checksum for migration in migrations}
+    problems = {}
+    for name, checksum in _applied_checksums(conn).items():
+        if name not in files:
+            problems[name] = 'was applied but is missing from the migrations directory'
+        elif checksum is not None and checksum != files[name] and checksum not in CORRECTED_CHECKSUMS.get(name, ()):
+            problems[name] = 'was edited after it was applied'
+    return problems
+
+
+def split_statements(sql: str) -> List[str]:
+    '''The statements of a SQL script, trigger bodies kept whole; raises MigrationError on an unterminated one.'''
+    statements, start = [], 0
+    for semicolon in re.finditer(';', sql):
+        candidate = sql[start:semicolon.end()]
+        # False while the ';' is inside a string, a comment or a trigger body
+        if sqlite3.complete_statement(candidate):
+            if _COMMENTS.sub('', candidate).strip(' \t\r\n;'):
+                statements.append(candidate.strip())
+            start = semicolon.end()
+    if _COMMENTS.sub('', sql[start:]).strip():
+        raise MigrationError(f'Unterminated statement: {sql[start:].strip()[:80]}')
+    return statements
+
+
+def _prepare_schema_migrations(conn: sqlite3.Connection, migrations: Tuple[Migration, ...]) -> None:
+    '''Creates schema_migrations, or adds the checksum columns to an older one and fills them in.'''
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(schema_migrations)')}
+    if columns >= {'checksum', 'duration_ms'}:
+        return
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute(SCHEMA_MIGRATIONS_DDL)
+        for column, declaration in (('checksum', 'TEXT'), ('duration_ms', 'REAL')):
+            if columns and column not in columns:
+                conn.execute(f'ALTER TABLE schema_migrations ADD COLUMN {column} {declaration}')
+        # Applied before checksums were kept: trust the files as they are now
+        conn.executemany(
+            'UPDATE schema_migrations SET checksum = ? WHERE filename = ? AND checksum IS NULL',
+            [(migration.checksum, migration.name) for migration in migrations]
+        )
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def _applied_checksums(conn: sqlite3.Connection) -> Dict[str, Optional[str]]:
+    return {row[0]: row[1] for row in conn.execute('SELECT filename, checksum FROM schema_migrations')}
+
+
+def _apply(conn: sqlite3.Connection, migration: Migration, progress: Optional[Progress]) -> None:
+    is_python = migration.path.suffix == '.py'
+    # Loaded or split before the transaction starts, so a broken file changes nothing
+    if is_python:
+        upgrade = _load_upgrade(migration)
+    else:
+        statements = split_statements(migration.path.read_text(encoding='utf-8'))
+    foreign_keys = conn.execute('PRAGMA foreign_keys').fetchone()[0]
+    if is_python:
+        # A no-op inside a transaction: switched before it begins
+        conn.execute('PRAGMA foreign_keys = OFF')
+    start = time.perf_counter()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        if is_python:
+            upgrade(conn, progress)
+            violations = conn.execute('PRAGMA foreign_key_check').fetchmany(5)
+            if violations:
+                raise MigrationError(
+                    f'{migration.name} breaks foreign keys: '
+                    + ', '.join(f'{table} rowid {rowid} -> {parent}' for table, rowid, parent, _ in violations)
+                )
+        else:
+            for statement in statements:
+                if _TRANSACTION_CONTROL.match(_COMMENTS.sub('', statement).strip()):
+                    raise MigrationError(f'{migration.name} controls the transaction itself: {statement[:80]}')
+                conn.execute(statement)
+        if not conn.in_transaction:
+            raise MigrationError(f'{migration.name} ended the migration transaction')
+        conn.execute(
+            'INSERT INTO schema_migrations (filename, applied_at, checksum, duration_ms) '
+            "VALUES (?, datetime('now'), ?, ?)",
+            (migration.name, migration.checksum, (time.perf_counter() - start) * 1000)
+        )
+        conn.execute(f'PRAGMA user_version = {int(migration.version)}')
+        conn.execute('COMMIT')
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        if is_python and foreign_keys:
+            conn.execute('PRAGMA foreign_keys = ON')
+
+
+def _load_upgrade(migration: Migration) -> Callable[[sqlite3.Connection, Optional[Progress]], None]:
+    spec = importlib.util.spec_from_file_location(f'_migration_{migration.version:04d}', migration.path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    upgrade = getattr(module, 'upgrade', None)
+    if not callable(upgrade):
+        raise MigrationError(f'{migration.name} defines no upgrade(conn, progress) function')
+    return upgrade
+
+
+# --- SQLite's 12-step table rebuild, for .py migrations --- #
+def rebuild_table(
+        conn: sqlite3.Connection,
+        table: str,
+        create_sql: str,
+        column_map: Optional[Dict[str, str]] = None,
+        batch_rows: int = MIGRATION_BATCH_ROWS,
+        progress: Optional[Progress] = None
+        ) -> int:
+    '''
+    Rebuilds table with the definition create_sql, a complete CREATE TABLE statement for
+    it, following https://www.sqlite.org/lang_altertable.html#otheralter: for changes
+    ALTER TABLE cannot make (CHECK and NOT NULL constraints, column types, dropped columns).
+    Runs inside the transaction of a .py migration, where foreign keys are off.
+
+    New columns are filled from the old columns of the same name, or from the SQL
+    expressions over the old row in column_map ({new column: expression}); the others
+    take their default. Rows are copied batch_rows at a time in rowid order, with
+    progress(table, copied, total) after every batch, into a table that has no index or
+    trigger yet; the table's indexes and triggers are then recreated from their stored
+    SQL, and its AUTOINCREMENT counter is kept. An index on a column that no longer
+    exists must be dropped before the call. Returns the number of rows copied.
+    '''
+    if not conn.in_transaction:
+        raise MigrationError('rebuild_table must run inside the migration transaction')
+    if conn.execute('PRAGMA foreign_keys').fetchone()[0]:
+        raise MigrationError('rebuild_table needs foreign keys off: call it from a .py migration')
+    match = _CREATE_TABLE.match(create_sql)
+    if match is None or _unquote(match.group('name')).lower() != table.lower():
+        raise MigrationError(f'create_sql must be a CREATE TABLE statement for {table}')
+    column_map = column_map or {}
+    old_columns = {row[1] for row in conn.execute(f'PRAGMA table_info({_quote(table)})')}
+    if not old_columns:
+        raise MigrationError(f'No table named {table}')
+
+    # Remember the indexes and triggers, which go with the old table, and the views that read it
+    dependents = conn.execute(
+        "SELECT type, name, sql FROM sqlite_schema WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL "
+        "ORDER BY type = 'trigger'",
+        (table,)
+    ).fetchall()
+    views = [
+        name for name, sql in conn.execute("SELECT name, sql FROM sqlite_schema WHERE type = 'view'")
+        if re.search(rf'\b{re.escape(table)}\b', sql, re.IGNORECASE)
+    ]
+    has_sequence = conn.execute("SELECT 1 FROM sqlite_schema WHERE name = 'sqlite_sequence'").fetchone() is not None
+    sequence = conn.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,)).fetchone() if has_sequence else None
+
+    # The new table, under a temporary name
+    new_table = f'_rebuild_{table}'
+    conn.execute(create_sql[:match.start('name')] + _quote(new_table) + create_sql[match.end('name'):])
+    new_columns = [row[1] for row in conn.execute(f'PRAGMA table_info({_quote(new_table)})')]
+    unknown = set(column_map) - set(new_columns)
+    if unknown:
+        raise MigrationError(f'column_map names columns the new {table} does not have: {sorted(unknown)}')
+    targets = [column for column in new_columns if column in column_map or column in old_columns]
+    insert = (
+        f"INSERT INTO {_quote(new_table)} ({', '.join(_quote(column) for column in targets)}) "
+        f"SELECT {', '.join(column_map.get(column, _quote(column)) for column in targets)} FROM {_quote(table)} "
+    )
+
+    # Copy in rowid ranges of batch_rows rows; each range is found on the rowid b-tree
+    total = conn.execute(f'SELECT COUNT(*) FROM {_quote(table)}').fetchone()[0]
+    copied, last_rowid = 0, None
+    while True:
+        after = '' if last_rowid is None else 'WHERE rowid > ? '
+        params = () if last_rowid is None else (last_rowid,)
+        bound = conn.execute(
+            f'SELECT rowid FROM {_quote(table)} {after}ORDER BY rowid LIMIT 1 OFFSET ?', params + (batch_rows - 1,)
+        ).fetchone()
+        if bound is None:
+            condition = '' if last_rowid is None else 'WHERE rowid > ?'
+            copied += conn.execute(insert + condition, params).rowcount
+        else:
+            condition = 'WHERE rowid <= ?' if last_rowid is None else 'WHERE rowid > ? AND rowid <= ?'
+            copied += conn.execute(insert + condition, params + (bound[0],)).rowcount
+        if progress:
+            progress(table, copied, total)
+        if bound is None:
+            break
+        last_rowid = bound[0]
+
+    conn.execute(f'DROP TABLE {_quote(table)}')
+    # Legacy renaming leaves the references to table in other triggers and views as they are: they now mean the new table
+    legacy_alter_table = conn.execute('PRAGMA legacy_alter_table').fetchone()[0]
+    conn.execute('PRAGMA legacy_alter_table = ON')
+    try:
+        conn.execute(f'ALTER TABLE {_quote(new_table)} RENAME TO {_quote(table)}')
+    finally:
+        conn.execute(f'PRAGMA legacy_alter_table = {int(legacy_alter_table)}')
+    # Indexes first, built once over all the rows, then the triggers
+    for _, _, sql in dependents:
+        conn.execute(sql)
+    if sequence is not None:
+        conn.execute('UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?', (sequence[0], table))
+    for view in views:
+        # Fails the migration when a view reads a column that is gone
+        conn.execute(f'SELECT * FROM {_quote(view)} LIMIT 0')
+    return copied
+
+
+def print_progress(table: str, copied: int, total: int) -> None:
+    print(f'   {table}: {copied} of {total} rows copied')
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _unquote(identifier: str) -> str:
+    if identifier[0] in '"`[':
+        return identifier[1:-1].replace('""', '"')
+    return identifier
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Show, verify or apply the schema migrations.')
+    parser.add_argument('command', choices=['status', 'verify', 'migrate'])
+    parser.add_argument('--db', type=Path, default=DB_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        from database_handler.database_handler import DatabaseHandler
+        # The handler migrates on creation; a second pass reports the outcome
+        db_handler = DatabaseHandler(args.db)
+        success, result = db_handler.init_database()
+        db_handler.close()
+        if not success:
+            raise SystemExit(f'Migration failed: {result}')
+        print('The database is up to date.')
+        return
+
+    migrations = list_migrations()
+    conn = sqlite3.connect(f'file:{args.db}?mode=ro', uri=True)
+    try:
+        has_table = conn.execute("SELECT 1 FROM sqlite_schema WHERE name = 'schema_migrations'").fetchone() is not None
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(schema_migrations)')} if has_table else set()
+        applied = {
+            row[0]: row[1:]
+            for row in conn.execute(
+                f"SELECT filename, applied_at, {'checksum' if 'checksum' in columns else 'NULL'} FROM schema_migrations"
+            )
+        } if has_table else {}
+        problems = check_applied(conn, migrations) if 'checksum' in columns else {}
+        user_version = conn.execute('PRAGMA user_version').fetchone()[0]
+    finally:
+        conn.close()
+
+    if args.command == 'status':
+        print(f'{args.db}: user_version {user_version}')
+        for migration in migrations:
+            state = f'applied {applied[migration.name][0]}' if migration.name in applied else 'pending'
+            print(f'  {migration.name:<45} {state}' + (f' - {problems[migration.name]}' if migration.name in problems else ''))
+        for name in sorted(set(applied) - {migration.name for migration in migrations}):
+            print(f'  {name:<45} {problems.get(name, "applied, file missing")}')
+    elif problems:
+        for name, problem in problems.items():
+            print(f'{name} {problem}')
+    else:
+        print('Every applied migration matches its file.')
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,37 @@
 # gui/app.py
 import streamlit as st
 
-from gui.create_services import create_services
+from config.settings import RENDER_PROFILER_ENABLED
+from gui.create_services import create_services, create_export_service, create_backup_service
+from gui.profiler import RenderProfiler
+from gui.widgets.render_profile import render_profile_panel
 
 from gui.windows.clients_window import ClientsWindow
 from gui.windows.cases_window import CasesWindow
 from gui.windows.deadlines_window import DeadlinesWindow
+from gui.windows.home_window import HomeWindow
+from gui.windows.admin_window import AdminWindow
+from gui.windows.export_window import ExportWindow
 
 class PatentCaseManagementApp:
     def __init__(self):
         # Use the helper function to create all our backend services
-        clients_service, cases_service, deadlines_service = create_services()
+        clients_service, cases_service, deadlines_service, import_service, audit_service = create_services()
         
         # Create an instance of each "window", passing the required service to it
-        self.clients_window = ClientsWindow(clients_service, cases_service)
-        self.cases_window = CasesWindow(cases_service, clients_service)
+        self.home_window = HomeWindow(deadlines_service)
+        self.clients_window = ClientsWindow(clients_service, cases_service, import_service)
+        self.cases_window = CasesWindow(cases_service, clients_service, import_service)
         self.deadlines_window = DeadlinesWindow(deadlines_service, cases_service, clients_service)
+        self.export_window = ExportWindow(create_export_service())
+        self.admin_window = AdminWindow(audit_service, create_backup_service())
+
+        # Debug mode: time every window section and count its queries
+        self.profiler = None
+        if RENDER_PROFILER_ENABLED:
+            self.profiler = RenderProfiler(clients_service.clients_repo.db_handler.query_stats)
+            for window in (self.home_window, self.clients_window, self.cases_window, self.deadlines_window, self.export_window, self.admin_window):
+                self.profiler.instrument(window)
 
     def run(self):
         # Configure the page to use a wide layout for more space
@@ -26,15 +42,27 @@ class PatentCaseManagementApp:
             st.session_state.page = 'Home'
         
         # Create the main navigation in the sidebar
-        st.sidebar.radio('Go to', ['Home', 'Clients', 'Cases', 'Deadlines'], key='page')
+        st.sidebar.radio('Go to', ['Home', 'Clients', 'Cases', 'Deadlines', 'Export', 'Admin'], key='page')
+
+        if self.profiler is None:
+            self.render_page()
+            return
+        with self.profiler.rerun(st.session_state.page) as profile:
+            self.render_page()
+        if st.sidebar.toggle('Show render profile', key='show_render_profile'):
+            render_profile_panel(profile)
 
+    def render_page(self):
         # This is the routing logic. Based on the selection, call the 'render' method of the correct window instance.
         if st.session_state.page == 'Home':
-            st.title('🏠 Welcome to the Patent Case Manager')
-            st.write('Select a section from the navigation sidebar to begin.')
+            self.home_window.render()
         elif st.session_state.page == 'Clients':
             self.clients_window.render()
         elif st.session_state.page == 'Cases':
             self.cases_window.render() # We will implement this later
         elif st.session_state.page == 'Deadlines':
-            self.deadlines_window.render() # We will implement this later
\ No newline at end of file
+            self.deadlines_window.render() # We will implement this later
+        elif st.session_state.page == 'Export':
+            self.export_window.render()
+        elif st.session_state.page == 'Admin':
+            self.admin_window.render()
\ No newline at end of file
@@ -1,22 +1,68 @@
+import threading
+
 from database_handler.database_handler import DatabaseHandler
 from repos.clients_repo import ClientsRepo
 from repos.cases_repo import CasesRepo
 from repos.deadlines_repo import DeadlinesRepo
+from repos.deadline_sweep_repo import DeadlineSweepsRepo
+from repos.deadline_load_repo import DeadlineLoadRepo
+from repos.audit_record_repo import AuditRecordsRepo
+from repos.audit_log_repo import AuditLogsRepo
+from repos.audit_checkpoint_repo import AuditCheckpointsRepo
 from services.clients_service import ClientsService
 from services.cases_service import CasesService
 from services.deadline_service import DeadlineService
+from services.import_service import ImportService
+from services.export_service import ExportService
+from services.backup_service import BackupService
+from services.audit_service import AuditService
+
+# Streamlit re-executes main.py on every interaction but keeps imported modules,
+# so the services built here are shared by every rerun and every session of the process.
+_services = None
+_services_lock = threading.Lock()
 
 def create_services():
-    db_handler = DatabaseHandler()
-    db_handler.connect()
+    '''Returns the process-wide services, building them on the first call.'''
+    global _services
+    if _services is None:
+        with _services_lock:
+            if _services is None:
+                services = build_services(DatabaseHandler())
+                # Bring the Overdue status up to date before the first page is served
+                success, result = services[2].sweep_overdue_deadlines()
+                if not success:
+                    print(f'Overdue sweep failed. Error: {result}')
+                _services = services
+    return _services
+
+def create_export_service() -> ExportService:
+    '''An export service over the repos of the process-wide services.'''
+    clients_service, cases_service, deadlines_service, _, _ = create_services()
+    return ExportService(clients_service.clients_repo, cases_service.cases_repo, deadlines_service.deadlines_repo)
+
+def create_backup_service() -> BackupService:
+    '''A backup service over the database and audit trail of the process-wide services.'''
+    return BackupService(create_services()[-1])
 
+def build_services(db_handler: DatabaseHandler):
+    '''Builds a fresh set of repos and services on top of the given database handler.'''
     clients_repo = ClientsRepo(db_handler)
     cases_repo = CasesRepo(db_handler)
     deadlines_repo = DeadlinesRepo(db_handler)
+    deadline_sweeps_repo = DeadlineSweepsRepo(db_handler)
+    deadline_load_repo = DeadlineLoadRepo(db_handler)
+    audit_records_repo = AuditRecordsRepo(db_handler)
+    audit_logs_repo = AuditLogsRepo(db_handler)
+    audit_checkpoints_repo = AuditCheckpointsRepo(db_handler)
 
     # Services
     clients_service = ClientsService(clients_repo, cases_repo)
     cases_service = CasesService(cases_repo, deadlines_repo)
-    deadlines_service = DeadlineService(deadlines_repo)
+    deadlines_service = DeadlineService(deadlines_repo, cases_repo, deadline_sweeps_repo, deadline_load_repo)
+    import_service = ImportService(clients_repo, cases_repo, clients_service, cases_service)
+    audit_service = AuditService(audit_records_repo, audit_logs_repo, audit_checkpoints_repo)
+    # Every repo write from here on is chained into audit_records
+    audit_service.attach()
 
-    return clients_service, cases_service, deadlines_service
\ No newline at end of file
+    return clients_service, cases_service, deadlines_service, import_service, audit_service
@@ -0,0 +1,189 @@
+# gui/profiler.py
+'''
+Render profiler: the debug mode of the Streamlit windows (PCM_RENDER_PROFILER=1).
+
+instrument(window) wraps the window's render() and every _render_* method. Each rerun
+inside profiler.rerun(page) then yields a RenderProfile with:
+- the wall time and repo queries of every section (render method), inclusive;
+- every statement shape (the parameterized SQL) with the number of runs;
+- the N+1 suspects: one statement run more than repeat_limit times by a single section,
+  the signature of a query issued from a loop over rows.
+Cached reads run no query and are not counted.
+
+Every profile is logged to the 'gui.profiler' logger, with the RenderProfile object
+attached to the record as record.profile; warnings when N+1 suspects were found.
+In a test, run the page and check its budget:
+
+    with profiler.rerun('Deadlines') as profile:
+        window.render()
+    profile.assert_budget(max_queries=8)
+
+A profiler follows one rerun at a time, on the thread that renders it.
+'''
+import functools
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config.settings import RENDER_PROFILER_REPEAT_LIMIT
+from utils.query_stats import QueryCall, QueryStats
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    '''Raised by RenderProfile.assert_budget when a rerun ran too many queries.'''
+
+
+@dataclass
+class SectionProfile:
+    name: str
+    calls: int = 0
+    seconds: float = 0.0
+    queries: int = 0  # Including the queries of the sections it called
+
+
+@dataclass
+class RepeatedQuery:
+    '''One statement run count times by a single section.'''
+    section: str
+    method: str
+    statement: str
+    count: int
+
+
+@dataclass
+class RenderProfile:
+    page: str
+    repeat_limit: int
+    seconds: float = 0.0
+    # Every query as (section that ran it, the call), in order
+    queries: List[Tuple[str, QueryCall]] = field(default_factory=list)
+    sections: Dict[str, SectionProfile] = field(default_factory=dict)
+    # Name of the exception that ended the rerun early, e.g. Streamlit's RerunException
+    stopped_by: Optional[str] = None
+
+    @property
+    def query_count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def query_seconds(self) -> float:
+        return sum(call.seconds for _, call in self.queries)
+
+    def statement_shapes(self) -> List[Tuple[str, int]]:
+        '''(parameterized statement, runs), most frequent first.'''
+        return Counter(' '.join(call.statement.split()) for _, call in self.queries).most_common()
+
+    def repeated_queries(self) -> List[RepeatedQuery]:
+        '''Statements a single section ran more than repeat_limit times, most runs first.'''
+        counts = Counter((section, call.method, ' '.join(call.statement.split())) for section, call in self.queries)
+        return [
+            RepeatedQuery(section, method, statement, count)
+            for (section, method, statement), count in counts.most_common()
+            if count > self.repeat_limit
+        ]
+
+    def assert_budget(self, max_queries: Optional[int] = None, allow_repeats: bool = False) -> None:
+        '''Raises QueryBudgetExceeded when the rerun ran more than max_queries queries or, unless allowed, an N+1 loop.'''
+        problems = []
+        if max_queries is not None and self.query_count > max_queries:
+            problems.append(f'{self.query_count} queries, budget {max_queries}')
+        if not allow_repeats:
+            problems.extend(
+                f'{repeated.section} ran {repeated.method} {repeated.count} times: {repeated.statement}'
+                for repeated in self.repeated_queries()
+            )
+        if problems:
+            raise QueryBudgetExceeded(f'{self.page}: ' + '; '.join(problems))
+
+    def summary(self) -> str:
+        lines = [
+            f'{self.page}: {self.seconds * 1000:.1f} ms, {self.query_count} queries '
+            f'({self.query_seconds * 1000:.1f} ms)' + (f', stopped by {self.stopped_by}' if self.stopped_by else '')
+        ]
+        for section in sorted(self.sections.values(), key=lambda section: section.seconds, reverse=True):
+            lines.append(f'  {section.name}: {section.seconds * 1000:.1f} ms, {section.queries} queries, {section.calls} calls')
+        for repeated in self.repeated_queries():
+            lines.append(f'  N+1? {repeated.section} ran {repeated.method} {repeated.count} times: {repeated.statement}')
+        return '\n'.join(lines)
+
+
+class RenderProfiler:
+    def __init__(self, query_stats: QueryStats, repeat_limit: int = RENDER_PROFILER_REPEAT_LIMIT):
+        self.query_stats = query_stats
+        self.repeat_limit = repeat_limit
+        self.last_profile: Optional[RenderProfile] = None
+        self._profile: Optional[RenderProfile] = None
+        self._stack: List[str] = []
+        self._calls: List[QueryCall] = []
+        self._attributed = 0
+
+    def instrument(self, window: object) -> object:
+        '''Wraps render() and every _render_* method of window, on the instance; returns the window.'''
+        for name in dir(type(window)):
+            if name == 'render' or name.startswith('_render_'):
+                method = getattr(window, name)
+                if callable(method):
+                    setattr(window, name, self._section(f'{type(window).__name__}.{name}', method))
+        return window
+
+    @contextmanager
+    def rerun(self, page: str) -> Iterator[RenderProfile]:
+        '''Profiles the rerun rendered inside the block; the profile is complete once the block exits.'''
+        profile = RenderProfile(page, self.repeat_limit)
+        self._profile, self._stack, self._attributed = profile, [page], 0
+        start = time.perf_counter()
+        with self.query_stats.recording() as calls:
+            self._calls = calls
+            try:
+                yield profile
+            except BaseException as e:
+                # Streamlit ends a rerun early with control-flow exceptions (st.rerun, st.stop)
+                profile.stopped_by = type(e).__name__
+                raise
+            finally:
+                self._attribute()
+                profile.seconds = time.perf_counter() - start
+                self._profile, self._stack, self._calls = None, [], []
+                self.last_profile = profile
+                self._log(profile)
+
+    # --- Internals --- #
+    def _section(self, name: str, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            profile = self._profile
+            if profile is None:
+                return method(*args, **kwargs)
+            self._attribute()
+            self._stack.append(name)
+            queries_before = len(self._calls)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._attribute()
+                self._stack.pop()
+                section = profile.sections.get(name)
+                if section is None:
+                    section = profile.sections[name] = SectionProfile(name)
+                section.calls += 1
+                section.seconds += time.perf_counter() - start
+                section.queries += len(self._calls) - queries_before
+        return wrapper
+
+    def _attribute(self) -> None:
+        '''Assigns the queries recorded since the last section boundary to the innermost section.'''
+        if self._profile is None:
+            return
+        section = self._stack[-1]
+        self._profile.queries.extend((section, call) for call in self._calls[self._attributed:])
+        self._attributed = len(self._calls)
+
+    def _log(self, profile: RenderProfile) -> None:
+        level = logging.WARNING if profile.repeated_queries() else logging.INFO
+        logger.log(level, profile.summary(), extra={'profile': profile})
@@ -0,0 +1,118 @@
+# gui/render_budget_check.py
+'''
+Query budgets of the Streamlit pages, checked headless with Streamlit's AppTest:
+
+    python -m gui.render_budget_check
+
+Builds a throwaway, populated database, renders every page of the app under the render
+profiler (gui.profiler) and fails when a page runs more repo queries than its budget in
+PAGE_BUDGETS, or runs one statement from a loop over rows (an N+1 suspect).
+Each page is rendered once, after the Home page, so its reads are not cached yet.
+'''
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+MAIN_SCRIPT = Path(__file__).resolve().parent.parent / 'main.py'
+
+# Most repo queries a first render of each page may run
+PAGE_BUDGETS: Dict[str, int] = {
+    'Home': 4,
+    'Clients': 3,
+    'Cases': 4,
+    'Deadlines': 5,
+    'Export': 0,
+    'Admin': 3,
+}
+
+
+class _ProfileCollector(logging.Handler):
+    '''Keeps the RenderProfile attached to every record of the profiler's logger.'''
+    def __init__(self):
+        super().__init__()
+        self.profiles = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        profile = getattr(record, 'profile', None)
+        if profile is not None:
+            self.profiles.append(profile)
+
+
+def check_render_budgets(timeout: float = 60) -> Tuple[bool, Union[List[Dict], Exception]]:
+    '''
+    Renders every page in PAGE_BUDGETS and returns (all_within_budget, results), where
+    every result holds the page, its profile (None if it did not render), its budget and
+    the problems found.
+    '''
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Settings are read on import: point them at the throwaway database before loading the app
+        os.environ['PCM_DB_PATH'] = str(Path(tmp_dir) / 'render_budgets.db')
+        os.environ['PCM_RENDER_PROFILER'] = '1'
+        from streamlit.testing.v1 import AppTest
+
+        from database_handler.database_handler import DatabaseHandler
+        from gui.profiler import QueryBudgetExceeded, logger
+        from utils.query_plan_check import populate_database
+
+        db_handler = DatabaseHandler()
+        try:
+            with db_handler as conn:
+                populate_database(conn)
+        except Exception as e:
+            return (False, e)
+        finally:
+            db_handler.close()
+
+        collector = _ProfileCollector()
+        logger.addHandler(collector)
+        logger.setLevel(logging.INFO)
+        results = []
+        try:
+            app = AppTest.from_file(str(MAIN_SCRIPT), default_timeout=timeout)
+            app.run()
+            for page, budget in PAGE_BUDGETS.items():
+                # The first run renders the Home page
+                if page != app.session_state['page']:
+                    collector.profiles.clear()
+                    app.sidebar.radio(key='page').set_value(page).run()
+                profile = collector.profiles[-1] if collector.profiles else None
+                problems = [f'Exception: {exception.value}' for exception in app.exception]
+                if profile is None:
+                    problems.append('The page was not profiled')
+                else:
+                    try:
+                        profile.assert_budget(budget)
+                    except QueryBudgetExceeded as e:
+                        problems.append(str(e))
+                results.append({'page': page, 'profile': profile, 'budget': budget, 'problems': problems})
+        except Exception as e:
+            return (False, e)
+        finally:
+            logger.removeHandler(collector)
+    return (not any(result['problems'] for result in results), results)
+
+
+def main() -> None:
+    success, results = check_render_budgets()
+    if isinstance(results, Exception):
+        print(f'Render budget check could not run: {results}')
+        sys.exit(1)
+    for result in results:
+        status = 'FAIL' if result['problems'] else 'ok'
+        profile = result['profile']
+        usage = f"{profile.query_count}/{result['budget']} queries, {profile.seconds * 1000:.0f} ms" if profile else '-'
+        print(f"[{status}] {result['page']}: {usage}")
+        for problem in result['problems']:
+            print(f'       -> {problem}')
+        if profile and result['problems']:
+            for statement, runs in profile.statement_shapes():
+                print(f'          {runs} x {statement}')
+    print('Every page is within its query budget.' if success else 'Some pages exceed their query budget.')
+    sys.exit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()
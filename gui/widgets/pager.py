@@ -0,0 +1,40 @@
+# gui/widgets/pager.py
+from typing import Optional
+
+import streamlit as st
+
+
+class KeysetPager:
+    '''
+    Previous/Next controls for keyset-paginated service calls. The session keeps the
+    stack of 'after' keys of the pages visited, so going back needs no OFFSET query.
+    '''
+    def __init__(self, state_key: str):
+        self.state_key = state_key
+        if state_key not in st.session_state:
+            st.session_state[state_key] = [None]
+
+    @property
+    def after(self) -> Optional[tuple]:
+        '''Key to pass to the service for the current page (None for the first page).'''
+        return st.session_state[self.state_key][-1]
+
+    @property
+    def page_number(self) -> int:
+        return len(st.session_state[self.state_key])
+
+    def reset(self) -> None:
+        st.session_state[self.state_key] = [None]
+
+    def render_controls(self, next_after: Optional[tuple]) -> None:
+        col_prev, col_page, col_next = st.columns([1, 2, 1])
+        with col_prev:
+            if st.button('⬅️ Previous', key=f'{self.state_key}_prev', disabled=self.page_number == 1):
+                st.session_state[self.state_key].pop()
+                st.rerun()
+        with col_page:
+            st.caption(f'Page {self.page_number}')
+        with col_next:
+            if st.button('Next ➡️', key=f'{self.state_key}_next', disabled=next_after is None):
+                st.session_state[self.state_key].append(next_after)
+                st.rerun()
@@ -0,0 +1,27 @@
+# gui/widgets/render_profile.py
+import pandas as pd
+import streamlit as st
+
+from gui.profiler import RenderProfile
+
+
+def render_profile_panel(profile: RenderProfile) -> None:
+    '''Sidebar summary of one rerun: time and queries per section, N+1 suspects, statement shapes.'''
+    with st.sidebar.expander(f'⏱️ Render profile: {profile.query_count} queries, {profile.seconds * 1000:.0f} ms', expanded=False):
+        st.caption(f'{profile.page}, queries took {profile.query_seconds * 1000:.1f} ms' + (f', stopped by {profile.stopped_by}' if profile.stopped_by else ''))
+        for repeated in profile.repeated_queries():
+            st.warning(f'N+1? {repeated.section} ran {repeated.method} {repeated.count} times')
+        st.dataframe(
+            pd.DataFrame(
+                [(section.name, section.seconds * 1000, section.queries, section.calls) for section in profile.sections.values()],
+                columns=['Section', 'ms', 'Queries', 'Calls']
+            ).sort_values('ms', ascending=False),
+            hide_index=True,
+            use_container_width=True,
+            column_config={'ms': st.column_config.NumberColumn(format='%.1f')}
+        )
+        st.dataframe(
+            pd.DataFrame(profile.statement_shapes(), columns=['Statement', 'Runs']),
+            hide_index=True,
+            use_container_width=True
+        )
@@ -0,0 +1,123 @@
+# gui/windows/admin_window.py
+import streamlit as st
+import pandas as pd
+from services.audit_service import AuditService
+from services.backup_service import BackupService
+from utils.query_stats import HISTOGRAM_BOUNDS_MS
+
+TOP_QUERIES = 25
+
+class AdminWindow:
+    def __init__(self, audit_service: AuditService, backup_service: BackupService):
+        self.audit_service = audit_service
+        self.backup_service = backup_service
+
+    def render(self):
+        st.title('🛠️ Admin')
+
+        tab_queries, tab_slow, tab_backups = st.tabs(['⏱️ Top queries', '🐢 Slow-query log', '💾 Backups'])
+        with tab_queries:
+            self._render_top_queries()
+        with tab_slow:
+            self._render_slow_query_log()
+        with tab_backups:
+            self._render_backups()
+
+    def _render_top_queries(self):
+        _, stats = self.audit_service.get_query_stats()
+        # The statistics are per process: they cover every session served by this Streamlit server
+        enabled = st.toggle('Measure queries', value=stats['enabled'], help='Times every repo call until switched off; costs a little on each query.')
+        if enabled != stats['enabled']:
+            self.audit_service.set_query_stats_enabled(enabled)
+            st.rerun()
+        if st.button('Reset statistics', key='reset_query_stats'):
+            self.audit_service.reset_query_stats()
+            st.rerun()
+
+        st.caption(f"Calls of at least {stats['slow_query_ms']:g} ms are written to the slow-query log.")
+        if stats['dropped_slow_queries']:
+            st.warning(f"{stats['dropped_slow_queries']} slow calls could not be written to the log.")
+        methods = stats['methods']
+        if not methods:
+            st.info('No queries measured yet.' if enabled else 'Switch on measuring to see the queries of every page.')
+            return
+
+        top = pd.DataFrame(methods[:TOP_QUERIES])
+        st.dataframe(
+            top[['method', 'total_ms', 'calls', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms', 'rows', 'statements', 'slow', 'errors', 'statement']].rename(columns={
+                'method': 'Method', 'total_ms': 'Total ms', 'calls': 'Calls', 'mean_ms': 'Mean ms', 'p50_ms': 'p50 ms',
+                'p95_ms': 'p95 ms', 'max_ms': 'Max ms', 'rows': 'Rows', 'statements': 'Statements', 'slow': 'Slow',
+                'errors': 'Errors', 'statement': 'Last SQL'
+            }),
+            hide_index=True,
+            use_container_width=True,
+            column_config={name: st.column_config.NumberColumn(format='%.2f') for name in ('Total ms', 'Mean ms', 'p50 ms', 'p95 ms', 'Max ms')}
+        )
+
+        method = st.selectbox('Latency histogram of', [row['method'] for row in methods[:TOP_QUERIES]])
+        selected = next(row for row in methods if row['method'] == method)
+        labels = [f'≤ {bound:g} ms' for bound in HISTOGRAM_BOUNDS_MS] + [f'> {HISTOGRAM_BOUNDS_MS[-1]:g} ms']
+        histogram = pd.DataFrame({'latency': labels, 'calls': selected['histogram']})
+        # Keep the buckets in latency order rather than alphabetical
+        histogram['latency'] = pd.Categorical(histogram['latency'], categories=labels, ordered=True)
+        st.bar_chart(histogram, x='latency', y='calls', x_label='Latency', y_label='Calls')
+
+    def _render_slow_query_log(self):
+        success, logs = self.audit_service.get_slow_query_log()
+        if not success:
+            st.error(f'Failed to load the slow-query log: {logs}')
+            return
+        if not logs:
+            st.info('No slow queries logged.')
+            return
+        st.dataframe(
+            pd.DataFrame(logs, columns=['timestamp', 'description']).rename(columns={'timestamp': 'When', 'description': 'Call'}),
+            hide_index=True,
+            use_container_width=True
+        )
+
+    def _render_backups(self):
+        st.caption(
+            f'Snapshots are written to {self.backup_service.backup_dir}; the newest {self.backup_service.keep} are kept. '
+            'Schedule them with python -m services.backup_service --every.'
+        )
+        if st.button('Back up now', key='run_backup'):
+            progress = st.progress(0.0, text='Copying the database...')
+            success, report = self.backup_service.run_backup(
+                lambda copied, total: progress.progress(copied / total if total else 1.0, text=f'Copied {copied} of {total} pages')
+            )
+            progress.empty()
+            if not success:
+                st.error(f'Backup failed: {report}')
+            else:
+                st.success(report.describe())
+                if report.log_error is not None:
+                    st.warning(f'The backup could not be recorded in the audit log: {report.log_error}')
+
+        snapshots = self.backup_service.get_snapshots()
+        if snapshots:
+            st.dataframe(
+                pd.DataFrame({
+                    'Snapshot': [snapshot['path'].name for snapshot in snapshots],
+                    'MB': [snapshot['bytes'] / 1e6 for snapshot in snapshots],
+                    'Written': [snapshot['modified'] for snapshot in snapshots],
+                }),
+                hide_index=True,
+                use_container_width=True,
+                column_config={'MB': st.column_config.NumberColumn(format='%.1f')}
+            )
+        else:
+            st.info('No snapshots yet.')
+
+        success, logs = self.backup_service.get_backup_log()
+        if not success:
+            st.error(f'Failed to load the backup log: {logs}')
+            return
+        if logs:
+            st.dataframe(
+                pd.DataFrame(logs, columns=['timestamp', 'log_level', 'description']).rename(
+                    columns={'timestamp': 'When', 'log_level': 'Level', 'description': 'Run'}
+                ),
+                hide_index=True,
+                use_container_width=True
+            )
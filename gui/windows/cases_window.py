@@ -1,17 +1,20 @@
 # gui/windows/cases_window.py
-import csv
-import io
 from tkinter import filedialog
 import streamlit as st
 import pandas as pd
 from services.cases_service import CasesService
 from services.clients_service import ClientsService
+from services.import_service import ImportService
+from gui.widgets.pager import KeysetPager
 import datetime
 
 class CasesWindow:
-    def __init__(self, cases_service: CasesService, clients_service: ClientsService):
+    def __init__(self, cases_service: CasesService, clients_service: ClientsService, import_service: ImportService):
         self.cases_service = cases_service
         self.clients_service = clients_service
+        self.import_service = import_service
+        self.cases_pager = KeysetPager('cases_page_keys')
+        self.search_pager = KeysetPager('cases_search_page_keys')
         # Session state for editing a case
         if 'editing_case_id' not in st.session_state:
             st.session_state.editing_case_id = None
@@ -69,27 +72,31 @@ class CasesWindow:
             return
 
         try:
-            with st.spinner("Importing..."):
-                string_data = uploaded_file.getvalue().decode("utf-8")
-                string_io = io.StringIO(string_data)
-                reader = csv.DictReader(string_io)
-                rows_to_import = list(reader)
+            progress_bar = st.progress(0.0, text="Importing...")
 
-                success_count = 0
-                for row in rows_to_import:
-                    success, result = self.cases_service.insert_case(row)
-                    if success:
-                        success_count += 1
-                    else:
-                        st.error(f"Failed to import case '{row.get('client_ref', 'N/A')}': {result}")
-
-                st.success(
-                    f"Import complete! {success_count} of {len(rows_to_import)} cases imported successfully."
+            def show_progress(progress):
+                fraction = progress.fraction if progress.fraction is not None else 0.0
+                progress_bar.progress(
+                    fraction,
+                    text=f"{progress.rows_read} rows read, {progress.rows_imported} imported, {progress.rows_failed} failed"
                 )
-                st.session_state["case_import_msg"] = (
-                    "success",
-                    f"Import complete! {success_count} of {len(rows_to_import)} cases imported successfully."
+
+            success, report = self.import_service.import_cases(uploaded_file, progress_callback=show_progress)
+            progress_bar.empty()
+            if not success:
+                st.session_state["case_import_msg"] = ("error", f"Import failed, no cases were imported: {report}")
+                return
+
+            summary = f"Import complete! {report.imported} of {report.total_rows} cases imported successfully."
+            if report.errors:
+                shown_errors = "\n".join(
+                    f"- Row {error.row_number} ('{error.identifier}'): {error.message}"
+                    for error in report.errors[:20]
                 )
+                more = f"\n- ... and {report.failed - 20} more" if report.failed > 20 else ""
+                st.session_state["case_import_msg"] = ("warning", f"{summary} {report.failed} rows failed:\n{shown_errors}{more}")
+            else:
+                st.session_state["case_import_msg"] = ("success", summary)
         except Exception as e:
             st.session_state["case_import_msg"] = ("error", f"An error occurred while processing the file: {e}")
             return
@@ -103,11 +110,27 @@ class CasesWindow:
         if st.session_state.editing_case_id is not None:
             self._render_update_case_form()
 
-        success, cases = self.cases_service.get_open_cases()
+        search_text = st.text_input(
+            '🔍 Search cases',
+            key='cases_search',
+            placeholder='Reference, filing number, title or notes',
+            on_change=self.search_pager.reset
+        )
+        if search_text.strip():
+            self._render_case_search_results(search_text)
+            return
+
+        success, page = self.cases_service.get_open_cases_page(self.cases_pager.after)
 
         if not success:
-            st.error(f"Failed to load cases: {cases}")
+            st.error(f"Failed to load cases: {page}")
             return
+
+        cases = page['rows']
+        if not cases and self.cases_pager.page_number > 1:
+            # The rest of the list was closed meanwhile: start over
+            self.cases_pager.reset()
+            st.rerun()
         
         if not cases:
             st.info("No open cases found. You can add one in the 'Add New Case' tab.")
@@ -134,6 +157,31 @@ class CasesWindow:
                     else:
                         st.error(msg)
             st.divider()
+        self.cases_pager.render_controls(page['next_after'])
+
+    def _render_case_search_results(self, search_text: str):
+        '''Ranked hits over open and closed cases, replacing the list while the search box is filled.'''
+        success, page = self.cases_service.search(search_text, self.search_pager.after)
+        if not success:
+            st.error(f"Search failed: {page}")
+            return
+        if not page['rows']:
+            st.info("No cases match the search.")
+            return
+        for case in page['rows']:
+            col1, col2, col3 = st.columns([6, 3, 2])
+            with col1:
+                st.markdown(f"**{case['title'] or 'No Title'}**")
+                st.markdown(case['snippet'])
+            with col2:
+                st.write(f"{case['client_name']} ({case['client_code']})")
+                st.caption(f"Ref: {case['client_ref']} · {case['jurisdiction'] or 'N/A'} · {'open' if case['is_open'] else 'closed'}")
+            with col3:
+                if case['is_open'] and st.button('✏️ Edit', key=f"search_edit_case_{case['case_id']}"):
+                    st.session_state.editing_case_id = case['case_id']
+                    st.rerun()
+            st.divider()
+        self.search_pager.render_controls(page['next_after'])
 
     def _render_add_case_form(self):
         with st.form("add_case_form", clear_on_submit=True):
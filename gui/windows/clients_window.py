@@ -1,15 +1,18 @@
 # gui/windows/clients_window.py
-import csv
-import io
 import streamlit as st
 import pandas as pd
 from services.clients_service import ClientsService
 from services.cases_service import CasesService
+from services.import_service import ImportService
+from gui.widgets.pager import KeysetPager
 
 class ClientsWindow:
-    def __init__(self, clients_service: ClientsService, cases_service:CasesService):
+    def __init__(self, clients_service: ClientsService, cases_service:CasesService, import_service: ImportService):
         self.clients_service = clients_service
         self.cases_service = cases_service
+        self.import_service = import_service
+        self.clients_pager = KeysetPager('clients_page_keys')
+        self.search_pager = KeysetPager('clients_search_page_keys')
         if 'editing_client_id' not in st.session_state:
             st.session_state.editing_client_id = None
         if 'viewing_cases_for_client_id' not in st.session_state:
@@ -66,27 +69,31 @@ class ClientsWindow:
             return
 
         try:
-            with st.spinner("Importing..."):
-                string_data = uploaded_file.getvalue().decode("utf-8")
-                string_io = io.StringIO(string_data)
-                reader = csv.DictReader(string_io)
-                rows_to_import = list(reader)
+            progress_bar = st.progress(0.0, text="Importing...")
 
-                success_count = 0
-                for row in rows_to_import:
-                    success, result = self.clients_service.insert_client(row)
-                    if success:
-                        success_count += 1
-                    else:
-                        st.error(f"Failed to import client '{row.get('name', 'N/A')}': {result}")
-
-                st.success(
-                    f"Import complete! {success_count} of {len(rows_to_import)} clients imported successfully."
+            def show_progress(progress):
+                fraction = progress.fraction if progress.fraction is not None else 0.0
+                progress_bar.progress(
+                    fraction,
+                    text=f"{progress.rows_read} rows read, {progress.rows_imported} imported, {progress.rows_failed} failed"
                 )
-                st.session_state["client_import_msg"] = (
-                    "success",
-                    f"Import complete! {success_count} of {len(rows_to_import)} clients imported successfully."
+
+            success, report = self.import_service.import_clients(uploaded_file, progress_callback=show_progress)
+            progress_bar.empty()
+            if not success:
+                st.session_state["client_import_msg"] = ("error", f"Import failed, no clients were imported: {report}")
+                return
+
+            summary = f"Import complete! {report.imported} of {report.total_rows} clients imported successfully."
+            if report.errors:
+                shown_errors = "\n".join(
+                    f"- Row {error.row_number} ('{error.identifier}'): {error.message}"
+                    for error in report.errors[:20]
                 )
+                more = f"\n- ... and {report.failed - 20} more" if report.failed > 20 else ""
+                st.session_state["client_import_msg"] = ("warning", f"{summary} {report.failed} rows failed:\n{shown_errors}{more}")
+            else:
+                st.session_state["client_import_msg"] = ("success", summary)
         except Exception as e:
             st.session_state["client_import_msg"] = ("error", f"An error occurred while processing the file: {e}")
             return
@@ -99,10 +106,25 @@ class ClientsWindow:
         if st.session_state.editing_client_id is not None:
             self._render_update_client_form()
 
-        success, clients = self.clients_service.get_active_clients()
+        search_text = st.text_input(
+            '🔍 Search clients',
+            key='clients_search',
+            placeholder='Code, name, city or notes',
+            on_change=self.search_pager.reset
+        )
+        if search_text.strip():
+            self._render_client_search_results(search_text)
+            return
+
+        success, page = self.clients_service.get_active_clients_page(self.clients_pager.after)
         if not success:
-            st.error(f"Failed to load clients: {clients}")
+            st.error(f"Failed to load clients: {page}")
             return
+        clients = page['rows']
+        if not clients and self.clients_pager.page_number > 1:
+            # The rest of the list was deactivated meanwhile: start over
+            self.clients_pager.reset()
+            st.rerun()
         if not clients:
             st.info("No active clients found.")
             return
@@ -130,6 +152,34 @@ class ClientsWindow:
                     else:
                         st.error(msg)
             st.divider()
+        self.clients_pager.render_controls(page['next_after'])
+
+    def _render_client_search_results(self, search_text: str):
+        '''Ranked hits over active and inactive clients, replacing the list while the search box is filled.'''
+        success, page = self.clients_service.search(search_text, self.search_pager.after)
+        if not success:
+            st.error(f"Search failed: {page}")
+            return
+        if not page['rows']:
+            st.info("No clients match the search.")
+            return
+        for client in page['rows']:
+            col1, col2, col3 = st.columns([6, 3, 2])
+            with col1:
+                st.markdown(f"**{client['name']}** (`{client['client_id']} - {client['client_code']}`)")
+                st.markdown(client['snippet'])
+            with col2:
+                st.write(f"{client['city'] or ''} {client['country']}")
+                st.caption('active' if client['is_active'] else 'inactive')
+            with col3:
+                if st.button('✏️ Edit', key=f"search_edit_{client['client_id']}"):
+                    st.session_state.editing_client_id = client['client_id']
+                    st.rerun()
+                if st.button('📁 View Cases', key=f"search_cases_{client['client_id']}"):
+                    st.session_state.viewing_cases_for_client_id = client['client_id']
+                    st.rerun()
+            st.divider()
+        self.search_pager.render_controls(page['next_after'])
 
     def _render_client_cases_view(self):
         # ... logic for viewing cases ...
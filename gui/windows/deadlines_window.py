@@ -3,6 +3,7 @@ import streamlit as st
 from services.deadline_service import DeadlineService
 from services.cases_service import CasesService
 from services.clients_service import ClientsService
+from gui.widgets.pager import KeysetPager
 import datetime
 
 class DeadlinesWindow:
@@ -10,6 +11,7 @@ class DeadlinesWindow:
         self.deadline_service = deadline_service
         self.cases_service = cases_service
         self.clients_service = clients_service
+        self.deadlines_pager = KeysetPager('deadlines_page_keys')
 
         # Initialize session state for editing
         if 'editing_deadline_id' not in st.session_state:
@@ -29,31 +31,54 @@ class DeadlinesWindow:
     def _render_view_deadlines_tab(self):
         st.subheader("Upcoming and Overdue Deadlines")
 
+        # A no-op unless the day changed or deadlines were written since the last sweep
+        swept, sweep = self.deadline_service.sweep_overdue_deadlines()
+        if not swept:
+            st.error(f'Failed to update overdue deadlines: {sweep}')
+        count_success, overdue_count = self.deadline_service.get_overdue_count()
+        if count_success:
+            st.metric('Overdue', overdue_count)
+
+        with st.expander('⚙️ Generate statutory deadlines'):
+            st.caption('Derives priority, PCT phase entry, annuity and renewal deadlines from the filing dates of open cases and adds the missing ones.')
+            if st.button('Generate', key='generate_statutory_deadlines'):
+                generated, result = self.deadline_service.generate_statutory_deadlines()
+                if generated:
+                    st.success(f"{result['inserted']} new deadlines added ({result['computed']} computed for {result['cases']} cases).")
+                else:
+                    st.error(f'Failed to generate deadlines: {result}')
+
         # --- NEW --- Show the update form if we are in edit mode
         if st.session_state.editing_deadline_id is not None:
             self._render_update_deadline_form()
 
-        success, deadlines = self.deadline_service.get_open_deadlines()
+        success, page = self.deadline_service.get_open_deadlines_board_page(self.deadlines_pager.after)
 
         if not success:
-            st.error(f"Failed to load deadlines: {deadlines}")
+            st.error(f"Failed to load deadlines: {page}")
             return
+
+        deadlines = page['rows']
+        if not deadlines and self.deadlines_pager.page_number > 1:
+            # The rest of the board was completed meanwhile: start over
+            self.deadlines_pager.reset()
+            st.rerun()
         
         if not deadlines:
             st.info("No open deadlines found. You can add one in the 'Add New Deadline' tab.")
             return
 
         for deadline in deadlines:
-            case_success, case = self.cases_service.get_case_by_id(deadline['case_id'])
-            client_success, client = self.clients_service.get_client_by_id(case['client_id']) if case_success else (False, None)
-            
-            client_name = client['name'] if client_success else "Unknown Client"
-            case_ref = case['client_ref'] if case_success else "Unknown Case"
+            client_name = deadline['client_name']
+            case_ref = deadline['client_ref']
 
             col1, col2, col3, col4 = st.columns([4, 3, 1, 2]) # Added a column for Edit button
             with col1:
                 st.markdown(f"**{deadline['description']}**")
-                st.caption(f"Due: {deadline['due_date']}")
+                if deadline['status'] == 'Overdue':
+                    st.caption(f"⚠️ Overdue since: {deadline['due_date']}")
+                else:
+                    st.caption(f"Due: {deadline['due_date']}")
             with col2:
                 st.write(f"Client: {client_name}")
                 st.caption(f"Case Ref: {case_ref}")
@@ -72,22 +97,28 @@ class DeadlinesWindow:
                         st.error(f"Failed to complete deadline: {result}")
 
             st.divider()
+        self.deadlines_pager.render_controls(page['next_after'])
+
+    def _get_case_options(self):
+        '''Maps a selection label to the case_id for every open case, using a single joined query.'''
+        case_success, cases = self.cases_service.get_open_cases_with_clients()
+        if not case_success:
+            return False, cases
+        case_options = {}
+        for case in cases:
+            option_label = f"{case['client_name']} - {case['client_ref']} ({case.get('title', 'No Title')})"
+            case_options[option_label] = case['case_id']
+        return True, case_options
 
     def _render_add_deadline_form(self):
         st.subheader("Add a New Deadline")
-        case_success, cases = self.cases_service.get_open_cases()
+        case_success, case_options = self._get_case_options()
         if not case_success:
             st.error("Could not load open cases for selection.")
             return
-        if not cases:
+        if not case_options:
             st.warning("There are no open cases. Please add a case before adding a deadline.")
             return
-        case_options = {}
-        for case in cases:
-            client_success, client = self.clients_service.get_client_by_id(case['client_id'])
-            client_name = client['name'] if client_success else "Unknown"
-            option_label = f"{client_name} - {case['client_ref']} ({case.get('title', 'No Title')})"
-            case_options[option_label] = case['case_id']
 
         with st.form("add_deadline_form", clear_on_submit=True):
             selected_case_label = st.selectbox("Select a Case*", options=case_options.keys())
@@ -124,13 +155,10 @@ class DeadlinesWindow:
             return
         
         # Prepare case options for the dropdown
-        case_success, cases = self.cases_service.get_open_cases()
-        case_options = {}
-        for case in cases:
-            client_success, client = self.clients_service.get_client_by_id(case['client_id'])
-            client_name = client['name'] if client_success else "Unknown"
-            option_label = f"{client_name} - {case['client_ref']} ({case.get('title', 'No Title')})"
-            case_options[option_label] = case['case_id']
+        case_success, case_options = self._get_case_options()
+        if not case_success:
+            st.error("Could not load open cases for selection.")
+            return
         
         # Find the index of the currently selected case to pre-fill the dropdown
         case_id_to_label = {v: k for k, v in case_options.items()}
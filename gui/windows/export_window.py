@@ -0,0 +1,78 @@
+# gui/windows/export_window.py
+import io
+from typing import Tuple, Union
+import streamlit as st
+from services.export_service import EXPORT_DATASETS, EXPORT_FORMATS, ExportService
+
+DATASET_LABELS = {
+    'clients': 'Clients',
+    'cases': 'Cases',
+    'deadlines': 'Deadlines',
+    'docket': 'Docket (deadlines with their case and client)',
+}
+
+class ExportWindow:
+    def __init__(self, export_service: ExportService):
+        self.export_service = export_service
+
+    def render(self):
+        st.title('⬇️ Export')
+        st.caption('Nothing is read until you click Download: the export is then built in batches from the database.')
+
+        dataset = st.selectbox('Data', EXPORT_DATASETS, format_func=DATASET_LABELS.get, key='export_dataset')
+        export_format = st.radio('Format', self.export_service.get_formats(), horizontal=True, key='export_format')
+        if 'parquet' not in self.export_service.get_formats():
+            st.caption('Install pyarrow to export Parquet.')
+
+        success, filters = self._render_filters(dataset)
+        if not success:
+            st.error(f'Invalid filter: {filters}')
+            return
+        success, chunks = self.export_service.stream_export(dataset, export_format, filters)
+        if not success:
+            st.error(f'Invalid export: {chunks}')
+            return
+        # Only the arguments were checked: the generator is never started here
+        chunks.close()
+
+        st.download_button(
+            'Download',
+            data=lambda: self._spool(dataset, export_format, filters),
+            file_name=self.export_service.file_name(dataset, export_format),
+            mime=EXPORT_FORMATS[export_format][0],
+            on_click='ignore',
+            type='primary',
+            icon='⬇️'
+        )
+
+    def _render_filters(self, dataset: str) -> Tuple[bool, Union[dict, ValueError]]:
+        raw_filters = {}
+        names = self.export_service.get_filters(dataset)
+        with st.expander('Filters'):
+            columns = st.columns(min(len(names), 3))
+            for i, name in enumerate(names):
+                with columns[i % len(columns)]:
+                    label = name.replace('_', ' ').capitalize() + (' (YYYY-MM-DD)' if name.startswith('due_') else '')
+                    raw_filters[name] = st.text_input(label, key=f'export_filter_{dataset}_{name}')
+        try:
+            return (True, self.export_service.parse_filters(raw_filters))
+        except ValueError as e:
+            return (False, e)
+
+    def _spool(self, dataset: str, export_format: str, filters: dict) -> io.BytesIO:
+        '''
+        Runs on click, on Streamlit's download thread. Streamlit only serves str, bytes or
+        in-memory buffers and keeps the finished file in memory anyway, so the export is
+        built in one; very large exports are better run headless:
+        python -m services.export_service docket --format parquet --out docket.parquet
+        '''
+        success, chunks = self.export_service.stream_export(dataset, export_format, filters)
+        if not success:
+            raise chunks
+        spool = io.BytesIO()
+        try:
+            spool.writelines(chunks)
+        finally:
+            chunks.close()
+        spool.seek(0)
+        return spool
@@ -0,0 +1,55 @@
+# gui/windows/home_window.py
+import streamlit as st
+import pandas as pd
+from services.deadline_service import DeadlineService
+
+class HomeWindow:
+    def __init__(self, deadline_service: DeadlineService):
+        self.deadline_service = deadline_service
+
+    def render(self):
+        st.title('🏠 Welcome to the Patent Case Manager')
+
+        # Every figure below comes from the deadline_load summary table, never from the deadlines themselves
+        start_date, end_date = self.deadline_service.get_agenda_window()
+        success, weeks = self.deadline_service.get_deadline_load_by_week(start_date, end_date)
+        if not success:
+            st.error(f'Failed to load the agenda: {weeks}')
+            return
+        success, days = self.deadline_service.get_deadline_load_by_day(start_date, end_date)
+        if not success:
+            st.error(f'Failed to load the agenda: {days}')
+            return
+        # Clients: everything still open up to the end of the window, overdue deadlines included
+        success, clients = self.deadline_service.get_deadline_load_by_client(None, end_date)
+        if not success:
+            st.error(f'Failed to load the agenda: {clients}')
+            return
+
+        st.subheader(f'📆 Agenda until {end_date}')
+        if not weeks and not clients:
+            st.info('No open deadlines. Add some on the Deadlines page.')
+            return
+
+        weekly = pd.DataFrame(weeks, columns=['week_start', 'deadline_type', 'open_count', 'overdue_count'])
+        week_totals = weekly.groupby('week_start')['open_count'].sum()
+        col1, col2, col3 = st.columns(3)
+        col1.metric('Open deadlines ahead', int(week_totals.sum()))
+        col2.metric('Overdue', sum(client['overdue_count'] for client in clients))
+        if len(week_totals):
+            col3.metric('Busiest week', week_totals.idxmax(), f'{int(week_totals.max())} deadlines', delta_color='off')
+
+        tab_weeks, tab_days, tab_clients = st.tabs(['📊 Per week', '📅 Per day', '👤 Per client'])
+        with tab_weeks:
+            st.bar_chart(weekly, x='week_start', y='open_count', color='deadline_type', x_label='Week starting', y_label='Open deadlines')
+        with tab_days:
+            daily = pd.DataFrame(days, columns=['due_date', 'deadline_type', 'open_count', 'overdue_count'])
+            st.bar_chart(daily, x='due_date', y='open_count', color='deadline_type', x_label='Due date', y_label='Open deadlines')
+        with tab_clients:
+            st.dataframe(
+                pd.DataFrame(clients, columns=['client_code', 'client_name', 'open_count', 'overdue_count']).rename(columns={
+                    'client_code': 'Code', 'client_name': 'Client', 'open_count': 'Open', 'overdue_count': 'Overdue'
+                }),
+                hide_index=True,
+                use_container_width=True
+            )
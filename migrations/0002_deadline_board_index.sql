@@ -0,0 +1,2 @@
+-- Open deadlines board: partial index serving the completed=0 filter and the due_date ordering --
+CREATE INDEX IF NOT EXISTS idx_deadlines_open_due_date ON deadlines(due_date) WHERE completed=0;
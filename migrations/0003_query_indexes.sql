@@ -0,0 +1,21 @@
+-- Secondary indexes for the repo access paths --
+
+-- Clients: alphabetical listings, the active-client selectboxes use the partial index
+CREATE INDEX IF NOT EXISTS idx_clients_name ON clients(name);
+CREATE INDEX IF NOT EXISTS idx_clients_active_name ON clients(name) WHERE is_active=1;
+
+-- Cases: open-case listings and the attribute filters
+CREATE INDEX IF NOT EXISTS idx_cases_open_client ON cases(client_id, client_ref) WHERE is_open=1;
+CREATE INDEX IF NOT EXISTS idx_cases_status ON cases(status);
+CREATE INDEX IF NOT EXISTS idx_cases_jurisdiction ON cases(jurisdiction);
+CREATE INDEX IF NOT EXISTS idx_cases_ipr_type ON cases(ipr_type);
+CREATE INDEX IF NOT EXISTS idx_cases_procedure_type ON cases(procedure_type);
+
+-- Deadlines: full agenda ordering, and open deadlines per case (also serves the case_id foreign key)
+CREATE INDEX IF NOT EXISTS idx_deadlines_due_date ON deadlines(due_date);
+CREATE INDEX IF NOT EXISTS idx_deadlines_case_open_due_date ON deadlines(case_id, due_date) WHERE completed=0;
+CREATE INDEX IF NOT EXISTS idx_deadlines_case ON deadlines(case_id);
+
+-- Audit trails are read in timestamp order
+CREATE INDEX IF NOT EXISTS idx_audit_records_timestamp ON audit_records(timestamp);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_timestamp ON audit_logs(timestamp);
@@ -0,0 +1,11 @@
+-- Audit chain checkpoints: the last row of a chain that verified, so the next check starts after it --
+CREATE TABLE IF NOT EXISTS audit_checkpoints(
+    audit_checkpoint_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chain_table TEXT NOT NULL CHECK(chain_table in ('audit_records', 'audit_logs')),
+    last_id INTEGER NOT NULL,
+    last_hash TEXT NOT NULL CHECK(LENGTH(last_hash)>0),
+    rows_verified INTEGER NOT NULL,
+    verified_at TEXT NOT NULL CHECK(DATETIME(verified_at) IS NOT NULL)
+);
+
+CREATE INDEX IF NOT EXISTS idx_audit_checkpoints_chain ON audit_checkpoints(chain_table, audit_checkpoint_id);
@@ -0,0 +1,4 @@
+-- Deadlines per case and description: the generator's duplicate check reads it as a covering index.
+-- It also serves every case_id lookup, so it replaces idx_deadlines_case.
+CREATE INDEX IF NOT EXISTS idx_deadlines_case_description ON deadlines(case_id, description);
+DROP INDEX IF EXISTS idx_deadlines_case;
@@ -0,0 +1,13 @@
+-- Overdue sweeps: the runs that marked deadlines overdue, and the day they swept up to (swept_from is dropped by 0013) --
+CREATE TABLE IF NOT EXISTS deadline_sweeps(
+    deadline_sweep_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    swept_from TEXT CHECK(swept_from IS NULL OR DATE(swept_from) IS NOT NULL),
+    swept_before TEXT NOT NULL CHECK(DATE(swept_before) IS NOT NULL),
+    deadlines_marked INTEGER NOT NULL,
+    swept_at TEXT NOT NULL CHECK(DATETIME(swept_at) IS NOT NULL)
+);
+
+-- Pending deadlines by due date: the sweep's range UPDATE only visits the rows it marks
+CREATE INDEX IF NOT EXISTS idx_deadlines_pending_due_date ON deadlines(due_date) WHERE status='Pending';
+-- Overdue deadlines: the overdue counts read this partial index and nothing else
+CREATE INDEX IF NOT EXISTS idx_deadlines_overdue_due_date ON deadlines(due_date) WHERE status='Overdue';
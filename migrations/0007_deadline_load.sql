@@ -0,0 +1,93 @@
+-- Deadline load: open and overdue deadline counts per due date, deadline type and client, for the agenda dashboard --
+-- Maintained by the triggers below on every deadline and case write, so reading it never touches deadlines.
+CREATE TABLE IF NOT EXISTS deadline_load(
+    due_date TEXT NOT NULL,
+    deadline_type TEXT NOT NULL,
+    client_id INTEGER NOT NULL,
+    open_count INTEGER NOT NULL,
+    overdue_count INTEGER NOT NULL,
+    PRIMARY KEY (due_date, deadline_type, client_id)
+) WITHOUT ROWID;
+
+-- Per-client totals group on this covering index
+CREATE INDEX IF NOT EXISTS idx_deadline_load_client ON deadline_load(client_id, due_date, open_count, overdue_count);
+
+-- Backfill from the open deadlines already stored
+INSERT INTO deadline_load (due_date, deadline_type, client_id, open_count, overdue_count)
+SELECT d.due_date, d.deadline_type, c.client_id, COUNT(*), SUM(d.status='Overdue')
+FROM deadlines d
+JOIN cases c ON c.case_id = d.case_id
+WHERE d.completed=0
+GROUP BY d.due_date, d.deadline_type, c.client_id;
+
+-- A new open deadline adds one to its day
+CREATE TRIGGER IF NOT EXISTS trg_deadline_load_insert AFTER INSERT ON deadlines
+WHEN NEW.completed=0
+BEGIN
+    INSERT INTO deadline_load (due_date, deadline_type, client_id, open_count, overdue_count)
+    SELECT NEW.due_date, NEW.deadline_type, client_id, 1, NEW.status='Overdue' FROM cases WHERE case_id=NEW.case_id
+    ON CONFLICT (due_date, deadline_type, client_id) DO UPDATE SET
+        open_count = open_count + 1,
+        overdue_count = overdue_count + excluded.overdue_count;
+END;
+
+-- Edits, completions and the overdue sweep: take the old row out of its day, then add the new one
+CREATE TRIGGER IF NOT EXISTS trg_deadline_load_update AFTER UPDATE OF case_id, due_date, deadline_type, status, completed ON deadlines
+WHEN (OLD.completed=0 OR NEW.completed=0) AND (
+    OLD.case_id IS NOT NEW.case_id OR OLD.due_date IS NOT NEW.due_date OR OLD.deadline_type IS NOT NEW.deadline_type
+    OR OLD.status IS NOT NEW.status OR OLD.completed IS NOT NEW.completed
+)
+BEGIN
+    UPDATE deadline_load SET
+        open_count = open_count - 1,
+        overdue_count = overdue_count - (OLD.status='Overdue')
+    WHERE OLD.completed=0
+        AND due_date=OLD.due_date AND deadline_type=OLD.deadline_type
+        AND client_id=(SELECT client_id FROM cases WHERE case_id=OLD.case_id);
+    DELETE FROM deadline_load
+    WHERE OLD.completed=0 AND open_count=0
+        AND due_date=OLD.due_date AND deadline_type=OLD.deadline_type
+        AND client_id=(SELECT client_id FROM cases WHERE case_id=OLD.case_id);
+    INSERT INTO deadline_load (due_date, deadline_type, client_id, open_count, overdue_count)
+    SELECT NEW.due_date, NEW.deadline_type, client_id, 1, NEW.status='Overdue' FROM cases WHERE case_id=NEW.case_id AND NEW.completed=0
+    ON CONFLICT (due_date, deadline_type, client_id) DO UPDATE SET
+        open_count = open_count + 1,
+        overdue_count = overdue_count + excluded.overdue_count;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_deadline_load_delete AFTER DELETE ON deadlines
+WHEN OLD.completed=0
+BEGIN
+    UPDATE deadline_load SET
+        open_count = open_count - 1,
+        overdue_count = overdue_count - (OLD.status='Overdue')
+    WHERE due_date=OLD.due_date AND deadline_type=OLD.deadline_type
+        AND client_id=(SELECT client_id FROM cases WHERE case_id=OLD.case_id);
+    DELETE FROM deadline_load
+    WHERE open_count=0 AND due_date=OLD.due_date AND deadline_type=OLD.deadline_type
+        AND client_id=(SELECT client_id FROM cases WHERE case_id=OLD.case_id);
+END;
+
+-- A case moved to another client takes its open deadlines along
+CREATE TRIGGER IF NOT EXISTS trg_deadline_load_case_client AFTER UPDATE OF client_id ON cases
+WHEN OLD.client_id IS NOT NEW.client_id
+BEGIN
+    UPDATE deadline_load SET
+        open_count = deadline_load.open_count - moved.open_count,
+        overdue_count = deadline_load.overdue_count - moved.overdue_count
+    FROM (
+        SELECT due_date, deadline_type, COUNT(*) AS open_count, SUM(status='Overdue') AS overdue_count
+        FROM deadlines WHERE case_id=OLD.case_id AND completed=0
+        GROUP BY due_date, deadline_type
+    ) AS moved
+    WHERE deadline_load.due_date=moved.due_date AND deadline_load.deadline_type=moved.deadline_type
+        AND deadline_load.client_id=OLD.client_id;
+    DELETE FROM deadline_load WHERE client_id=OLD.client_id AND open_count=0;
+    INSERT INTO deadline_load (due_date, deadline_type, client_id, open_count, overdue_count)
+    SELECT due_date, deadline_type, NEW.client_id, COUNT(*), SUM(status='Overdue')
+    FROM deadlines WHERE case_id=NEW.case_id AND completed=0
+    GROUP BY due_date, deadline_type
+    ON CONFLICT (due_date, deadline_type, client_id) DO UPDATE SET
+        open_count = open_count + excluded.open_count,
+        overdue_count = overdue_count + excluded.overdue_count;
+END;
@@ -0,0 +1,61 @@
+-- Full-text search over the case and client text fields --
+-- External content tables: the text stays in cases and clients, FTS5 only stores the index.
+-- Prefix indexes serve search-as-you-type queries ("valv"*); diacritics are folded so "Muller" finds "Müller".
+CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5(
+    client_ref, filing_number, title, notes,
+    content='cases', content_rowid='case_id',
+    tokenize="unicode61 remove_diacritics 2", prefix='2 3'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5(
+    client_code, name, city, notes,
+    content='clients', content_rowid='client_id',
+    tokenize="unicode61 remove_diacritics 2", prefix='2 3'
+);
+
+-- bm25 column weights: references and names count more than free-text notes
+INSERT INTO cases_fts(cases_fts, rank) VALUES('rank', 'bm25(10.0, 10.0, 4.0, 1.0)');
+INSERT INTO clients_fts(clients_fts, rank) VALUES('rank', 'bm25(10.0, 5.0, 2.0, 1.0)');
+
+-- Index the rows already stored
+INSERT INTO cases_fts(cases_fts) VALUES('rebuild');
+INSERT INTO clients_fts(clients_fts) VALUES('rebuild');
+
+CREATE TRIGGER IF NOT EXISTS trg_cases_fts_insert AFTER INSERT ON cases
+BEGIN
+    INSERT INTO cases_fts(rowid, client_ref, filing_number, title, notes)
+    VALUES (NEW.case_id, NEW.client_ref, NEW.filing_number, NEW.title, NEW.notes);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_cases_fts_update AFTER UPDATE OF client_ref, filing_number, title, notes ON cases
+BEGIN
+    INSERT INTO cases_fts(cases_fts, rowid, client_ref, filing_number, title, notes)
+    VALUES ('delete', OLD.case_id, OLD.client_ref, OLD.filing_number, OLD.title, OLD.notes);
+    INSERT INTO cases_fts(rowid, client_ref, filing_number, title, notes)
+    VALUES (NEW.case_id, NEW.client_ref, NEW.filing_number, NEW.title, NEW.notes);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_cases_fts_delete AFTER DELETE ON cases
+BEGIN
+    INSERT INTO cases_fts(cases_fts, rowid, client_ref, filing_number, title, notes)
+    VALUES ('delete', OLD.case_id, OLD.client_ref, OLD.filing_number, OLD.title, OLD.notes);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_clients_fts_insert AFTER INSERT ON clients
+BEGIN
+    INSERT INTO clients_fts(rowid, client_code, name, city, notes)
+    VALUES (NEW.client_id, NEW.client_code, NEW.name, NEW.city, NEW.notes);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_clients_fts_update AFTER UPDATE OF client_code, name, city, notes ON clients
+BEGIN
+    INSERT INTO clients_fts(clients_fts, rowid, client_code, name, city, notes)
+    VALUES ('delete', OLD.client_id, OLD.client_code, OLD.name, OLD.city, OLD.notes);
+    INSERT INTO clients_fts(rowid, client_code, name, city, notes)
+    VALUES (NEW.client_id, NEW.client_code, NEW.name, NEW.city, NEW.notes);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_clients_fts_delete AFTER DELETE ON clients
+BEGIN
+    INSERT INTO clients_fts(clients_fts, rowid, client_code, name, city, notes)
+    VALUES ('delete', OLD.client_id, OLD.client_code, OLD.name, OLD.city, OLD.notes);
+END;
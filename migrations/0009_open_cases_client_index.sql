@@ -0,0 +1,3 @@
+-- Open cases of one client in case_id order: the API's client filter pages on case_id --
+-- idx_cases_open_client orders by client_ref within a client; this index keeps the rowid order instead.
+CREATE INDEX IF NOT EXISTS idx_cases_open_client_id ON cases(client_id) WHERE is_open=1;
@@ -0,0 +1,54 @@
+-- Per-table write generations, for change detection across processes --
+-- Every committed write to a tracked table bumps its generation, whichever process or script made it,
+-- so a process can tell which of its cached reads went stale by comparing a handful of integers.
+CREATE TABLE IF NOT EXISTS table_generations (
+    table_name TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+INSERT OR IGNORE INTO table_generations (table_name) VALUES ('clients'), ('cases'), ('deadlines');
+
+CREATE TRIGGER IF NOT EXISTS trg_clients_generation_insert AFTER INSERT ON clients
+BEGIN
+    UPDATE table_generations SET generation = generation + 1 WHERE table_name = 'clients';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_clients_generation_update AFTER UPDATE ON clients
+BEGIN
+    UPDATE table_generations SET generation = generation + 1 WHERE table_name = 'clients';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_clients_generation_delete AFTER DELETE ON clients
+BEGIN
+    UPDATE table_generations SET generation = generation + 1 WHERE table_name = 'clients';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_cases_generation_insert AFTER INSERT ON cases
+BEGIN
+    UPDATE table_generations SET generation = generation + 1 WHERE table_name = 'cases';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_cases_generation_update AFTER UPDATE ON cases
+BEGIN
+    UPDATE table_generations SET generation = generation + 1 WHERE table_name = 'cases';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_cases_generation_delete AFTER DELETE ON cases
+BEGIN
+    UPDATE table_generations SET generation = generation + 1 WHERE table_name = 'cases';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_deadlines_generation_insert AFTER INSERT ON deadlines
+BEGIN
+    UPDATE table_generations SET generation = generation + 1 WHERE table_name = 'deadlines';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_deadlines_generation_update AFTER UPDATE ON deadlines
+BEGIN
+    UPDATE table_generations SET generation = generation + 1 WHERE table_name = 'deadlines';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_deadlines_generation_delete AFTER DELETE ON deadlines
+BEGIN
+    UPDATE table_generations SET generation = generation + 1 WHERE table_name = 'deadlines';
+END;
@@ -0,0 +1,3 @@
+-- Newest logs of one level first: the Admin page reads the PERF (slow query) log this way --
+-- The rowid is the last key column of the index, so ORDER BY audit_log_id DESC needs no sort.
+CREATE INDEX IF NOT EXISTS idx_audit_logs_level ON audit_logs(log_level);
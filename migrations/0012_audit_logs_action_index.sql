@@ -0,0 +1,3 @@
+-- Newest logs of one action first: the Admin page reads the backup history this way --
+-- The rowid is the last key column of the index, so ORDER BY audit_log_id DESC needs no sort.
+CREATE INDEX IF NOT EXISTS idx_audit_logs_action ON audit_logs(action);
@@ -0,0 +1,3 @@
+-- Every overdue sweep marks all pending deadlines past due, not a range of due dates since the last one --
+-- so the start of that range, always NULL since, is dropped.
+ALTER TABLE deadline_sweeps DROP COLUMN swept_from;
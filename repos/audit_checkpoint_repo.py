@@ -0,0 +1,32 @@
+from typing import Tuple, Union, Dict, List
+from .base_repo import BaseRepo
+
+from database_handler.database_handler import DatabaseHandler
+
+class AuditCheckpointsRepo(BaseRepo):
+    def __init__(self, db_handler: DatabaseHandler):
+        super().__init__('audit_checkpoints', db_handler)
+        self.id_field = 'audit_checkpoint_id'
+        self.allowed_columns = [
+            'audit_checkpoint_id',
+            'chain_table',
+            'last_id',
+            'last_hash',
+            'rows_verified',
+            'verified_at'
+        ]
+
+    def get_last_checkpoint(self, chain_table: str) -> Tuple[bool, Union[dict, None, Exception]]:
+        return self._run_query_one(
+            f'SELECT * FROM {self.table_name} WHERE chain_table=? ORDER BY audit_checkpoint_id DESC LIMIT 1',
+            (chain_table,)
+        )
+
+    def get_checkpoints(self, chain_table: str) -> Tuple[bool, Union[List[Dict], Exception]]:
+        return self._run_query(
+            f'SELECT * FROM {self.table_name} WHERE chain_table=? ORDER BY audit_checkpoint_id',
+            (chain_table,)
+        )
+
+    def insert_checkpoint(self, checkpoint_data: dict) -> Tuple[bool, Union[int, Exception]]:
+        return self.insert_new_record(checkpoint_data)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, Tuple, Union, Dict, List
+from typing import Iterator, Optional, Tuple, Union, Dict, List
 from .base_repo import BaseRepo
 
 from database_handler.database_handler import DatabaseHandler
@@ -7,6 +7,7 @@ from database_handler.database_handler import DatabaseHandler
 class AuditLogsRepo(BaseRepo):
     def __init__(self, db_handler: DatabaseHandler):
         super().__init__('audit_logs', db_handler)
+        self.id_field = 'audit_log_id'
         self.allowed_columns = [
             'audit_log_id',
             'log_level',
@@ -17,13 +18,67 @@ class AuditLogsRepo(BaseRepo):
             'previous_hash'
         ]
 
-    def get_all_audit_logs(self) -> Tuple[bool, Union[List[Dict], Exception]]:
+    def get_all_audit_logs(self, shape: str = 'dict') -> Tuple[bool, Union[List[Dict], object, Exception]]:
         return self._run_query(
+            f'SELECT * FROM {self.table_name} ORDER BY timestamp',
+            shape=shape
+        )
+
+    def iter_all_audit_logs(self) -> Iterator[Dict]:
+        '''Streams every audit log in timestamp order.'''
+        return self._iter_query(
             f'SELECT * FROM {self.table_name} ORDER BY timestamp'
         )
 
+    def get_audit_logs_by_level(self, log_level: str, limit: int = 50) -> Tuple[bool, Union[List[Dict], Exception]]:
+        '''The newest limit logs of log_level, newest first.'''
+        return self._run_query(
+            f'SELECT * FROM {self.table_name} WHERE log_level = ? ORDER BY audit_log_id DESC LIMIT ?',
+            (log_level, limit)
+        )
+
+    def get_audit_logs_by_action(self, action: str, limit: int = 50) -> Tuple[bool, Union[List[Dict], Exception]]:
+        '''The newest limit logs of action, newest first.'''
+        return self._run_query(
+            f'SELECT * FROM {self.table_name} WHERE action = ? ORDER BY audit_log_id DESC LIMIT ?',
+            (action, limit)
+        )
+
     def get_audit_log_by_id(self, id_value: id, id_field: str='audit_log_id') -> Tuple[bool, Union[dict, None, Exception]]:
         return self._get_record_by_id(id_field, id_value)
     
     def insert_audit_log(self, audit_log_data: dict) -> Tuple[bool, Union[int, Exception]]:
-        return self.insert_new_record(audit_log_data)
\ No newline at end of file
+        return self.insert_new_record(audit_log_data)
+
+    # --- Hash chain access, in audit_log_id order --- #
+    def get_last_audit_log(self) -> Tuple[bool, Union[dict, None, Exception]]:
+        '''The tail of the chain; inside a write block it includes the block's own rows.'''
+        return self._run_query_one(
+            f'SELECT * FROM {self.table_name} WHERE audit_log_id = (SELECT MAX(audit_log_id) FROM {self.table_name})'
+        )
+
+    def get_audit_log_id_bounds(self) -> Tuple[bool, Union[dict, None, Exception]]:
+        '''{'first_id', 'last_id'} of the chain, both None when it is empty.'''
+        return self._run_query_one(
+            f'SELECT (SELECT MIN(audit_log_id) FROM {self.table_name}) AS first_id, (SELECT MAX(audit_log_id) FROM {self.table_name}) AS last_id'
+        )
+
+    def iter_audit_logs_after(self, after_id: int = 0, until_id: Optional[int] = None) -> Iterator[Dict]:
+        '''Streams the chain from after_id (exclusive) to until_id (inclusive, default the end).'''
+        if until_id is None:
+            return self._iter_query(
+                f'SELECT * FROM {self.table_name} WHERE audit_log_id > ? ORDER BY audit_log_id',
+                (after_id,)
+            )
+        return self._iter_query(
+            f'SELECT * FROM {self.table_name} WHERE audit_log_id > ? AND audit_log_id <= ? ORDER BY audit_log_id',
+            (after_id, until_id)
+        )
+
+    def append_audit_logs(self, audit_logs: List[dict]) -> Tuple[bool, Union[int, Exception]]:
+        '''Inserts already chained rows (see utils.audit.chain_rows) with a single executemany.'''
+        columns = ('log_level', 'action', 'description', 'timestamp', 'hash', 'previous_hash')
+        return self._run_modify_many(
+            f'INSERT INTO {self.table_name} (log_level, action, description, timestamp, hash, previous_hash) VALUES (?, ?, ?, ?, ?, ?)',
+            [tuple(row[column] for column in columns) for row in audit_logs]
+        )
\ No newline at end of file
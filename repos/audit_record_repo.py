@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, Tuple, Union, Dict, List
+from typing import Iterator, Optional, Tuple, Union, Dict, List
 from .base_repo import BaseRepo
 
 from database_handler.database_handler import DatabaseHandler
@@ -7,6 +7,7 @@ from database_handler.database_handler import DatabaseHandler
 class AuditRecordsRepo(BaseRepo):
     def __init__(self, db_handler: DatabaseHandler):
         super().__init__('audit_records', db_handler)
+        self.id_field = 'audit_record_id'
         self.allowed_columns = [
             'audit_record_id',
             'table_name',
@@ -18,8 +19,15 @@ class AuditRecordsRepo(BaseRepo):
             'previous_hash'
         ]
 
-    def get_all_audit_records(self) -> Tuple[bool, Union[List[Dict], Exception]]:
+    def get_all_audit_records(self, shape: str = 'dict') -> Tuple[bool, Union[List[Dict], object, Exception]]:
         return self._run_query(
+            f'SELECT * FROM {self.table_name} ORDER BY timestamp',
+            shape=shape
+        )
+
+    def iter_all_audit_records(self) -> Iterator[Dict]:
+        '''Streams every audit record in timestamp order.'''
+        return self._iter_query(
             f'SELECT * FROM {self.table_name} ORDER BY timestamp'
         )
 
@@ -27,4 +35,37 @@ class AuditRecordsRepo(BaseRepo):
         return self._get_record_by_id(id_field, id_value)
     
     def insert_audit_record(self, audit_record_data: dict) -> Tuple[bool, Union[int, Exception]]:
-        return self.insert_new_record(audit_record_data)
\ No newline at end of file
+        return self.insert_new_record(audit_record_data)
+
+    # --- Hash chain access, in audit_record_id order --- #
+    def get_last_audit_record(self) -> Tuple[bool, Union[dict, None, Exception]]:
+        '''The tail of the chain; inside a write block it includes the block's own rows.'''
+        return self._run_query_one(
+            f'SELECT * FROM {self.table_name} WHERE audit_record_id = (SELECT MAX(audit_record_id) FROM {self.table_name})'
+        )
+
+    def get_audit_record_id_bounds(self) -> Tuple[bool, Union[dict, None, Exception]]:
+        '''{'first_id', 'last_id'} of the chain, both None when it is empty.'''
+        return self._run_query_one(
+            f'SELECT (SELECT MIN(audit_record_id) FROM {self.table_name}) AS first_id, (SELECT MAX(audit_record_id) FROM {self.table_name}) AS last_id'
+        )
+
+    def iter_audit_records_after(self, after_id: int = 0, until_id: Optional[int] = None) -> Iterator[Dict]:
+        '''Streams the chain from after_id (exclusive) to until_id (inclusive, default the end).'''
+        if until_id is None:
+            return self._iter_query(
+                f'SELECT * FROM {self.table_name} WHERE audit_record_id > ? ORDER BY audit_record_id',
+                (after_id,)
+            )
+        return self._iter_query(
+            f'SELECT * FROM {self.table_name} WHERE audit_record_id > ? AND audit_record_id <= ? ORDER BY audit_record_id',
+            (after_id, until_id)
+        )
+
+    def append_audit_records(self, audit_records: List[dict]) -> Tuple[bool, Union[int, Exception]]:
+        '''Inserts already chained rows (see utils.audit.chain_rows) with a single executemany.'''
+        columns = ('table_name', 'action', 'table_record_id', 'new_value', 'timestamp', 'hash', 'previous_hash')
+        return self._run_modify_many(
+            f'INSERT INTO {self.table_name} (table_name, action, table_record_id, new_value, timestamp, hash, previous_hash) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [tuple(row[column] for column in columns) for row in audit_records]
+        )
\ No newline at end of file
@@ -1,21 +1,94 @@
+import functools
 import sqlite3
+import sys
 
-from typing import Dict, Optional, List, Tuple, Union
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional, List, Tuple, Union
+from config.settings import FETCH_BATCH_SIZE
 from database_handler.database_handler import DatabaseHandler
+from repos.records import RESULT_SHAPES, shape_rows
+
+# Keys per 'WITH keys AS (VALUES ...)' lookup when mapping natural keys back to ids
+KEY_LOOKUP_CHUNK = 500
+
+
+class RecordImportError(sqlite3.DatabaseError):
+    '''Raised to abort a bulk import at the first row the database rejects.'''
+    def __init__(self, row_number: int, error: Exception):
+        super().__init__(f'Row {row_number}: {error}')
+        self.row_number = row_number
+        self.error = error
+
+
+# --- Query instrumentation: wraps the helpers that run SQL (see utils.query_stats) --- #
+def _instrumented(count_rows: Callable[[object], int]):
+    '''
+    Measures every call of a repo helper in db_handler.query_stats, under the public
+    repo method that called it, with count_rows(result) rows. Inactive (statistics off
+    and no recording open), it costs one attribute check per call.
+    '''
+    def decorate(helper: Callable) -> Callable:
+        @functools.wraps(helper)
+        def wrapper(self, *args, **kwargs):
+            stats = self.db_handler.query_stats
+            if not stats.active:
+                return helper(self, *args, **kwargs)
+            statement = args[0] if args and isinstance(args[0], str) else f'{helper.__name__} on {self.table_name}'
+            with stats.measure(_calling_method(self, helper.__name__), statement) as measurement:
+                result = helper(self, *args, **kwargs)
+                success, value = result
+                measurement.failed = not success
+                measurement.rows = count_rows(value) if success else 0
+            # The slow-query log is written by its own transaction, never by the caller's
+            if stats.has_slow_queries() and not self.db_handler.in_write_block():
+                stats.flush_slow_queries()
+            return result
+        return wrapper
+    return decorate
+
+
+def _calling_method(repo: 'BaseRepo', helper_name: str, max_depth: int = 12) -> str:
+    '''Returns 'Class.method' for the nearest public method of repo on the stack, looking through cached lambdas.'''
+    frame = sys._getframe(2)
+    for _ in range(max_depth):
+        if frame is None:
+            break
+        name = frame.f_code.co_name
+        if name.isidentifier() and not name.startswith('_') and frame.f_locals.get('self') is repo:
+            return f'{type(repo).__name__}.{name}'
+        frame = frame.f_back
+    return f'{type(repo).__name__}.{helper_name}'
+
+
+def _row_count(rows: object) -> int:
+    '''Rows in a result of any shape (see repos.records).'''
+    if isinstance(rows, tuple):
+        return len(rows[1])
+    if isinstance(rows, dict):
+        return len(next(iter(rows.values()), ()))
+    return len(rows)
 
 
 class BaseRepo:
 
     def __init__(self, table_name:str, db_handler: DatabaseHandler):
         self.db_handler = db_handler
-        self.table_name = table_name
+        self._table_name = table_name
+        self.id_field = None  # Primary key column, set by the subclass
+        self.natural_key: Tuple[str, ...] = ()  # UNIQUE columns that upsert_many conflicts on
         self.allowed_columns = []
+        # Filters the page methods accept: name -> SQL condition with one '?', set by the subclass
+        self.page_filters: Dict[str, str] = {}
+        self._statements: Dict[tuple, str] = {}
         self.allowed_table_names = [
             'clients',
             'cases',
-            'deadliines',
+            'deadlines',
             'audit_records',
-            'audit_logs'
+            'audit_logs',
+            'audit_checkpoints',
+            'deadline_sweeps',
+            'deadline_load'
         ]
         self._validate_table_name(self.table_name)
 
@@ -27,34 +100,55 @@ class BaseRepo:
     def table_name(self, value):
         raise AttributeError("table_name is immutable.")
 
+    @property
+    def allowed_columns(self) -> List[str]:
+        return self._allowed_columns
+
+    @allowed_columns.setter
+    def allowed_columns(self, value: List[str]):
+        self._allowed_columns = value
+        self._allowed_column_set = frozenset(value)
+
     # --- Validation functions to minimize SQL injection risk --- #
     def _validate_table_name(self, table_name:str) -> None | ValueError:
         if table_name not in self.allowed_table_names:
             raise ValueError(f'Disallowed table name {table_name}')
 
     def _validate_field_names(self, field_names: List[str]) -> None | ValueError:
-        if not self.allowed_columns:
+        if not self._allowed_column_set:
             raise RuntimeError("allowed_columns not set.")
         for field_name in field_names:
-            if field_name not in self.allowed_columns:
+            if field_name not in self._allowed_column_set:
                 raise ValueError(f'Disallowed field name {field_name}')
 
     # --- Function for running a query retunrning multiple records --- #
+    @_instrumented(_row_count)
     def _run_query(
             self,
             query: str,
-            params: tuple = ()
-            ) -> Tuple[bool, Union[List[Dict], Exception]]:
+            params: tuple = (),
+            shape: str = 'dict'
+            ) -> Tuple[bool, Union[List[Dict], object, Exception]]:
+        '''Runs a query and returns its rows in the given shape (see repos.records).'''
         try:
             self._validate_table_name(self.table_name)
-            with self.db_handler as conn:
+            if shape not in RESULT_SHAPES:
+                raise ValueError(f'Unknown result shape {shape}')
+            with self.db_handler.read() as conn:
                 cursor = conn.cursor()
-                rows = cursor.execute(query, params)
-            return (True, [dict(row) for row in rows])
-        except sqlite3.Error as e:
+                if shape == 'dict':
+                    rows = [dict(row) for row in cursor.execute(query, params)]
+                    return (True, rows)
+                # Plain tuples: no sqlite3.Row or dict per row
+                cursor.row_factory = None
+                rows = cursor.execute(query, params).fetchall()
+                columns = tuple(column[0] for column in cursor.description)
+            return (True, shape_rows(self.table_name, columns, rows, shape))
+        except (ValueError, ImportError, sqlite3.Error) as e:
             return (False, e)
 
     # --- Function for running a query retunrning a single record --- #
+    @_instrumented(lambda record: 1 if record else 0)
     def _run_query_one(
             self,
             query: str,
@@ -62,37 +156,224 @@ class BaseRepo:
             ) -> Tuple[bool, Union[dict, None, Exception]]:
         try:
             self._validate_table_name(self.table_name)
-            with self.db_handler as conn:
+            with self.db_handler.read() as conn:
                 cursor = conn.cursor()
                 row = cursor.execute(query, params).fetchone()
             return (True, dict(row)) if row else (True, None)
         except sqlite3.Error as e:
             return (False, e)
     
+    # --- Function for streaming a query's rows in fetchmany batches --- #
+    def _iter_query(
+            self,
+            query: str,
+            params: tuple = (),
+            batch_size: int = FETCH_BATCH_SIZE
+            ) -> Iterator[Dict]:
+        '''
+        Yields rows one at a time while fetching batch_size rows per round trip, so memory
+        stays flat however large the result is. A reader connection is held until the
+        generator is exhausted or closed; consume it from a single thread.
+        Unlike the other helpers, errors are raised (sqlite3.Error) while iterating.
+        '''
+        self._validate_table_name(self.table_name)
+        with self.db_handler.read() as conn:
+            cursor = conn.cursor()
+            cursor.arraysize = batch_size
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+
+    # --- Function for streaming a query's rows as plain tuples, one fetchmany batch at a time --- #
+    def _iter_query_batches(
+            self,
+            query: str,
+            params: tuple = (),
+            batch_size: int = FETCH_BATCH_SIZE
+            ) -> Iterator[Tuple[Tuple[str, ...], List[tuple]]]:
+        '''
+        Yields (columns, rows) per batch of up to batch_size plain tuples, for consumers that
+        encode rows in bulk (the exports). The first batch is yielded even when empty, so
+        the columns are always known. Same contract as _iter_query: a reader is held until
+        the generator is exhausted or closed, and errors are raised while iterating.
+        '''
+        self._validate_table_name(self.table_name)
+        with self.db_handler.read() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.arraysize = batch_size
+            cursor.execute(query, params)
+            columns = tuple(column[0] for column in cursor.description)
+            rows = cursor.fetchmany()
+            yield (columns, rows)
+            while rows:
+                rows = cursor.fetchmany()
+                if rows:
+                    yield (columns, rows)
+
+    # --- Function for turning page filters into a WHERE clause --- #
+    def _filter_where(self, filters: Optional[Dict[str, object]]) -> Tuple[str, tuple]:
+        '''(' WHERE ...' or '', params) for filters, as _filter_conditions; for queries with no other condition.'''
+        conditions, params, _ = self._filter_conditions(filters)
+        return (conditions.replace(' AND ', ' WHERE ', 1), params)
+
+    # --- Function for running one page of a keyset-paginated query --- #
+    def _run_page(
+            self,
+            query: str,
+            params: tuple,
+            key_fields: Tuple[str, ...],
+            limit: int
+            ) -> Tuple[bool, Union[Dict, Exception]]:
+        '''
+        Runs a query that filters on '(key columns) > (?, ...)', orders by the same key and
+        ends with 'LIMIT ?' (params must not include the limit). Returns
+        {'rows': [...], 'next_after': key of the last row, or None on the last page}.
+        '''
+        if limit <= 0:
+            return (False, ValueError('Page size must be a positive integer.'))
+        success, rows = self._run_query(query, params + (limit + 1,))
+        if not success:
+            return (False, rows)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_after = tuple(rows[-1][field] for field in key_fields) if has_more else None
+        return (True, {'rows': rows, 'next_after': next_after})
+
+    # --- Function for turning page filters into SQL conditions --- #
+    def _filter_conditions(self, filters: Optional[Dict[str, object]]) -> Tuple[str, tuple, tuple]:
+        '''
+        Returns (' AND ...' conditions, their params, a hashable cache key) for filters,
+        a {name: value} dict whose names must be keys of self.page_filters. None values
+        are ignored. Raises ValueError for an unknown filter.
+        '''
+        items = tuple(sorted((name, value) for name, value in (filters or {}).items() if value is not None))
+        for name, _ in items:
+            if name not in self.page_filters:
+                raise ValueError(f'Unknown filter {name}')
+        conditions = ''.join(f' AND {self.page_filters[name]}' for name, _ in items)
+        return (conditions, tuple(value for _, value in items), items)
+
+    # --- Function for running one page of a ranked full-text search --- #
+    def _run_ranked_page(
+            self,
+            query: str,
+            params: tuple,
+            after: Optional[Tuple[int]],
+            limit: int
+            ) -> Tuple[bool, Union[Dict, Exception]]:
+        '''
+        Ranked results have no key to seek from, so they page by offset: the query ends
+        with 'ORDER BY rank LIMIT ? OFFSET ?' (params must not include either). Returns
+        the same {'rows': [...], 'next_after': ...} as _run_page, with next_after the
+        (offset,) of the next page.
+        '''
+        if limit <= 0:
+            return (False, ValueError('Page size must be a positive integer.'))
+        offset = after[0] if after else 0
+        success, rows = self._run_query(query, params + (limit + 1, offset))
+        if not success:
+            return (False, rows)
+        has_more = len(rows) > limit
+        return (True, {'rows': rows[:limit], 'next_after': (offset + limit,) if has_more else None})
+
+    # --- Function for serving a read through the shared query cache --- #
+    def _run_cached(
+            self,
+            key: tuple,
+            tables: Tuple[str, ...],
+            loader: Callable[[], Tuple[bool, object]]
+            ) -> Tuple[bool, object]:
+        '''
+        Returns the cached result of loader, keyed by this table and key. The entry is
+        dropped when a write to any of tables ends, or when the change tracker sees that
+        another process wrote one of them. Inside a write block the cache is bypassed,
+        since the thread may be reading its own uncommitted rows.
+        '''
+        return self.db_handler.cached((self.table_name,) + key, tables, loader)
+
     # --- Function for running a query retunrning a single record, identified by the id --- #
     def _get_record_by_id(self, id_field:str, id_value:int) -> Tuple[bool, Union[dict, None, Exception]]:
         try:
             self._validate_table_name(self.table_name)
             self._validate_field_names([id_field])
             query = f'SELECT * FROM {self.table_name} WHERE {id_field} = ?'
-            return self._run_query_one(query, (id_value,))
+            return self._run_cached(
+                ('by_id', id_field, id_value),
+                (self.table_name,),
+                lambda: self._run_query_one(query, (id_value,))
+            )
         except (ValueError, sqlite3.Error) as e:
             return (False, e)
 
+    # --- Audit hook: hands the written rows to the db_handler's audit_hook, if any --- #
+    def _audit(self, action: str, changes: List[Tuple[int, dict]]) -> None:
+        audit_hook = self.db_handler.audit_hook
+        if audit_hook is not None and changes:
+            audit_hook(self.table_name, action, changes)
+
+    @_instrumented(lambda row_id: 1)
     def _run_modify(
             self,
             query: str,
-            params: tuple = ()
+            params: tuple = (),
+            audit: Optional[Tuple[str, Optional[List[int]], dict]] = None
             ) -> Tuple[bool, Union[int, Exception]]:
+        '''
+        Runs one INSERT or UPDATE. audit is (action, affected record ids, written values);
+        ids None means the row just inserted. The statement and its audit rows are written
+        under one savepoint, so an audit failure also undoes the change.
+        '''
         try:
             self._validate_table_name(self.table_name)
             with self.db_handler as conn:
+                if audit is None or self.db_handler.audit_hook is None:
+                    cursor = conn.cursor()
+                    cursor.execute(query, params)
+                    row_id = cursor.lastrowid
+                    self.db_handler.mark_written(self.table_name)
+                    return (True, row_id)
+                if not conn.in_transaction:
+                    conn.execute('BEGIN IMMEDIATE')
                 cursor = conn.cursor()
-                cursor.execute(query, params)
-                row_id = cursor.lastrowid
+                cursor.execute('SAVEPOINT modify')
+                try:
+                    cursor.execute(query, params)
+                    row_id = cursor.lastrowid
+                    self.db_handler.mark_written(self.table_name)
+                    action, record_ids, values = audit
+                    if record_ids is None:
+                        record_ids = [row_id]
+                    self._audit(action, [(record_id, values) for record_id in record_ids] if cursor.rowcount else [])
+                except BaseException:
+                    cursor.execute('ROLLBACK TO modify')
+                    cursor.execute('RELEASE modify')
+                    raise
+                cursor.execute('RELEASE modify')
             return (True, row_id)
         except sqlite3.Error as e:
             return (False, e)
+
+    @_instrumented(lambda rowcount: max(rowcount, 0))
+    def _run_modify_many(
+            self,
+            query: str,
+            rows: List[tuple]
+            ) -> Tuple[bool, Union[int, Exception]]:
+        '''Runs one statement for every parameter tuple with executemany. Not audited.'''
+        try:
+            self._validate_table_name(self.table_name)
+            with self.db_handler as conn:
+                cursor = conn.cursor()
+                cursor.executemany(query, rows)
+                self.db_handler.mark_written(self.table_name)
+            return (True, cursor.rowcount)
+        except sqlite3.Error as e:
+            return (False, e)
         
     def insert_new_record(
             self,
@@ -100,13 +381,8 @@ class BaseRepo:
             ) -> Tuple[bool, Union[int, Exception]]:
         try:
             self._validate_table_name(self.table_name)
-            field_names = list(data.keys())
-            self._validate_field_names(field_names)
-            columns = ', '.join(data.keys())
-            placeholders = ', '.join('?' for _ in data)
-            values = tuple(data.values())
-            query = f'INSERT INTO {self.table_name} ({columns}) VALUES ({placeholders})'
-            return self._run_modify(query, values)
+            query = self._statement('insert', tuple(data))
+            return self._run_modify(query, tuple(data.values()), ('insert', None, data))
         except (ValueError, sqlite3.Error) as e:
             return (False, e)
         
@@ -117,12 +393,264 @@ class BaseRepo:
                     ) -> Tuple[bool, Union[int, Exception]]:
         try:
             self._validate_table_name(self.table_name)
-            field_names = list(updates.keys())
-            field_names.append(id_field)
-            self._validate_field_names(field_names)
-            set_clause = ', '.join([f'{col}=?' for col in updates.keys()])
+            query = self._statement('update', tuple(updates), (id_field,))
             values = tuple(updates.values()) + (id_value,)
-            query = f'UPDATE {self.table_name} SET {set_clause} WHERE {id_field} = ?'
-            return self._run_modify(query, values)
+            if self.db_handler.audit_hook is None:
+                return self._run_modify(query, values)
+            with self.db_handler as conn:
+                if id_field == self.id_field:
+                    record_ids = [id_value]
+                else:
+                    rows = conn.execute(f'SELECT {self.id_field} FROM {self.table_name} WHERE {id_field} = ?', (id_value,))
+                    record_ids = [row[0] for row in rows]
+                return self._run_modify(query, values, ('update', record_ids, updates))
+        except (ValueError, sqlite3.Error) as e:
+            return (False, e)
+
+    # --- Statement cache: the SQL of every write is built once per column tuple --- #
+    def _statement(self, kind: str, columns: Tuple[str, ...], key_fields: Tuple[str, ...] = ()) -> str:
+        '''
+        SQL for an 'insert', an 'update' of columns by key_fields, or an 'upsert' of
+        columns on conflict with key_fields. Column names are validated when the statement
+        is first built, then served from the repo's cache.
+        '''
+        cache_key = (kind, columns, key_fields)
+        statement = self._statements.get(cache_key)
+        if statement is not None:
+            return statement
+        if not columns:
+            raise ValueError('No columns to write.')
+        self._validate_field_names(columns + key_fields)
+        placeholders = ', '.join('?' for _ in columns)
+        if kind == 'insert':
+            statement = f'INSERT INTO {self.table_name} ({", ".join(columns)}) VALUES ({placeholders})'
+        elif kind == 'update':
+            set_clause = ', '.join(f'{column}=?' for column in columns)
+            statement = f'UPDATE {self.table_name} SET {set_clause} WHERE {" AND ".join(f"{key}=?" for key in key_fields)}'
+        elif kind == 'upsert':
+            # An upsert keeps the row's id, key and creation time
+            kept = set(key_fields) | {self.id_field, 'created_at'}
+            update_columns = [column for column in columns if column not in kept]
+            action = (
+                'DO UPDATE SET ' + ', '.join(f'{column}=excluded.{column}' for column in update_columns)
+                if update_columns else 'DO NOTHING'
+            )
+            statement = (
+                f'INSERT INTO {self.table_name} ({", ".join(columns)}) VALUES ({placeholders}) '
+                f'ON CONFLICT ({", ".join(key_fields)}) {action}'
+            )
+        else:
+            raise ValueError(f'Unknown statement kind {kind}')
+        self._statements[cache_key] = statement
+        return statement
+
+    # --- Batch writes: one executemany per call, inside one transaction --- #
+    @contextmanager
+    def _batch_transaction(self) -> Iterator[sqlite3.Cursor]:
+        '''Writer cursor under a savepoint: released on success, rolled back on any error.'''
+        with self.db_handler as conn:
+            if not conn.in_transaction:
+                conn.execute('BEGIN IMMEDIATE')
+            cursor = conn.cursor()
+            cursor.execute('SAVEPOINT batch')
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute('ROLLBACK TO batch')
+                cursor.execute('RELEASE batch')
+                raise
+            cursor.execute('RELEASE batch')
+            self.db_handler.mark_written(self.table_name)
+
+    @staticmethod
+    def _batch_rows(records: Iterable[dict]) -> Tuple[Tuple[str, ...], List[dict], List[tuple]]:
+        '''Returns (columns, records, value tuples); every record must have the same columns.'''
+        records = list(records)
+        if not records:
+            return ((), [], [])
+        columns = tuple(records[0])
+        rows = []
+        for record in records:
+            if record.keys() != records[0].keys():
+                raise ValueError('Every record of a batch must have the same columns.')
+            rows.append(tuple(record[column] for column in columns))
+        return (columns, records, rows)
+
+    def _ids_by_key(self, cursor: sqlite3.Cursor, key_fields: Tuple[str, ...], keys: List[tuple]) -> List[Optional[int]]:
+        '''Ids of the rows matching each key, in order; keys compare with the columns' collation.'''
+        ids = []
+        key_columns = ', '.join(key_fields)
+        join = ' AND '.join(f't.{field} = k.{field}' for field in key_fields)
+        row_placeholders = '(' + ', '.join('?' for _ in range(len(key_fields) + 1)) + ')'
+        for start in range(0, len(keys), KEY_LOOKUP_CHUNK):
+            chunk = keys[start:start + KEY_LOOKUP_CHUNK]
+            query = (
+                f'WITH k(position, {key_columns}) AS (VALUES {", ".join(row_placeholders for _ in chunk)}) '
+                f'SELECT k.position, t.{self.id_field} FROM k JOIN {self.table_name} t ON {join}'
+            )
+            params = [value for position, key in enumerate(chunk) for value in (position, *key)]
+            found = {row[0]: row[1] for row in cursor.execute(query, params)}
+            ids.extend(found.get(position) for position in range(len(chunk)))
+        return ids
+
+    @_instrumented(len)
+    def insert_many(self, records: Iterable[dict]) -> Tuple[bool, Union[List[int], Exception]]:
+        '''
+        Inserts records sharing one column set with a single executemany, all or nothing.
+        Returns the new ids in input order.
+        '''
+        try:
+            self._validate_table_name(self.table_name)
+            columns, records, rows = self._batch_rows(records)
+            if not rows:
+                return (True, [])
+            query = self._statement('insert', columns)
+            with self._batch_transaction() as cursor:
+                cursor.executemany(query, rows)
+                if self.id_field in columns:
+                    ids = [record[self.id_field] for record in records]
+                else:
+                    # Under the writer lock the auto-assigned ids of one executemany are contiguous
+                    last_id = cursor.execute('SELECT last_insert_rowid()').fetchone()[0]
+                    ids = list(range(last_id - len(rows) + 1, last_id + 1))
+                self._audit('insert', list(zip(ids, records)))
+            return (True, ids)
+        except (ValueError, sqlite3.Error) as e:
+            return (False, e)
+
+    @_instrumented(len)
+    def update_many(self, records: Iterable[dict]) -> Tuple[bool, Union[List[int], Exception]]:
+        '''
+        Updates rows by primary key: every record holds the id plus the same set of
+        columns to change. One executemany, all or nothing. Returns the ids that exist.
+        '''
+        try:
+            self._validate_table_name(self.table_name)
+            columns, records, _ = self._batch_rows(records)
+            if not records:
+                return (True, [])
+            if self.id_field not in columns:
+                raise ValueError(f'Every record needs its {self.id_field}.')
+            set_columns = tuple(column for column in columns if column != self.id_field)
+            query = self._statement('update', set_columns, (self.id_field,))
+            rows = [tuple(record[column] for column in set_columns) + (record[self.id_field],) for record in records]
+            with self._batch_transaction() as cursor:
+                cursor.executemany(query, rows)
+                ids = [record[self.id_field] for record in records]
+                if cursor.rowcount != len(ids):
+                    # Some ids matched no row: keep the ones that exist
+                    existing = set(self._ids_by_key(cursor, (self.id_field,), [(id_value,) for id_value in ids]))
+                    ids = [id_value for id_value in ids if id_value in existing]
+                if self.db_handler.audit_hook is not None:
+                    by_id = {record[self.id_field]: record for record in records}
+                    self._audit('update', [
+                        (id_value, {column: by_id[id_value][column] for column in set_columns}) for id_value in ids
+                    ])
+            return (True, ids)
+        except (ValueError, sqlite3.Error) as e:
+            return (False, e)
+
+    @_instrumented(len)
+    def upsert_many(
+            self,
+            records: Iterable[dict],
+            conflict_fields: Optional[Tuple[str, ...]] = None
+            ) -> Tuple[bool, Union[List[int], Exception]]:
+        '''
+        INSERT ... ON CONFLICT DO UPDATE for records sharing one column set, keyed on
+        conflict_fields (default: the repo's natural key). Existing rows get every written
+        column except the key and created_at. Returns the ids in input order.
+        '''
+        try:
+            self._validate_table_name(self.table_name)
+            conflict_fields = tuple(conflict_fields or self.natural_key)
+            if not conflict_fields:
+                raise ValueError(f'{self.table_name} has no natural key to upsert on.')
+            columns, records, rows = self._batch_rows(records)
+            if not rows:
+                return (True, [])
+            if not set(conflict_fields) <= set(columns):
+                raise ValueError(f'Every record needs {", ".join(conflict_fields)}.')
+            query = self._statement('upsert', columns, conflict_fields)
+            with self._batch_transaction() as cursor:
+                last_id_before = cursor.execute(f'SELECT MAX({self.id_field}) FROM {self.table_name}').fetchone()[0] or 0
+                cursor.executemany(query, rows)
+                ids = self._ids_by_key(cursor, conflict_fields, [tuple(record[field] for field in conflict_fields) for record in records])
+                if self.db_handler.audit_hook is not None:
+                    # New rows got ids past the previous maximum
+                    self._audit('insert', [(id_value, record) for id_value, record in zip(ids, records) if id_value > last_id_before])
+                    self._audit('update', [(id_value, record) for id_value, record in zip(ids, records) if id_value <= last_id_before])
+            return (True, ids)
         except (ValueError, sqlite3.Error) as e:
-            return (False, e)
\ No newline at end of file
+            return (False, e)
+
+    @_instrumented(lambda result: result[0])
+    def import_records(
+            self,
+            chunks: Iterable[List[Tuple[int, dict]]],
+            stop_on_error: bool = False,
+            on_chunk: Optional[Callable[[int, int], None]] = None
+            ) -> Tuple[bool, Union[Tuple[int, List[Tuple[int, Exception]]], Exception]]:
+        '''
+        Bulk inserts chunks of (row_number, record) pairs inside a single transaction.
+        Every chunk is written with executemany under its own savepoint; a failing chunk
+        is rolled back to its savepoint and replayed row by row to pinpoint the bad rows.
+        Returns the number of inserted rows and the (row_number, error) pairs that failed.
+        With stop_on_error, the first failing row rolls back the whole import.
+        on_chunk(inserted, failed) is called after each chunk with that chunk's counts.
+        '''
+        inserted = 0
+        failures = []
+        query = None
+        columns = None
+        try:
+            self._validate_table_name(self.table_name)
+            with self.db_handler as conn:
+                if not conn.in_transaction:
+                    conn.execute('BEGIN IMMEDIATE')
+                cursor = conn.cursor()
+                self.db_handler.mark_written(self.table_name)
+                for chunk in chunks:
+                    if not chunk:
+                        if on_chunk is not None:
+                            on_chunk(0, 0)
+                        continue
+                    if query is None:
+                        columns = tuple(chunk[0][1])
+                        query = self._statement('insert', columns)
+                    rows = [tuple(record.get(column) for column in columns) for _, record in chunk]
+                    chunk_failures = []
+                    written = []
+                    cursor.execute('SAVEPOINT import_chunk')
+                    try:
+                        cursor.executemany(query, rows)
+                        if self.db_handler.audit_hook is not None:
+                            # Under the writer lock the auto-assigned ids of one executemany are contiguous
+                            last_id = cursor.execute('SELECT last_insert_rowid()').fetchone()[0]
+                            first_id = last_id - len(rows) + 1
+                            written = [
+                                (record[self.id_field] if self.id_field in record else first_id + i, record)
+                                for i, (_, record) in enumerate(chunk)
+                            ]
+                    except sqlite3.Error:
+                        cursor.execute('ROLLBACK TO import_chunk')
+                        for (row_number, record), values in zip(chunk, rows):
+                            cursor.execute('SAVEPOINT import_row')
+                            try:
+                                cursor.execute(query, values)
+                                written.append((cursor.lastrowid, record))
+                            except sqlite3.Error as e:
+                                cursor.execute('ROLLBACK TO import_row')
+                                chunk_failures.append((row_number, e))
+                            cursor.execute('RELEASE import_row')
+                    self._audit('insert', written)
+                    cursor.execute('RELEASE import_chunk')
+                    if chunk_failures and stop_on_error:
+                        raise RecordImportError(*chunk_failures[0])
+                    inserted += len(rows) - len(chunk_failures)
+                    failures.extend(chunk_failures)
+                    if on_chunk is not None:
+                        on_chunk(len(rows) - len(chunk_failures), len(chunk_failures))
+            return (True, (inserted, failures))
+        except (ValueError, sqlite3.Error) as e:
+            return (False, e)
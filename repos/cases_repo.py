@@ -1,6 +1,8 @@
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from repos.base_repo import BaseRepo
+from config.settings import EXPORT_BATCH_SIZE, PAGE_SIZE
+from utils.search import SNIPPET_ELLIPSIS, SNIPPET_END, SNIPPET_START, SNIPPET_TOKENS
 
 from database_handler.database_handler import DatabaseHandler
 
@@ -8,6 +10,8 @@ class CasesRepo(BaseRepo):
     
     def __init__(self, db_handler: DatabaseHandler):
         super().__init__('cases', db_handler)
+        self.id_field = 'case_id'
+        self.natural_key = ('client_id', 'client_ref')
 
         self.allowed_columns = [
             'case_id',
@@ -28,17 +32,115 @@ class CasesRepo(BaseRepo):
             'updated_at',
             'closed_at'
         ]
+        self.page_filters = {
+            'client_id': 'client_id = ?',
+            'status': 'status = ?',
+            'jurisdiction': 'jurisdiction = ?',
+            'ipr_type': 'ipr_type = ?',
+            'procedure_type': 'procedure_type = ?',
+        }
 
-    def get_all_cases(self) -> Tuple[bool, Union[List[Dict], Exception]]:
+    def get_all_cases(self, shape: str = 'dict') -> Tuple[bool, Union[List[Dict], object, Exception]]:
         return self._run_query(
-            f'SELECT * FROM {self.table_name}'
+            f'SELECT * FROM {self.table_name}',
+            shape=shape
         )
 
+    def iter_all_cases(self) -> Iterator[Dict]:
+        '''Streams every case in case_id order.'''
+        return self._iter_query(f'SELECT * FROM {self.table_name} ORDER BY case_id')
+
+    def iter_all_cases_batches(
+            self,
+            filters: Optional[Dict[str, object]] = None,
+            batch_size: int = EXPORT_BATCH_SIZE
+            ) -> Iterator[Tuple[Tuple[str, ...], List[tuple]]]:
+        '''Streams every case (open or closed) matching page_filters in case_id order, as (columns, rows) batches.'''
+        where, params = self._filter_where(filters)
+        return self._iter_query_batches(f'SELECT * FROM {self.table_name}{where} ORDER BY case_id', params, batch_size)
+
     def get_case_by_id(self, id_value:int, id_field: str = 'case_id') -> Tuple[bool, Union[dict, None, Exception]]:
         return self._get_record_by_id(id_field, id_value)
     
+    def get_all_open_filed_cases(self, shape: str = 'dict') -> Tuple[bool, Union[List[Dict], object, Exception]]:
+        '''The columns the statutory deadline rules need, for every open case with a filing date.'''
+        return self._run_query(
+            f'SELECT case_id, filing_date, jurisdiction, ipr_type, procedure_type FROM {self.table_name} '
+            'WHERE is_open=1 AND filing_date IS NOT NULL ORDER BY case_id',
+            shape=shape
+        )
+
     def get_open_cases(self) -> Tuple[bool, Union[list, Exception]]:
-        return self._run_query(f'SELECT * FROM {self.table_name} WHERE is_open=1')
+        return self._run_cached(
+            ('open',),
+            (self.table_name,),
+            lambda: self._run_query(f'SELECT * FROM {self.table_name} WHERE is_open=1')
+        )
+
+    def get_open_cases_page(
+            self,
+            after: Optional[Tuple[int]] = None,
+            limit: int = PAGE_SIZE,
+            filters: Optional[Dict[str, object]] = None
+            ) -> Tuple[bool, Union[Dict, Exception]]:
+        '''One page of open cases in case_id order, starting after the given key, optionally narrowed by page_filters.'''
+        try:
+            conditions, params, filter_key = self._filter_conditions(filters)
+        except ValueError as e:
+            return (False, e)
+        after = tuple(after) if after else (0,)
+        query = f'SELECT * FROM {self.table_name} WHERE is_open=1{conditions} AND case_id > ? ORDER BY case_id LIMIT ?'
+        return self._run_cached(
+            ('open_page', after, limit, filter_key),
+            (self.table_name,),
+            lambda: self._run_page(query, params + after, ('case_id',), limit)
+        )
+
+    def get_open_cases_with_clients(self) -> Tuple[bool, Union[List[Dict], Exception]]:
+        '''Returns open cases joined with their client, ordered for use in selection lists.'''
+        # CROSS JOIN pins clients as the outer loop so both index orders satisfy the ORDER BY
+        query = f'''
+            SELECT
+                c.case_id, c.client_ref, c.title, c.jurisdiction, c.client_id,
+                cl.client_code, cl.name AS client_name
+            FROM clients cl
+            CROSS JOIN {self.table_name} c ON c.client_id = cl.client_id
+            WHERE c.is_open=1
+            ORDER BY cl.name, cl.client_id, c.client_ref
+            '''
+        return self._run_cached(
+            ('open_with_clients',),
+            (self.table_name, 'clients'),
+            lambda: self._run_query(query)
+        )
+
+    def get_search_page(
+            self,
+            match: str,
+            after: Optional[Tuple[int]] = None,
+            limit: int = PAGE_SIZE
+            ) -> Tuple[bool, Union[Dict, Exception]]:
+        '''
+        One page of the cases matching an FTS5 expression (see utils.search), best match
+        first, each with its client and a snippet of the best matching text.
+        '''
+        query = f'''
+            SELECT
+                c.case_id, c.client_ref, c.title, c.filing_number, c.jurisdiction, c.status, c.is_open, c.client_id,
+                cl.client_code, cl.name AS client_name,
+                snippet(cases_fts, -1, ?, ?, ?, ?) AS snippet
+            FROM cases_fts
+            JOIN {self.table_name} c ON c.case_id = cases_fts.rowid
+            JOIN clients cl ON cl.client_id = c.client_id
+            WHERE cases_fts MATCH ?
+            ORDER BY rank LIMIT ? OFFSET ?
+        '''
+        params = (SNIPPET_START, SNIPPET_END, SNIPPET_ELLIPSIS, SNIPPET_TOKENS, match)
+        return self._run_cached(
+            ('search_page', match, after, limit),
+            (self.table_name, 'clients'),
+            lambda: self._run_ranked_page(query, params, after, limit)
+        )
 
     def get_cases_by_client(self, client_id: int) -> Tuple[bool, Union[List[Dict], Exception]]:
         return self._run_query(
@@ -47,9 +149,10 @@ class CasesRepo(BaseRepo):
         )
     
     def get_open_cases_by_client(self, client_id: int) -> Tuple[bool, Union[List[Dict], Exception]]:
-        return self._run_query(
-            f'SELECT * FROM {self.table_name} WHERE client_id=? AND is_open=1',
-            (client_id,)
+        return self._run_cached(
+            ('open_by_client', client_id),
+            (self.table_name,),
+            lambda: self._run_query(f'SELECT * FROM {self.table_name} WHERE client_id=? AND is_open=1', (client_id,))
         )
     
     def get_cases_by_jurisdiction(self, jurisdiction: str) -> Tuple[bool, Union[List[Dict], Exception]]:
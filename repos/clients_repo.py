@@ -1,5 +1,7 @@
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from repos.base_repo import BaseRepo
+from config.settings import EXPORT_BATCH_SIZE, PAGE_SIZE
+from utils.search import SNIPPET_ELLIPSIS, SNIPPET_END, SNIPPET_START, SNIPPET_TOKENS
 from datetime import datetime
 
 from database_handler.database_handler import DatabaseHandler
@@ -7,6 +9,8 @@ from database_handler.database_handler import DatabaseHandler
 class ClientsRepo(BaseRepo):
     def __init__(self, db_handler: DatabaseHandler):
         super().__init__('clients', db_handler)
+        self.id_field = 'client_id'
+        self.natural_key = ('client_code',)
         self.allowed_columns = [
             'client_id',
             'client_code',
@@ -25,20 +29,110 @@ class ClientsRepo(BaseRepo):
             'updated_at',
             'deactivated_at'
         ]
+        self.page_filters = {
+            'country': 'country = ?',
+            'city': 'city = ?',
+        }
 
     # --- Querying functions --- #
-    def get_all_clients(self) -> Tuple[bool, Union[List[Dict], Exception]]:
+    def get_all_clients(self, shape: str = 'dict') -> Tuple[bool, Union[List[Dict], object, Exception]]:
         return self._run_query(
-            f'SELECT * FROM {self.table_name} ORDER BY name'
+            f'SELECT * FROM {self.table_name} ORDER BY name',
+            shape=shape
         )
 
     def get_client_by_id(self, id_value:int, id_field:str = 'client_id') -> Tuple[bool, Union[dict, None, Exception]]:
         return self._get_record_by_id(id_field, id_value)
 
-    def get_active_clients(self):
-        return self._run_query(
-            f'SELECT * FROM {self.table_name} WHERE is_active=1 ORDER BY NAME'
+    def get_active_clients(self) -> Tuple[bool, Union[List[Dict], Exception]]:
+        return self._run_cached(
+            ('active',),
+            (self.table_name,),
+            lambda: self._run_query(f'SELECT * FROM {self.table_name} WHERE is_active=1 ORDER BY NAME')
+        )
+
+    def get_active_clients_page(
+            self,
+            after: Optional[Tuple[str, int]] = None,
+            limit: int = PAGE_SIZE,
+            filters: Optional[Dict[str, object]] = None
+            ) -> Tuple[bool, Union[Dict, Exception]]:
+        '''
+        One page of active clients in (name, client_id) order, starting after the given key,
+        optionally narrowed by page_filters.
+        '''
+        try:
+            conditions, params, filter_key = self._filter_conditions(filters)
+        except ValueError as e:
+            return (False, e)
+        after = tuple(after) if after else ('', 0)
+        query = (
+            f'SELECT * FROM {self.table_name} WHERE is_active=1{conditions} AND (name, client_id) > (?, ?) '
+            'ORDER BY name, client_id LIMIT ?'
+        )
+        return self._run_cached(
+            ('active_page', after, limit, filter_key),
+            (self.table_name,),
+            lambda: self._run_page(query, params + after, ('name', 'client_id'), limit)
+        )
+
+    def get_search_page(
+            self,
+            match: str,
+            after: Optional[Tuple[int]] = None,
+            limit: int = PAGE_SIZE
+            ) -> Tuple[bool, Union[Dict, Exception]]:
+        '''One page of the clients matching an FTS5 expression (see utils.search), best match first, with snippets.'''
+        query = f'''
+            SELECT
+                c.client_id, c.client_code, c.name, c.city, c.country, c.is_active,
+                snippet(clients_fts, -1, ?, ?, ?, ?) AS snippet
+            FROM clients_fts
+            JOIN {self.table_name} c ON c.client_id = clients_fts.rowid
+            WHERE clients_fts MATCH ?
+            ORDER BY rank LIMIT ? OFFSET ?
+        '''
+        params = (SNIPPET_START, SNIPPET_END, SNIPPET_ELLIPSIS, SNIPPET_TOKENS, match)
+        return self._run_cached(
+            ('search_page', match, after, limit),
+            (self.table_name,),
+            lambda: self._run_ranked_page(query, params, after, limit)
+        )
+
+    def iter_all_clients(self) -> Iterator[Dict]:
+        '''Streams every client in name order.'''
+        return self._iter_query(f'SELECT * FROM {self.table_name} ORDER BY name')
+
+    def iter_all_clients_batches(
+            self,
+            filters: Optional[Dict[str, object]] = None,
+            batch_size: int = EXPORT_BATCH_SIZE
+            ) -> Iterator[Tuple[Tuple[str, ...], List[tuple]]]:
+        '''Streams every client (active or not) matching page_filters in client_id order, as (columns, rows) batches.'''
+        where, params = self._filter_where(filters)
+        return self._iter_query_batches(f'SELECT * FROM {self.table_name}{where} ORDER BY client_id', params, batch_size)
+
+    def get_existing_client_codes(self, client_codes: List[str]) -> Tuple[bool, Union[set, Exception]]:
+        '''Returns which of the given client codes are already taken, in one query.'''
+        if not client_codes:
+            return (True, set())
+        placeholders = ', '.join('?' for _ in client_codes)
+        success, rows = self._run_query(
+            f'SELECT client_code FROM {self.table_name} WHERE client_code IN ({placeholders})',
+            tuple(client_codes)
+        )
+        return (True, {row['client_code'] for row in rows}) if success else (False, rows)
+
+    def get_existing_client_ids(self, client_ids: List[int]) -> Tuple[bool, Union[set, Exception]]:
+        '''Returns which of the given client ids exist, in one query.'''
+        if not client_ids:
+            return (True, set())
+        placeholders = ', '.join('?' for _ in client_ids)
+        success, rows = self._run_query(
+            f'SELECT client_id FROM {self.table_name} WHERE client_id IN ({placeholders})',
+            tuple(client_ids)
         )
+        return (True, {row['client_id'] for row in rows}) if success else (False, rows)
 
     # --- Modifying functions --- #
     def insert_client(self, client_data: dict) -> Tuple[bool, Union[int, Exception]]:
@@ -0,0 +1,71 @@
+from typing import Optional, Tuple, Union, Dict, List
+from .base_repo import BaseRepo
+
+from database_handler.database_handler import DatabaseHandler
+
+class DeadlineLoadRepo(BaseRepo):
+    '''
+    Read side of deadline_load, which triggers on deadlines and cases keep up to date
+    (migration 0007). The table is never written through this repo. Its cached results
+    are dropped by writes to deadlines and cases, the tables whose triggers change it.
+    '''
+    def __init__(self, db_handler: DatabaseHandler):
+        super().__init__('deadline_load', db_handler)
+        self.allowed_columns = [
+            'due_date',
+            'deadline_type',
+            'client_id',
+            'open_count',
+            'overdue_count'
+        ]
+
+    def get_load_by_day(self, start_date: str, end_date: str) -> Tuple[bool, Union[List[Dict], Exception]]:
+        '''Open and overdue counts per due date and deadline type from start_date to end_date, in due date order.'''
+        query, params = self._window(
+            f'SELECT due_date, deadline_type, SUM(open_count) AS open_count, SUM(overdue_count) AS overdue_count '
+            f'FROM {self.table_name}',
+            'due_date', start_date, end_date
+        )
+        query += ' GROUP BY due_date, deadline_type ORDER BY due_date, deadline_type'
+        return self._run_cached(
+            ('by_day', start_date, end_date),
+            ('deadlines', 'cases'),
+            lambda: self._run_query(query, params)
+        )
+
+    def get_load_by_client(
+            self,
+            start_date: Optional[str] = None,
+            end_date: Optional[str] = None
+            ) -> Tuple[bool, Union[List[Dict], Exception]]:
+        '''
+        Open and overdue counts per client, in client_id order. The rows are grouped in
+        the order of the client index rather than sorted after a due_date range search:
+        the window covers most of the table anyway, since deadlines are only generated a
+        limited horizon ahead.
+        '''
+        query, params = self._window(
+            f'SELECT l.client_id, cl.client_code, cl.name AS client_name, '
+            f'SUM(l.open_count) AS open_count, SUM(l.overdue_count) AS overdue_count '
+            f'FROM {self.table_name} l INDEXED BY idx_deadline_load_client JOIN clients cl ON cl.client_id = l.client_id',
+            'l.due_date', start_date, end_date
+        )
+        query += ' GROUP BY l.client_id ORDER BY l.client_id'
+        return self._run_cached(
+            ('by_client', start_date, end_date),
+            ('deadlines', 'cases', 'clients'),
+            lambda: self._run_query(query, params)
+        )
+
+    @staticmethod
+    def _window(query: str, column: str, start_date: Optional[str], end_date: Optional[str]) -> Tuple[str, tuple]:
+        conditions, params = [], []
+        if start_date is not None:
+            conditions.append(f'{column} >= ?')
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append(f'{column} <= ?')
+            params.append(end_date)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        return (query, tuple(params))
@@ -0,0 +1,18 @@
+from typing import Tuple, Union
+from .base_repo import BaseRepo
+
+from database_handler.database_handler import DatabaseHandler
+
+class DeadlineSweepsRepo(BaseRepo):
+    def __init__(self, db_handler: DatabaseHandler):
+        super().__init__('deadline_sweeps', db_handler)
+        self.id_field = 'deadline_sweep_id'
+        self.allowed_columns = [
+            'deadline_sweep_id',
+            'swept_before',
+            'deadlines_marked',
+            'swept_at'
+        ]
+
+    def insert_sweep(self, sweep_data: dict) -> Tuple[bool, Union[int, Exception]]:
+        return self.insert_new_record(sweep_data)
@@ -1,12 +1,15 @@
+import sqlite3
 from datetime import datetime
-from typing import Optional, Tuple, Union, Dict, List
-from .base_repo import BaseRepo
+from typing import Iterator, Optional, Tuple, Union, Dict, List
+from .base_repo import BaseRepo, _instrumented
+from config.settings import EXPORT_BATCH_SIZE, PAGE_SIZE
 
 from database_handler.database_handler import DatabaseHandler
 
 class DeadlinesRepo(BaseRepo):
     def __init__(self, db_handler: DatabaseHandler):
         super().__init__('deadlines', db_handler)
+        self.id_field = 'deadline_id'
         self.allowed_columns = [
             'deadline_id',
             'case_id',
@@ -19,10 +22,74 @@ class DeadlinesRepo(BaseRepo):
             'updated_at',
             'completed_at'
         ]
+        self.page_filters = {
+            'case_id': 'd.case_id = ?',
+            'client_id': 'c.client_id = ?',
+            'deadline_type': 'd.deadline_type = ?',
+            'status': 'd.status = ?',
+            'due_from': 'd.due_date >= ?',
+            'due_to': 'd.due_date <= ?',
+        }
+
+    def get_all_deadlines(self, shape: str = 'dict') -> Tuple[bool, Union[List[Dict], object, Exception]]:
+        return self._run_query(
+            f'SELECT * FROM {self.table_name} ORDER BY due_date',
+            shape=shape
+        )
+
+    def iter_all_deadlines(self) -> Iterator[Dict]:
+        '''Streams every deadline in due date order.'''
+        return self._iter_query(f'SELECT * FROM {self.table_name} ORDER BY due_date')
+
+    def iter_all_deadlines_batches(
+            self,
+            filters: Optional[Dict[str, object]] = None,
+            batch_size: int = EXPORT_BATCH_SIZE
+            ) -> Iterator[Tuple[Tuple[str, ...], List[tuple]]]:
+        '''
+        Streams every deadline (open or done) matching page_filters in (due_date,
+        deadline_id) order, as (columns, rows) batches.
+        '''
+        where, params = self._filter_where(filters)
+        # Only the client filter needs the case of each deadline
+        join = ' JOIN cases c ON c.case_id = d.case_id' if 'c.client_id' in where else ''
+        return self._iter_query_batches(
+            f'SELECT d.* FROM {self.table_name} d{join}{where} ORDER BY d.due_date, d.deadline_id',
+            params,
+            batch_size
+        )
+
+    def iter_all_docket_batches(
+            self,
+            filters: Optional[Dict[str, object]] = None,
+            batch_size: int = EXPORT_BATCH_SIZE
+            ) -> Iterator[Tuple[Tuple[str, ...], List[tuple]]]:
+        '''
+        The docket: every deadline matching page_filters with its case and client, in
+        (due_date, deadline_id) order, as (columns, rows) batches.
+        '''
+        where, params = self._filter_where(filters)
+        return self._iter_query_batches(
+            f'''
+            SELECT
+                d.deadline_id, d.description, d.due_date, d.deadline_type, d.status, d.completed_at,
+                c.case_id, c.client_ref, c.title, c.case_type, c.procedure_type, c.ipr_type,
+                c.jurisdiction, c.filing_date, c.filing_number, c.status AS case_status, c.is_open,
+                cl.client_id, cl.client_code, cl.name AS client_name, cl.country
+            FROM {self.table_name} d
+            JOIN cases c ON c.case_id = d.case_id
+            JOIN clients cl ON cl.client_id = c.client_id{where}
+            ORDER BY d.due_date, d.deadline_id
+            ''',
+            params,
+            batch_size
+        )
 
-    def get_all_deadlines(self) -> Tuple[bool, Union[List[Dict], Exception]]:
+    def get_all_deadline_keys(self, shape: str = 'dict') -> Tuple[bool, Union[List[Dict], object, Exception]]:
+        '''(case_id, description) of every deadline, read from the covering index.'''
         return self._run_query(
-            f'SELECT * FROM {self.table_name} ORDER BY due_date'
+            f'SELECT case_id, description FROM {self.table_name}',
+            shape=shape
         )
 
     def get_deadline_by_id(self, id_value: id, id_field: str='deadline_id') -> Tuple[bool, Union[dict, None, Exception]]:
@@ -33,6 +100,102 @@ class DeadlinesRepo(BaseRepo):
             f'SELECT * FROM {self.table_name} WHERE completed=0 ORDER BY due_date'
         )
     
+    def get_open_deadlines_board(
+            self,
+            start_date: Optional[str] = None,
+            end_date: Optional[str] = None,
+            limit: Optional[int] = None,
+            shape: str = 'dict'
+            ) -> Tuple[bool, Union[List[Dict], object, Exception]]:
+        '''Returns open deadlines joined with their case and client in a single query.'''
+        query = self._board_query()
+        params = []
+        if start_date is not None:
+            query += ' AND d.due_date >= ?'
+            params.append(start_date)
+        if end_date is not None:
+            query += ' AND d.due_date <= ?'
+            params.append(end_date)
+        query += ' ORDER BY d.due_date, d.deadline_id'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        return self._run_cached(
+            ('open_board', start_date, end_date, limit, shape),
+            (self.table_name, 'cases', 'clients'),
+            lambda: self._run_query(query, tuple(params), shape)
+        )
+
+    def get_open_deadlines_board_page(
+            self,
+            after: Optional[Tuple[str, int]] = None,
+            limit: int = PAGE_SIZE,
+            filters: Optional[Dict[str, object]] = None
+            ) -> Tuple[bool, Union[Dict, Exception]]:
+        '''
+        One page of the open deadline board in (due_date, deadline_id) order, starting after
+        the given key, optionally narrowed by page_filters.
+        '''
+        try:
+            conditions, params, filter_key = self._filter_conditions(filters)
+        except ValueError as e:
+            return (False, e)
+        after = tuple(after) if after else ('', 0)
+        query = (
+            self._board_query() + conditions +
+            ' AND (d.due_date, d.deadline_id) > (?, ?) ORDER BY d.due_date, d.deadline_id LIMIT ?'
+        )
+        return self._run_cached(
+            ('open_board_page', after, limit, filter_key),
+            (self.table_name, 'cases', 'clients'),
+            lambda: self._run_page(query, params + after, ('due_date', 'deadline_id'), limit)
+        )
+
+    def _board_query(self) -> str:
+        return f'''
+            SELECT
+                d.deadline_id, d.case_id, d.description, d.due_date,
+                d.deadline_type, d.status,
+                c.client_ref, c.title, c.jurisdiction, c.client_id,
+                cl.client_code, cl.name AS client_name
+            FROM {self.table_name} d
+            JOIN cases c ON c.case_id = d.case_id
+            JOIN clients cl ON cl.client_id = c.client_id
+            WHERE d.completed=0
+        '''
+
+    def get_overdue_count(self) -> Tuple[bool, Union[int, Exception]]:
+        '''Number of overdue deadlines, counted on the Overdue partial index.'''
+        success, row = self._run_cached(
+            ('overdue_count',),
+            (self.table_name,),
+            lambda: self._run_query_one(f"SELECT COUNT(*) AS overdue FROM {self.table_name} WHERE status='Overdue'")
+        )
+        return (True, row['overdue']) if success else (False, row)
+
+    @_instrumented(len)
+    def mark_overdue(
+            self,
+            before_date: str,
+            updated_at: Optional[str] = None
+            ) -> Tuple[bool, Union[List[int], Exception]]:
+        '''
+        Moves every pending deadline due before before_date to 'Overdue' with one UPDATE
+        on the Pending partial index. Returns the ids of the deadlines it marked.
+        '''
+        if updated_at is None:
+            updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        query = f"UPDATE {self.table_name} SET status='Overdue', updated_at=? WHERE status='Pending' AND due_date < ?"
+        params = [updated_at, before_date]
+        try:
+            self._validate_table_name(self.table_name)
+            with self._batch_transaction() as cursor:
+                ids = [row[0] for row in cursor.execute(query + f' RETURNING {self.id_field}', params)]
+                self._audit('update', [(id_value, {'status': 'Overdue', 'updated_at': updated_at}) for id_value in ids])
+            return (True, ids)
+        except (ValueError, sqlite3.Error) as e:
+            return (False, e)
+
     def get_open_deadlines_by_case(self, case_id: int) -> Tuple[bool, Union[List[Dict], Exception]]:
         return self._run_query(
             f'SELECT * FROM {self.table_name} WHERE completed=0 and case_id=? ORDER BY due_date',
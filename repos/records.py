@@ -0,0 +1,159 @@
+# repos/records.py
+'''
+Compact result shapes for the repo layer.
+
+    'dict'      one dict per row (the default, what the GUI consumes)
+    'tuple'     (columns, rows): a single column header plus plain tuples
+    'record'    one __slots__ record per row (the table's class for SELECT *, else a derived one)
+    'columnar'  {column: [values...]}
+    'dataframe' pandas DataFrame, enum-like columns as categoricals (needs pandas)
+'''
+from dataclasses import dataclass, make_dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+RESULT_SHAPES = ('dict', 'tuple', 'record', 'columnar', 'dataframe')
+
+
+@dataclass(slots=True)
+class ClientRecord:
+    client_id: int
+    client_code: str
+    name: str
+    address: Optional[str]
+    zip_code: Optional[str]
+    city: Optional[str]
+    country: str
+    email: Optional[str]
+    phone: Optional[str]
+    vat_number: Optional[str]
+    payment_term: Optional[int]
+    notes: Optional[str]
+    is_active: int
+    created_at: str
+    updated_at: str
+    deactivated_at: Optional[str]
+
+
+@dataclass(slots=True)
+class CaseRecord:
+    case_id: int
+    case_type: Optional[str]
+    procedure_type: Optional[str]
+    ipr_type: Optional[str]
+    client_id: int
+    client_ref: str
+    title: Optional[str]
+    jurisdiction: Optional[str]
+    filing_date: Optional[str]
+    filing_number: Optional[str]
+    status: Optional[str]
+    notes: Optional[str]
+    is_open: int
+    created_at: str
+    updated_at: str
+    closed_at: Optional[str]
+
+
+@dataclass(slots=True)
+class DeadlineRecord:
+    deadline_id: int
+    case_id: int
+    description: str
+    due_date: str
+    deadline_type: str
+    status: str
+    completed: int
+    created_at: str
+    updated_at: str
+    completed_at: Optional[str]
+
+
+@dataclass(slots=True)
+class AuditRecordRecord:
+    audit_record_id: int
+    table_name: str
+    action: str
+    table_record_id: int
+    new_value: str
+    timestamp: str
+    hash: str
+    previous_hash: Optional[str]
+
+
+@dataclass(slots=True)
+class AuditLogRecord:
+    audit_log_id: int
+    log_level: str
+    action: str
+    description: str
+    timestamp: str
+    hash: str
+    previous_hash: Optional[str]
+
+
+RECORD_CLASSES: Dict[str, Type] = {
+    'clients': ClientRecord,
+    'cases': CaseRecord,
+    'deadlines': DeadlineRecord,
+    'audit_records': AuditRecordRecord,
+    'audit_logs': AuditLogRecord,
+}
+
+# Columns declared INTEGER in any table; every other column of the main tables is TEXT
+INTEGER_COLUMNS = frozenset(
+    name
+    for record_class in RECORD_CLASSES.values()
+    for name, annotation in record_class.__annotations__.items()
+    if annotation is int or annotation == Optional[int]
+)
+
+# Allowed values of the CHECK-constrained columns, per table, used as categorical dtypes
+CATEGORIES: Dict[str, Dict[str, List[str]]] = {
+    'cases': {
+        'case_type': ['KA', 'DV', 'SM'],
+        'procedure_type': ['prosecution', 'opposition', 'general counselling'],
+        'ipr_type': ['PAT', 'TM', 'DES', 'UM'],
+        'status': ['filed', 'pending', 'granted', 'refused', 'withdrawn', 'expired'],
+    },
+    'deadlines': {
+        'deadline_type': ['statutory', 'client', 'internal'],
+        'status': ['Pending', 'Done', 'Overdue'],
+    },
+}
+
+
+@lru_cache(maxsize=128)
+def record_class_for(table_name: str, columns: Tuple[str, ...]) -> Type:
+    '''The table's record class when the columns match it, else a slotted class for these columns.'''
+    record_class = RECORD_CLASSES.get(table_name)
+    if record_class is not None and record_class.__slots__ == columns:
+        return record_class
+    class_name = ''.join(part.capitalize() for part in table_name.split('_')) + 'Row'
+    return make_dataclass(class_name, columns, slots=True)
+
+
+def shape_rows(table_name: str, columns: Tuple[str, ...], rows: Sequence[tuple], shape: str):
+    '''Converts plain tuples fetched for table_name into the requested shape.'''
+    if shape == 'dict':
+        return [dict(zip(columns, row)) for row in rows]
+    if shape == 'tuple':
+        return (columns, list(rows))
+    if shape == 'record':
+        record_class = record_class_for(table_name, columns)
+        return [record_class(*row) for row in rows]
+    if shape == 'columnar':
+        return {column: list(values) for column, values in zip(columns, zip(*rows))} if rows else {column: [] for column in columns}
+    if shape == 'dataframe':
+        return to_dataframe(table_name, columns, rows)
+    raise ValueError(f'Unknown result shape {shape}')
+
+
+def to_dataframe(table_name: str, columns: Tuple[str, ...], rows: Sequence[tuple]):
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(rows, columns=list(columns))
+    for column, categories in CATEGORIES.get(table_name, {}).items():
+        if column in frame.columns:
+            frame[column] = frame[column].astype(pd.CategoricalDtype(categories))
+    return frame
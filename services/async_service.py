@@ -0,0 +1,181 @@
+# services/async_service.py
+'''
+Asyncio facade over the synchronous services, for async web and API processes.
+
+    async with create_async_services() as services:
+        success, page = await services.deadlines.get_open_deadlines_board_page()
+        success, case_id = await services.cases.insert_case({...})
+        async for client in services.clients.iter_all_clients():
+            ...
+
+Every public method of ClientsService, CasesService and DeadlineService is available
+under the same name and returns the same (success, result) tuple, awaited. Reads run on a
+thread pool sized like the database handler's reader pool, so concurrent reads overlap
+on separate connections while the event loop keeps serving. Writes run one at a time on
+a single writer thread, the order in which they were awaited, matching the handler's
+single writer connection; a burst of writes queues there instead of tying up the read
+threads on the writer lock.
+
+Streams run on threads of their own, one fewer than the handler's reader connections
+(one at least: with a single reader, nothing else can be read while a stream is open).
+A stream holds its thread and its reader until it is exhausted or closed, so the reads
+awaited while consuming one always find a free reader; streams past that cap wait for
+their turn without holding either. A coroutine must not open a stream while consuming
+another one: with every stream thread taken by such outer streams it would wait forever.
+'''
+import asyncio
+import functools
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Optional
+
+from config.settings import FETCH_BATCH_SIZE
+from services.cases_service import CasesService
+from services.clients_service import ClientsService
+from services.deadline_service import DeadlineService
+
+# Methods with these prefixes only read, and run on the reader pool; every other public
+# method may write and runs on the writer thread
+READ_METHOD_PREFIXES = ('get_', 'iter_', 'search', 'prepare_')
+# Streaming methods, exposed as async iterators
+STREAM_METHOD_PREFIX = 'iter_'
+# Batches a streaming method may run ahead of its consumer
+STREAM_QUEUE_BATCHES = 2
+
+
+class AsyncService:
+    '''Awaitable versions of the public methods of one service, resolved by name.'''
+    def __init__(
+            self,
+            service: object,
+            readers: ThreadPoolExecutor,
+            writer: ThreadPoolExecutor,
+            streams: ThreadPoolExecutor
+            ):
+        self._service = service
+        self._readers = readers
+        self._writer = writer
+        self._streams = streams
+
+    def __getattr__(self, name: str):
+        method = getattr(self._service, name) if not name.startswith('_') else None
+        if not callable(method):
+            raise AttributeError(f'{type(self._service).__name__} has no public method {name}')
+        if name.startswith(STREAM_METHOD_PREFIX):
+            wrapper = self._stream(method)
+        else:
+            wrapper = self._call(method, self._readers if name.startswith(READ_METHOD_PREFIXES) else self._writer)
+        # Later lookups find the wrapper as a plain attribute
+        setattr(self, name, wrapper)
+        return wrapper
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | {name for name in dir(self._service) if not name.startswith('_')})
+
+    @staticmethod
+    def _call(method: Callable, executor: ThreadPoolExecutor) -> Callable:
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, functools.partial(method, *args, **kwargs))
+        return call
+
+    def _stream(self, method: Callable) -> Callable[..., AsyncIterator]:
+        '''
+        A repo stream holds its reader connection in thread-local state, so it must be
+        consumed on one thread: a stream thread drains it in FETCH_BATCH_SIZE batches into
+        a bounded queue, which the async iterator empties. Closing the iterator early stops
+        the thread at its next batch and releases the connection, or drops the stream if
+        it is still waiting for a thread.
+        '''
+        streams = self._streams
+
+        @functools.wraps(method)
+        async def stream(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            batches: asyncio.Queue = asyncio.Queue(STREAM_QUEUE_BATCHES)
+            stop = threading.Event()
+
+            def put(item) -> None:
+                asyncio.run_coroutine_threadsafe(batches.put(item), loop).result()
+
+            def produce() -> None:
+                try:
+                    rows = method(*args, **kwargs)
+                    try:
+                        for batch in iter(lambda: list(itertools.islice(rows, FETCH_BATCH_SIZE)), []):
+                            if stop.is_set():
+                                return
+                            put(batch)
+                    finally:
+                        rows.close()
+                    put(None)
+                except Exception as e:
+                    if not stop.is_set():
+                        put(e)
+
+            producer = streams.submit(produce)
+            try:
+                while True:
+                    batch = await batches.get()
+                    if batch is None:
+                        break
+                    if isinstance(batch, Exception):
+                        raise batch
+                    for row in batch:
+                        yield row
+            finally:
+                stop.set()
+                if not producer.cancel():
+                    # Unblock a producer waiting on a full queue, then wait for it to let go of its reader
+                    done = asyncio.wrap_future(producer)
+                    while not done.done():
+                        while not batches.empty():
+                            batches.get_nowait()
+                        await asyncio.wait([done], timeout=0.01)
+        return stream
+
+
+class AsyncServices:
+    '''
+    The async facades of the clients, cases and deadline services, sharing one reader
+    pool, one writer thread and the stream threads. Close it (or use it as an async context manager) to shut
+    the threads down.
+    '''
+    def __init__(
+            self,
+            clients_service: ClientsService,
+            cases_service: CasesService,
+            deadline_service: DeadlineService,
+            max_readers: Optional[int] = None
+            ):
+        db_handler = clients_service.clients_repo.db_handler
+        self._readers = ThreadPoolExecutor(max_readers or db_handler.max_readers, thread_name_prefix='pcm-reader')
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix='pcm-writer')
+        # Leaves a reader connection for the calls made while the streams are consumed
+        self._streams = ThreadPoolExecutor(max(db_handler.max_readers - 1, 1), thread_name_prefix='pcm-stream')
+        executors = (self._readers, self._writer, self._streams)
+        self.clients = AsyncService(clients_service, *executors)
+        self.cases = AsyncService(cases_service, *executors)
+        self.deadlines = AsyncService(deadline_service, *executors)
+
+    def close(self) -> None:
+        '''Waits for the calls in flight, then stops the threads.'''
+        self._writer.shutdown(wait=True)
+        self._streams.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+
+    async def __aenter__(self) -> 'AsyncServices':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+
+def create_async_services(max_readers: Optional[int] = None) -> AsyncServices:
+    '''Async facade over the process-wide services of gui.create_services.'''
+    from gui.create_services import create_services
+
+    clients_service, cases_service, deadline_service, _, _ = create_services()
+    return AsyncServices(clients_service, cases_service, deadline_service, max_readers)
@@ -0,0 +1,411 @@
+import argparse
+import itertools
+import multiprocessing
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from database_handler.database_handler import DatabaseHandler
+from repos.audit_checkpoint_repo import AuditCheckpointsRepo
+from repos.audit_log_repo import AuditLogsRepo
+from repos.audit_record_repo import AuditRecordsRepo
+from utils.audit import CHAINS, ChainBreak, chain_rows, encode_value, verify_rows
+
+# The audit tables themselves are not audited
+UNAUDITED_TABLES = {'audit_records', 'audit_logs', 'audit_checkpoints', 'deadline_sweeps', 'deadline_load'}
+
+# Slow repo calls go to audit_logs at this level, their SQL cut to this many characters
+SLOW_QUERY_LOG_LEVEL = 'PERF'
+SLOW_QUERY_STATEMENT_CHARS = 500
+
+@dataclass
+class ChainVerification:
+    chain: str
+    start_after_id: int
+    rows_checked: int
+    last_id: Optional[int]
+    broken: Optional[ChainBreak] = None
+    checkpoint_id: Optional[int] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.broken is None
+
+@dataclass
+class RangeVerification:
+    '''What a pool worker found in one id range of a chain.'''
+    start_after_id: int
+    until_id: int
+    rows_checked: int = 0
+    first_id: Optional[int] = None
+    first_previous_hash: Optional[str] = None
+    last_hash: Optional[str] = None
+    breaks: List[ChainBreak] = field(default_factory=list)
+
+@dataclass
+class ParallelVerification:
+    chain: str
+    rows_checked: int = 0
+    last_id: Optional[int] = None
+    ranges: int = 0
+    workers: int = 0
+    seconds: float = 0.0
+    broken: Optional[ChainBreak] = None
+    breaks: List[ChainBreak] = field(default_factory=list)
+    stopped_early: bool = False
+    checkpoint_id: Optional[int] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.broken is None
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_checked / self.seconds if self.seconds else 0.0
+
+
+def _verify_range(db_path: str, chain: str, start_after_id: int, until_id: int, stop_at_first_failure: bool) -> RangeVerification:
+    '''
+    Process pool worker: re-hashes the rows of one id range on its own read-only
+    connection. The range's first previous_hash is taken as given; the parent checks
+    it against the end of the range before.
+    '''
+    db_handler = DatabaseHandler(db_path, profile='read-only-replica', max_readers=1)
+    try:
+        if chain == 'audit_records':
+            rows = AuditRecordsRepo(db_handler).iter_audit_records_after(start_after_id, until_id)
+        else:
+            rows = AuditLogsRepo(db_handler).iter_audit_logs_after(start_after_id, until_id)
+        result = RangeVerification(start_after_id, until_id)
+        first_row = next(rows, None)
+        if first_row is not None:
+            result.first_id = first_row[CHAINS[chain][0]]
+            result.first_previous_hash = first_row['previous_hash']
+            result.rows_checked, _, result.last_hash, result.breaks = verify_rows(
+                chain, first_row['previous_hash'], itertools.chain([first_row], rows),
+                1 if stop_at_first_failure else None
+            )
+        rows.close()
+        return result
+    finally:
+        db_handler.close()
+
+
+class AuditService():
+    '''
+    Keeps the audit_records hash chain. Once attached, every insert and update made
+    through the repos is chained into audit_records by record_changes, inside the
+    transaction of the change itself; a batch (an import chunk) is chained in one pass
+    and written with one executemany.
+
+    verify_chain re-hashes only the rows after the chain's last checkpoint and records a
+    new checkpoint when they verify. Rows before a checkpoint are trusted, apart from the
+    checkpoint row itself, whose hash is compared again; a full walk ignores checkpoints.
+    verify_chain_parallel re-hashes the whole chain in a process pool.
+
+    Attached, it also keeps the slow-query log: repo calls slower than settings.SLOW_QUERY_MS,
+    measured by the handler's query_stats, are chained into audit_logs at level 'PERF'.
+    '''
+    def __init__(
+            self,
+            audit_records_repo: AuditRecordsRepo,
+            audit_logs_repo: AuditLogsRepo,
+            checkpoints_repo: AuditCheckpointsRepo
+            ):
+        self.audit_records_repo = audit_records_repo
+        self.audit_logs_repo = audit_logs_repo
+        self.checkpoints_repo = checkpoints_repo
+
+    def attach(self) -> None:
+        '''Starts auditing every repo write made through this database handler, and logging its slow queries.'''
+        db_handler = self.audit_records_repo.db_handler
+        db_handler.audit_hook = self.record_changes
+        db_handler.query_stats.slow_query_hook = self.log_slow_queries
+
+    def detach(self) -> None:
+        db_handler = self.audit_records_repo.db_handler
+        db_handler.audit_hook = None
+        db_handler.query_stats.slow_query_hook = None
+
+    # --- Writing the chain --- #
+    def record_changes(self, table_name: str, action: str, changes: List[Tuple[int, dict]]) -> None:
+        '''
+        Audit hook: chains one audit record per (record id, written values) pair.
+        Called inside the writer's transaction; raises so that a failed audit undoes the change.
+        '''
+        if table_name in UNAUDITED_TABLES or not changes:
+            return
+        success, last_record = self.audit_records_repo.get_last_audit_record()
+        if not success:
+            raise last_record
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        audit_records = [
+            {
+                'table_name': table_name,
+                'action': action,
+                'table_record_id': record_id,
+                'new_value': encode_value(values),
+                'timestamp': timestamp,
+            }
+            for record_id, values in changes
+        ]
+        chain_rows('audit_records', last_record['hash'] if last_record else None, audit_records)
+        success, result = self.audit_records_repo.append_audit_records(audit_records)
+        if not success:
+            raise result
+
+    # --- Verifying the chain --- #
+    def verify_chain(
+            self,
+            chain: str = 'audit_records',
+            use_checkpoint: bool = True
+            ) -> Tuple[bool, Union[ChainVerification, Exception]]:
+        '''
+        Verifies chain ('audit_records' or 'audit_logs') from its last checkpoint, or from
+        the first row with use_checkpoint=False. A successful run that checked new rows
+        records a checkpoint at the last one.
+        '''
+        if chain not in CHAINS:
+            return (False, ValueError(f'Unknown audit chain {chain}'))
+        iter_rows = self._chain_reader(chain)
+        previous_hash, after_id = None, 0
+        try:
+            if use_checkpoint:
+                success, checkpoint = self.checkpoints_repo.get_last_checkpoint(chain)
+                if not success:
+                    return (False, checkpoint)
+                if checkpoint:
+                    after_id, previous_hash = checkpoint['last_id'], checkpoint['last_hash']
+                    anchor = next(iter_rows(after_id - 1, after_id), None)
+                    if anchor is None or anchor['hash'] != previous_hash:
+                        reason = 'checkpointed row is missing' if anchor is None else 'checkpointed row was changed'
+                        return (True, ChainVerification(chain, after_id, 0, None, ChainBreak(after_id, reason)))
+            checked, last_id, last_hash, breaks = verify_rows(chain, previous_hash, iter_rows(after_id, None))
+        except sqlite3.Error as e:
+            return (False, e)
+        broken = breaks[0] if breaks else None
+        report = ChainVerification(chain, after_id, checked, last_id, broken)
+        if broken is None and checked:
+            success, checkpoint_id = self.checkpoints_repo.insert_checkpoint({
+                'chain_table': chain,
+                'last_id': last_id,
+                'last_hash': last_hash,
+                'rows_verified': checked,
+                'verified_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            })
+            if not success:
+                return (False, checkpoint_id)
+            report.checkpoint_id = checkpoint_id
+        return (True, report)
+
+    def verify_chain_parallel(
+            self,
+            chain: str = 'audit_records',
+            workers: Optional[int] = None,
+            stop_at_first_failure: bool = False,
+            ranges_per_worker: int = 4
+            ) -> Tuple[bool, Union[ParallelVerification, Exception]]:
+        '''
+        Full verification of chain across CPU cores. The id span is split into
+        workers * ranges_per_worker ranges, each re-hashed by a pool worker on its own
+        read-only connection; the range boundaries are then stitched together in order.
+        Reports the first broken link and, unless stopping at the first failure, every
+        other one. A clean run records a checkpoint at the last row.
+        '''
+        if chain not in CHAINS:
+            return (False, ValueError(f'Unknown audit chain {chain}'))
+        if chain == 'audit_records':
+            success, bounds = self.audit_records_repo.get_audit_record_id_bounds()
+        else:
+            success, bounds = self.audit_logs_repo.get_audit_log_id_bounds()
+        if not success:
+            return (False, bounds)
+        workers = workers or os.cpu_count() or 1
+        report = ParallelVerification(chain, workers=workers)
+        if bounds['last_id'] is None:
+            return (True, report)
+        first_id, last_id = bounds['first_id'], bounds['last_id']
+        span = last_id - first_id + 1
+        range_count = max(1, min(workers * ranges_per_worker, span))
+        edges = [first_id - 1 + span * i // range_count for i in range(range_count + 1)]
+        report.ranges = range_count
+        results: List[Optional[RangeVerification]] = [None] * range_count
+        db_path = str(self.audit_records_repo.db_handler.db_path)
+
+        start = time.perf_counter()
+        try:
+            # spawn: forking a process whose other threads hold the writer lock is unsafe
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = {
+                    pool.submit(_verify_range, db_path, chain, edges[i], edges[i + 1], stop_at_first_failure): i
+                    for i in range(range_count)
+                }
+                cut = range_count
+                for future in as_completed(futures):
+                    if future.cancelled():
+                        continue
+                    index = futures[future]
+                    results[index] = future.result()
+                    if stop_at_first_failure and results[index].breaks and index < cut:
+                        # Ranges before the break still decide which break comes first
+                        cut = index
+                        report.stopped_early = True
+                        for pending, pending_index in futures.items():
+                            if pending_index > cut:
+                                pending.cancel()
+        except (sqlite3.Error, OSError, BrokenProcessPool) as e:
+            return (False, e)
+        report.seconds = time.perf_counter() - start
+
+        expected_previous_hash = None  # The first row of a chain has no predecessor
+        for result in results:
+            if result is None:
+                break
+            report.rows_checked += result.rows_checked
+            if result.first_id is None:
+                continue
+            if result.first_previous_hash != expected_previous_hash:
+                report.breaks.append(ChainBreak(result.first_id, 'previous_hash does not match the end of the previous range'))
+            report.breaks.extend(result.breaks)
+            if report.breaks and stop_at_first_failure:
+                break
+            expected_previous_hash = result.last_hash
+        report.broken = report.breaks[0] if report.breaks else None
+        report.last_id = last_id
+
+        if report.ok:
+            success, checkpoint_id = self.checkpoints_repo.insert_checkpoint({
+                'chain_table': chain,
+                'last_id': last_id,
+                'last_hash': expected_previous_hash,
+                'rows_verified': report.rows_checked,
+                'verified_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            })
+            if not success:
+                return (False, checkpoint_id)
+            report.checkpoint_id = checkpoint_id
+        return (True, report)
+
+    # --- Query instrumentation and the slow-query log (Admin page) --- #
+    def log_slow_queries(self, slow_queries: List[dict]) -> Tuple[bool, Union[int, Exception]]:
+        '''
+        Slow-query hook: chains one 'PERF' audit log per slow call reported by QueryStats,
+        describing the repo method, its latency, its rows and its SQL with the placeholders,
+        never the bound values. Written in a transaction of its own.
+        '''
+        if not slow_queries:
+            return (True, 0)
+        audit_logs = [
+            {
+                'log_level': SLOW_QUERY_LOG_LEVEL,
+                'action': 'slow_query',
+                'description': (
+                    f"{slow_query['method']}: {slow_query['ms']:.1f} ms, {slow_query['rows']} rows: "
+                    f"{slow_query['statement'][:SLOW_QUERY_STATEMENT_CHARS]}"
+                ),
+                'timestamp': slow_query['timestamp'],
+            }
+            for slow_query in slow_queries
+        ]
+        return self.log_events(audit_logs)
+
+    def log_events(self, audit_logs: List[dict]) -> Tuple[bool, Union[int, Exception]]:
+        '''
+        Chains audit_logs rows ({'log_level', 'action', 'description', 'timestamp'}) onto
+        the end of the audit_logs chain, in a transaction of their own.
+        '''
+        try:
+            # The tail is read and extended under the writer lock, so no other append forks the chain
+            with self.audit_logs_repo.db_handler:
+                success, last_log = self.audit_logs_repo.get_last_audit_log()
+                if not success:
+                    return (False, last_log)
+                chain_rows('audit_logs', last_log['hash'] if last_log else None, audit_logs)
+                return self.audit_logs_repo.append_audit_logs(audit_logs)
+        except sqlite3.Error as e:
+            return (False, e)
+
+    def get_query_stats(self, limit: Optional[int] = None) -> Tuple[bool, Dict]:
+        '''
+        {'enabled', 'slow_query_ms', 'dropped_slow_queries', 'methods'}, with methods the
+        per-method statistics of utils.query_stats, largest total time first.
+        '''
+        query_stats = self.audit_logs_repo.db_handler.query_stats
+        return (True, {
+            'enabled': query_stats.enabled,
+            'slow_query_ms': query_stats.slow_query_ms,
+            'dropped_slow_queries': query_stats.dropped_slow_queries,
+            'methods': query_stats.top(limit),
+        })
+
+    def get_slow_query_log(self, limit: int = 50) -> Tuple[bool, Union[List[Dict], Exception]]:
+        '''The newest limit 'PERF' audit logs, after writing the slow calls still queued.'''
+        result = self.audit_logs_repo.db_handler.query_stats.flush_slow_queries()
+        if result is not None and not result[0]:
+            return result
+        return self.audit_logs_repo.get_audit_logs_by_level(SLOW_QUERY_LOG_LEVEL, limit)
+
+    def set_query_stats_enabled(self, enabled: bool) -> None:
+        self.audit_logs_repo.db_handler.set_query_stats(enabled)
+
+    def reset_query_stats(self) -> None:
+        self.audit_logs_repo.db_handler.query_stats.reset()
+
+    def get_audit_logs_by_action(self, action: str, limit: int = 50) -> Tuple[bool, Union[List[Dict], Exception]]:
+        return self.audit_logs_repo.get_audit_logs_by_action(action, limit)
+
+    def get_checkpoints(self, chain: str = 'audit_records') -> Tuple[bool, Union[List[Dict], Exception]]:
+        return self.checkpoints_repo.get_checkpoints(chain)
+
+    def _chain_reader(self, chain: str) -> Callable[[int, Optional[int]], Iterator[Dict]]:
+        if chain == 'audit_records':
+            return self.audit_records_repo.iter_audit_records_after
+        return self.audit_logs_repo.iter_audit_logs_after
+
+
+def main() -> None:
+    from gui.create_services import create_services
+
+    parser = argparse.ArgumentParser(description='Verify the audit hash chains.')
+    parser.add_argument('chains', nargs='*', help=f"Any of {', '.join(CHAINS)}; default: all of them.")
+    parser.add_argument('--full', action='store_true', help='Ignore checkpoints and walk the whole chain.')
+    parser.add_argument('--parallel', action='store_true', help='Full verification in a process pool.')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--stop-at-first-failure', action='store_true')
+    args = parser.parse_args()
+
+    audit_service = create_services()[-1]
+    intact = True
+    for chain in args.chains or list(CHAINS):
+        if args.parallel:
+            success, report = audit_service.verify_chain_parallel(chain, args.workers, args.stop_at_first_failure)
+        else:
+            success, report = audit_service.verify_chain(chain, use_checkpoint=not args.full)
+        if not success:
+            raise SystemExit(f'Verification of {chain} failed to run: {report}')
+        if args.parallel:
+            print(
+                f'{chain}: {report.rows_checked} rows in {report.ranges} ranges on {report.workers} workers, '
+                f'{report.seconds:.2f}s ({report.rows_per_second:,.0f} rows/s)'
+                + (', stopped at the first failure' if report.stopped_early else '')
+            )
+        else:
+            print(f'{chain}: {report.rows_checked} rows verified after id {report.start_after_id}')
+        if report.ok:
+            print('  chain intact')
+            continue
+        intact = False
+        print(f'  first broken link at id {report.broken.row_id}: {report.broken.reason}')
+        for chain_break in getattr(report, 'breaks', [])[1:]:
+            print(f'  also broken at id {chain_break.row_id}: {chain_break.reason}')
+    if not intact:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
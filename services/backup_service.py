@@ -0,0 +1,273 @@
+import argparse
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from config.settings import (
+    BACKUP_DIR,
+    BACKUP_GZIP_LEVEL,
+    BACKUP_INTERVAL_SECONDS,
+    BACKUP_KEEP,
+    BACKUP_MAX_RESTARTS,
+    BACKUP_PAGES_PER_STEP,
+    BACKUP_STEP_SLEEP_MS,
+)
+from services.audit_service import AuditService
+
+# Every run is chained into audit_logs with this action
+BACKUP_LOG_ACTION = 'backup'
+SNAPSHOT_SUFFIX = '.db.gz'
+# One run at a time per process. Module-wide, because the Admin page builds a new BackupService on every rerun
+_RUNNING = threading.Lock()
+
+@dataclass
+class BackupReport:
+    path: Path
+    started_at: str
+    seconds: float = 0.0
+    pages: int = 0
+    database_bytes: int = 0
+    snapshot_bytes: int = 0
+    restarts: int = 0
+    single_step: bool = False
+    removed: List[Path] = field(default_factory=list)
+    # Set when the snapshot was taken but could not be recorded in audit_logs
+    log_error: Optional[Exception] = None
+
+    def describe(self) -> str:
+        return (
+            f'{self.path.name}: {self.pages} pages, {self.database_bytes / 1e6:.1f} MB -> {self.snapshot_bytes / 1e6:.1f} MB gzip '
+            f'in {self.seconds:.1f} s, quick_check ok, {self.restarts} restarts'
+            + (', taken in one step' if self.single_step else '')
+            + (f', {len(self.removed)} old snapshots removed' if self.removed else '')
+        )
+
+
+class BackupService():
+    '''
+    Online backups of the live database. A run copies it with the SQLite backup API in
+    steps of BACKUP_PAGES_PER_STEP pages, pausing BACKUP_STEP_SLEEP_MS between steps
+    (see DatabaseHandler.backup), checks the copy with PRAGMA quick_check, gzips it into
+    BACKUP_DIR as <database>-<YYYYmmdd-HHMMSS>.db.gz and keeps the newest BACKUP_KEEP
+    snapshots. Every run, failed or not, is chained into audit_logs (action 'backup')
+    with its duration and sizes.
+
+    A snapshot is a plain SQLite file once decompressed; restore it with the app stopped:
+        gunzip -c backups/<snapshot>.db.gz > patent_case_manager.db
+    '''
+    def __init__(
+            self,
+            audit_service: AuditService,
+            backup_dir: Path = BACKUP_DIR,
+            keep: int = BACKUP_KEEP
+            ):
+        self.audit_service = audit_service
+        self.db_handler = audit_service.audit_logs_repo.db_handler
+        self.backup_dir = Path(backup_dir)
+        self.keep = keep
+
+    # --- Public API --- #
+    def run_backup(self, progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[bool, Union[BackupReport, Exception]]:
+        '''Takes, checks, compresses and rotates one snapshot; progress_callback(pages_copied, page_count).'''
+        if not _RUNNING.acquire(blocking=False):
+            return (False, RuntimeError('A backup is already running'))
+        try:
+            start = time.perf_counter()
+            started_at = datetime.now()
+            success, report = self._snapshot(started_at, progress_callback)
+            if success:
+                report.seconds = time.perf_counter() - start
+                description, log_level = report.describe(), 'INFO'
+            else:
+                description, log_level = f'Backup failed after {time.perf_counter() - start:.1f} s: {report}', 'ERROR'
+            logged, result = self.audit_service.log_events([{
+                'log_level': log_level,
+                'action': BACKUP_LOG_ACTION,
+                'description': description,
+                'timestamp': started_at.strftime('%Y-%m-%d %H:%M:%S'),
+            }])
+            if success and not logged:
+                report.log_error = result
+            return (success, report)
+        finally:
+            _RUNNING.release()
+
+    def get_snapshots(self) -> List[Dict]:
+        '''The snapshots in backup_dir, newest first, as {'path', 'bytes', 'modified'}.'''
+        return [
+            {
+                'path': path,
+                'bytes': path.stat().st_size,
+                'modified': datetime.fromtimestamp(path.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            for path in self._snapshot_paths()
+        ]
+
+    def get_backup_log(self, limit: int = 20) -> Tuple[bool, Union[List[Dict], Exception]]:
+        '''The newest limit backup runs recorded in audit_logs, newest first.'''
+        return self.audit_service.get_audit_logs_by_action(BACKUP_LOG_ACTION, limit)
+
+    def verify_snapshot(self, path: Union[str, Path]) -> Tuple[bool, Union[List[str], Exception]]:
+        '''Decompresses a snapshot into a temporary file and returns (True, quick_check messages), ['ok'] when intact.'''
+        try:
+            with tempfile.TemporaryDirectory(dir=self.backup_dir if self.backup_dir.exists() else None) as tmp_dir:
+                database_path = Path(tmp_dir) / 'snapshot.db'
+                with gzip.open(path, 'rb') as compressed, open(database_path, 'wb') as database:
+                    shutil.copyfileobj(compressed, database, 1024 * 1024)
+                return (True, _quick_check(database_path))
+        except (OSError, EOFError, sqlite3.Error) as e:
+            return (False, e)
+
+    # --- Internals --- #
+    def _snapshot(
+            self,
+            started_at: datetime,
+            progress_callback: Optional[Callable[[int, int], None]]
+            ) -> Tuple[bool, Union[BackupReport, Exception]]:
+        if self.keep < 1:
+            # Rotation would delete the snapshot this run takes
+            return (False, ValueError(f'keep must be at least 1, got {self.keep}'))
+        stem = self.db_handler.db_path.stem
+        stamp = f'{started_at:%Y%m%d-%H%M%S}'
+        report = BackupReport(self.backup_dir / f'{stem}-{stamp}{SNAPSHOT_SUFFIX}', started_at.strftime('%Y-%m-%d %H:%M:%S'))
+        work_paths = []
+        try:
+            self.backup_dir.mkdir(parents=True, exist_ok=True)
+            # Work files are created exclusively, with names rotation never matches: concurrent runs,
+            # here or in another process, never share one, and a crash leaves no half snapshot behind
+            for suffix in ('.copy', '.partial'):
+                work_paths.append(_claim_work_file(self.backup_dir, f'.{stem}-{stamp}-', suffix))
+            copy_path, partial_path = work_paths
+
+            success, counts = self.db_handler.backup(
+                copy_path, BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP_MS, BACKUP_MAX_RESTARTS, progress_callback
+            )
+            if not success:
+                return (False, counts)
+            report.pages, report.restarts, report.single_step = counts['pages'], counts['restarts'], counts['single_step']
+
+            # The copy keeps the live database's WAL mode: make it a self-contained file first
+            conn = sqlite3.connect(copy_path)
+            try:
+                conn.execute('PRAGMA journal_mode = DELETE')
+            finally:
+                conn.close()
+            problems = _quick_check(copy_path)
+            if problems != ['ok']:
+                return (False, sqlite3.DatabaseError(f"quick_check failed: {'; '.join(problems[:5])}"))
+            report.database_bytes = copy_path.stat().st_size
+
+            with open(copy_path, 'rb') as database, gzip.open(partial_path, 'wb', compresslevel=BACKUP_GZIP_LEVEL) as compressed:
+                shutil.copyfileobj(database, compressed, 1024 * 1024)
+            with open(partial_path, 'rb') as snapshot:
+                os.fsync(snapshot.fileno())
+            report.path = self._publish(partial_path, stem, stamp)
+            report.snapshot_bytes = report.path.stat().st_size
+            report.removed = self._rotate()
+        except (OSError, sqlite3.Error) as e:
+            return (False, e)
+        finally:
+            for work_path in work_paths:
+                try:
+                    work_path.unlink()
+                except FileNotFoundError:
+                    pass
+        return (True, report)
+
+    def _publish(self, partial_path: Path, stem: str, stamp: str) -> Path:
+        '''
+        Gives the finished snapshot its name. A hard link never replaces an existing file,
+        so a run that loses the race for a name takes the next serial: runs started within
+        the same second are numbered after the last one, and rotation keeps their order.
+        '''
+        serial = max((key[1] for key, _ in self._snapshots() if key[0] == stamp), default=0) + 1
+        while True:
+            path = self.backup_dir / (f'{stem}-{stamp}{SNAPSHOT_SUFFIX}' if serial == 1 else f'{stem}-{stamp}-{serial}{SNAPSHOT_SUFFIX}')
+            try:
+                os.link(partial_path, path)
+                return path
+            except FileExistsError:
+                serial += 1
+
+    def _snapshot_paths(self) -> List[Path]:
+        return [path for _, path in self._snapshots()]
+
+    def _snapshots(self) -> List[Tuple[Tuple[str, int], Path]]:
+        '''This database's snapshots as ((timestamp, serial), path), newest first; other files in backup_dir are never listed (nor rotated).'''
+        if not self.backup_dir.exists():
+            return []
+        name = re.compile(re.escape(self.db_handler.db_path.stem) + r'-(\d{8}-\d{6})(?:-(\d+))?' + re.escape(SNAPSHOT_SUFFIX))
+        snapshots = []
+        for path in self.backup_dir.iterdir():
+            match = name.fullmatch(path.name)
+            if match:
+                # Timestamp, then the serial of snapshots started within the same second
+                snapshots.append(((match.group(1), int(match.group(2) or 1)), path))
+        return sorted(snapshots, reverse=True)
+
+    def _rotate(self) -> List[Path]:
+        '''Deletes all but the newest keep snapshots; returns the deleted paths.'''
+        removed = self._snapshot_paths()[self.keep:]
+        for path in removed:
+            path.unlink()
+        return removed
+
+
+def _claim_work_file(directory: Path, prefix: str, suffix: str) -> Path:
+    handle, name = tempfile.mkstemp(suffix=suffix, prefix=prefix, dir=directory)
+    os.close(handle)
+    return Path(name)
+
+
+def _quick_check(database_path: Path) -> List[str]:
+    conn = sqlite3.connect(database_path)
+    try:
+        return [row[0] for row in conn.execute('PRAGMA quick_check')]
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    from gui.create_services import create_backup_service
+
+    parser = argparse.ArgumentParser(description='Take a compressed, verified online backup of the database.')
+    parser.add_argument('--every', type=int, nargs='?', const=BACKUP_INTERVAL_SECONDS, default=None, metavar='SECONDS',
+                        help=f'Keep running and back up every SECONDS (default {BACKUP_INTERVAL_SECONDS}).')
+    parser.add_argument('--verify', type=Path, metavar='SNAPSHOT', help='Check an existing snapshot instead of taking one.')
+    args = parser.parse_args()
+
+    backup_service = create_backup_service()
+    if args.verify:
+        success, problems = backup_service.verify_snapshot(args.verify)
+        if not success:
+            raise SystemExit(f'Could not read {args.verify}: {problems}')
+        print(f"{args.verify}: {'intact' if problems == ['ok'] else '; '.join(problems)}")
+        raise SystemExit(0 if problems == ['ok'] else 1)
+
+    while True:
+        success, report = backup_service.run_backup()
+        if not success:
+            # A scheduled run keeps going: the failure is in audit_logs and the next run may succeed
+            print(f'{datetime.now():%Y-%m-%d %H:%M:%S} Backup failed: {report}')
+            if args.every is None:
+                raise SystemExit(1)
+        else:
+            print(f'{datetime.now():%Y-%m-%d %H:%M:%S} {report.describe()}')
+            if report.log_error is not None:
+                print(f'  not recorded in audit_logs: {report.log_error}')
+        if args.every is None:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == '__main__':
+    main()
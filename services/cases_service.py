@@ -1,6 +1,8 @@
 from datetime import datetime
-from typing import Tuple, Union, List, Dict
+from typing import Iterator, Optional, Tuple, Union, List, Dict
 
+from config.settings import PAGE_SIZE
+from utils.search import fts_query
 from repos.cases_repo import CasesRepo
 from repos.deadlines_repo import DeadlinesRepo
 
@@ -32,12 +34,37 @@ class CasesService():
             errors.append('Filing date must be in YYYY-MM-DD format.')
         return errors
 
-    def get_all_cases(self) -> Tuple[bool, Union[List[Dict], Exception]]:
-        return self.cases_repo.get_all_cases()
+    def get_all_cases(self, shape: str = 'dict') -> Tuple[bool, Union[List[Dict], object, Exception]]:
+        return self.cases_repo.get_all_cases(shape)
     
     def get_open_cases(self) -> Tuple[bool, Union[List[Dict], Exception]]:
         return self.cases_repo.get_open_cases()
     
+    def get_open_cases_page(
+            self,
+            after: Optional[tuple] = None,
+            limit: int = PAGE_SIZE,
+            filters: Optional[Dict] = None
+            ) -> Tuple[bool, Union[Dict, Exception]]:
+        '''One page of open cases; filters may narrow it by client_id, status, jurisdiction, ipr_type and procedure_type.'''
+        return self.cases_repo.get_open_cases_page(after, limit, filters)
+
+    def search(self, text: str, after: Optional[tuple] = None, limit: int = PAGE_SIZE) -> Tuple[bool, Union[Dict, Exception]]:
+        '''
+        Full-text search over case references, filing numbers, titles and notes: every word must match, as a prefix.
+        Returns one page of ranked hits with snippets, as {'rows', 'next_after'}.
+        '''
+        match = fts_query(text or '')
+        if match is None:
+            return (True, {'rows': [], 'next_after': None})
+        return self.cases_repo.get_search_page(match, after, limit)
+
+    def iter_all_cases(self) -> Iterator[Dict]:
+        return self.cases_repo.iter_all_cases()
+    
+    def get_open_cases_with_clients(self) -> Tuple[bool, Union[List[Dict], Exception]]:
+        return self.cases_repo.get_open_cases_with_clients()
+    
     def get_cases_by_client(self, client_id:int) -> Tuple[bool, Union[List[Dict], Exception]]:
         return self.cases_repo.get_cases_by_client(client_id)
     
@@ -61,7 +88,8 @@ class CasesService():
     def get_case_by_id(self, case_id: int) -> Tuple[bool, Union[Dict, None, Exception]]:
         return self.cases_repo.get_case_by_id(case_id, 'case_id')
     
-    def insert_case(self, case_data: dict) -> Tuple[bool, Union[int, Exception]]:
+    def prepare_new_case(self, case_data: dict) -> Tuple[bool, Union[dict, Exception]]:
+        '''Validates a new case and fills in the defaults, without writing it.'''
         errors = self._validate_case_data(case_data)
         if errors:
             return (False, ValueError(' '.join(errors)))
@@ -75,6 +103,12 @@ class CasesService():
         case_data['is_open'] = 1
         case_data['closed_at'] = None
         case_data['created_at'] = case_data['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return (True, case_data)
+
+    def insert_case(self, case_data: dict) -> Tuple[bool, Union[int, Exception]]:
+        success, case_data = self.prepare_new_case(case_data)
+        if not success:
+            return (False, case_data)
         return self.cases_repo.insert_case(
             case_data
         )
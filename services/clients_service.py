@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import Tuple, Union, List, Dict
+from typing import Iterator, Optional, Tuple, Union, List, Dict
 import re
 
+from config.settings import PAGE_SIZE
+from utils.search import fts_query
 from repos.clients_repo import ClientsRepo
 from repos.cases_repo import CasesRepo
 
@@ -24,16 +26,39 @@ class ClientsService():
             errors.append('Invalid email address format.')
         return errors
 
-    def get_all_clients(self) -> Tuple[bool, Union[List[Dict], Exception]]:
-        return self.clients_repo.get_all_clients()
+    def get_all_clients(self, shape: str = 'dict') -> Tuple[bool, Union[List[Dict], object, Exception]]:
+        return self.clients_repo.get_all_clients(shape)
     
     def get_active_clients(self) -> Tuple[bool, Union[List[Dict], Exception]]:
         return self.clients_repo.get_active_clients()
     
+    def get_active_clients_page(
+            self,
+            after: Optional[tuple] = None,
+            limit: int = PAGE_SIZE,
+            filters: Optional[Dict] = None
+            ) -> Tuple[bool, Union[Dict, Exception]]:
+        '''One page of active clients; filters may narrow it by country and city.'''
+        return self.clients_repo.get_active_clients_page(after, limit, filters)
+
+    def search(self, text: str, after: Optional[tuple] = None, limit: int = PAGE_SIZE) -> Tuple[bool, Union[Dict, Exception]]:
+        '''
+        Full-text search over client codes, names, cities and notes: every word must match, as a prefix.
+        Returns one page of ranked hits with snippets, as {'rows', 'next_after'}.
+        '''
+        match = fts_query(text or '')
+        if match is None:
+            return (True, {'rows': [], 'next_after': None})
+        return self.clients_repo.get_search_page(match, after, limit)
+
+    def iter_all_clients(self) -> Iterator[Dict]:
+        return self.clients_repo.iter_all_clients()
+    
     def get_client_by_id(self, client_id: int) -> Tuple[bool, Union[Dict, None, Exception]]:
         return self.clients_repo.get_client_by_id(client_id, 'client_id')
     
-    def insert_client(self, client_data: dict) -> Tuple[bool, Union[int, Exception]]:
+    def prepare_new_client(self, client_data: dict) -> Tuple[bool, Union[dict, Exception]]:
+        '''Validates a new client and fills in the defaults, without writing it.'''
         errors = self._validate_client_data(client_data)
         if errors:
             return (False, ValueError(' '.join(errors)))
@@ -47,6 +72,12 @@ class ClientsService():
         client_data['is_active'] = 1
         client_data['deactivated_at'] = None
         client_data['created_at'] = client_data['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return (True, client_data)
+
+    def insert_client(self, client_data: dict) -> Tuple[bool, Union[int, Exception]]:
+        success, client_data = self.prepare_new_client(client_data)
+        if not success:
+            return (False, client_data)
         return self.clients_repo.insert_client(
             client_data
         )
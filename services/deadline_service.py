@@ -1,11 +1,30 @@
-from datetime import date, datetime
-from typing import Tuple, Union, List, Dict
+import argparse
+import calendar
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+from typing import Iterator, Optional, Tuple, Union, List, Dict
 
+from config.settings import AGENDA_MONTHS, DEADLINE_HORIZON_MONTHS, OVERDUE_SWEEP_INTERVAL_SECONDS, PAGE_SIZE
+from repos.cases_repo import CasesRepo
+from repos.deadline_load_repo import DeadlineLoadRepo
+from repos.deadline_sweep_repo import DeadlineSweepsRepo
 from repos.deadlines_repo import DeadlinesRepo
 
 class DeadlineService():
-    def __init__(self, deadlines_repo:DeadlinesRepo):
+    def __init__(
+            self,
+            deadlines_repo:DeadlinesRepo,
+            cases_repo: CasesRepo,
+            deadline_sweeps_repo: DeadlineSweepsRepo,
+            deadline_load_repo: DeadlineLoadRepo
+            ):
         self.deadlines_repo = deadlines_repo
+        self.cases_repo = cases_repo
+        self.deadline_sweeps_repo = deadline_sweeps_repo
+        self.deadline_load_repo = deadline_load_repo
+        # (day swept up to, deadlines generation) of this process' last sweep, so repeated calls skip the database
+        self._last_sweep: Optional[Tuple[str, int]] = None
 
     def _validate_deadline_data(self, deadline_data: dict) -> List[str]:
         '''Validates deadline data, returning a list of error messages.'''
@@ -26,12 +45,54 @@ class DeadlineService():
         
         return errors
 
-    def get_all_deadlines(self) -> Tuple[bool, Union[List[Dict], Exception]]:
-        return self.deadlines_repo.get_all_deadlines()
+    def get_all_deadlines(self, shape: str = 'dict') -> Tuple[bool, Union[List[Dict], object, Exception]]:
+        return self.deadlines_repo.get_all_deadlines(shape)
     
     def get_open_deadlines(self) -> Tuple[bool, Union[List[Dict], Exception]]:
         return self.deadlines_repo.get_open_deadlines()
     
+    def get_open_deadlines_board(
+            self,
+            start_date: Optional[str] = None,
+            end_date: Optional[str] = None,
+            limit: Optional[int] = None,
+            shape: str = 'dict'
+            ) -> Tuple[bool, Union[List[Dict], object, Exception]]:
+        '''Returns open deadlines with their case and client details, optionally windowed by due date.'''
+        for date_string in (start_date, end_date):
+            if date_string is None:
+                continue
+            try:
+                datetime.strptime(date_string, '%Y-%m-%d')
+            except ValueError:
+                return False, ValueError('Date window bounds must be in YYYY-MM-DD format.')
+        if limit is not None and limit <= 0:
+            return False, ValueError('Limit must be a positive integer.')
+        return self.deadlines_repo.get_open_deadlines_board(start_date, end_date, limit, shape)
+
+    def get_open_deadlines_board_page(
+            self,
+            after: Optional[tuple] = None,
+            limit: int = PAGE_SIZE,
+            filters: Optional[Dict] = None
+            ) -> Tuple[bool, Union[Dict, Exception]]:
+        '''
+        One page of the open deadline board; filters may narrow it by case_id, client_id,
+        deadline_type, status and a due_from / due_to window (YYYY-MM-DD).
+        '''
+        for name in ('due_from', 'due_to'):
+            date_string = (filters or {}).get(name)
+            if date_string is None:
+                continue
+            try:
+                datetime.strptime(date_string, '%Y-%m-%d')
+            except ValueError:
+                return False, ValueError(f'{name} must be in YYYY-MM-DD format.')
+        return self.deadlines_repo.get_open_deadlines_board_page(after, limit, filters)
+
+    def iter_all_deadlines(self) -> Iterator[Dict]:
+        return self.deadlines_repo.iter_all_deadlines()
+
     def get_open_deadlines_by_case(self, case_id:int) -> Tuple[bool, Union[List[Dict], Exception]]:
         return self.deadlines_repo.get_open_deadlines_by_case(case_id)
     
@@ -60,4 +121,189 @@ class DeadlineService():
         return self.deadlines_repo.update_deadline(deadline_data, deadline_id)
     
     def mark_deadline_completed(self, deadline_id: int) -> Tuple[bool, Union[int, str, Exception]]:
-        return self.deadlines_repo.mark_deadline_completed(deadline_id)
\ No newline at end of file
+        return self.deadlines_repo.mark_deadline_completed(deadline_id)
+
+    def get_overdue_count(self) -> Tuple[bool, Union[int, Exception]]:
+        return self.deadlines_repo.get_overdue_count()
+
+    def sweep_overdue_deadlines(self, today: Optional[date] = None, full: bool = False) -> Tuple[bool, Union[Dict, Exception]]:
+        '''
+        Marks every pending deadline due before today as 'Overdue', however and whenever it
+        was written (batch writes, imports and other processes included), with one UPDATE
+        on the Pending partial index: it visits only the pending deadlines already past due,
+        so a sweep costs what it marks. Sweeps that mark deadlines, and full ones, are
+        recorded in deadline_sweeps. Cheap to call on every page render: while the day and
+        the deadlines table's generation are those left by the last sweep, calls skip the
+        UPDATE at the cost of the change tracker's PRAGMA data_version poll (full skips
+        that shortcut). Returns {'swept_before', 'marked'}.
+        '''
+        swept_before = (today or date.today()).strftime('%Y-%m-%d')
+        db_handler = self.deadlines_repo.db_handler
+        table = self.deadlines_repo.table_name
+        try:
+            if not full and self._last_sweep == (swept_before, db_handler.changes.generations((table,))[0]):
+                return (True, {'swept_before': swept_before, 'marked': 0})
+            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            with db_handler as conn:
+                if not conn.in_transaction:
+                    conn.execute('BEGIN IMMEDIATE')
+                success, ids = self.deadlines_repo.mark_overdue(swept_before, timestamp)
+                if not success:
+                    return (False, ids)
+                if ids or full:
+                    success, result = self.deadline_sweeps_repo.insert_sweep({
+                        'swept_before': swept_before,
+                        'deadlines_marked': len(ids),
+                        'swept_at': timestamp,
+                    })
+                    if not success:
+                        return (False, result)
+                # Read in the sweep's transaction: its own UPDATE is counted, later writes are not
+                generation = db_handler.changes.read_generations(conn, (table,))[0]
+        except (sqlite3.Error, ValueError) as e:
+            return (False, e)
+        self._last_sweep = (swept_before, generation)
+        return (True, {'swept_before': swept_before, 'marked': len(ids)})
+
+    # --- Agenda load, read from the trigger-maintained deadline_load table --- #
+    def get_agenda_window(self, today: Optional[date] = None, months: int = AGENDA_MONTHS) -> Tuple[str, str]:
+        '''(today, the same day months ahead) as YYYY-MM-DD, clipped to the end of that month.'''
+        today = today or date.today()
+        month_index = today.month - 1 + months
+        year, month = today.year + month_index // 12, month_index % 12 + 1
+        end = date(year, month, min(today.day, calendar.monthrange(year, month)[1]))
+        return (today.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+
+    def get_deadline_load_by_day(self, start_date: str, end_date: str) -> Tuple[bool, Union[List[Dict], Exception]]:
+        '''Open and overdue deadline counts per due date and deadline type.'''
+        return self.deadline_load_repo.get_load_by_day(start_date, end_date)
+
+    def get_deadline_load_by_week(self, start_date: str, end_date: str) -> Tuple[bool, Union[List[Dict], Exception]]:
+        '''
+        Open and overdue deadline counts per week (keyed by its Monday) and deadline type.
+        The folded weeks are cached like the days they come from, so reruns skip the fold.
+        '''
+        return self.deadline_load_repo.db_handler.cached(
+            ('deadline_service', 'load_by_week', start_date, end_date),
+            ('deadlines', 'cases'),
+            lambda: self._fold_load_by_week(start_date, end_date)
+        )
+
+    def _fold_load_by_week(self, start_date: str, end_date: str) -> Tuple[bool, Union[List[Dict], Exception]]:
+        success, days = self.deadline_load_repo.get_load_by_day(start_date, end_date)
+        if not success:
+            return (False, days)
+        weeks: Dict[Tuple[str, str], Dict] = {}
+        for day in days:
+            due_date = date.fromisoformat(day['due_date'])
+            week_start = (due_date - timedelta(days=due_date.weekday())).strftime('%Y-%m-%d')
+            week = weeks.setdefault(
+                (week_start, day['deadline_type']),
+                {'week_start': week_start, 'deadline_type': day['deadline_type'], 'open_count': 0, 'overdue_count': 0}
+            )
+            week['open_count'] += day['open_count']
+            week['overdue_count'] += day['overdue_count']
+        return (True, list(weeks.values()))
+
+    def get_deadline_load_by_client(
+            self,
+            start_date: Optional[str] = None,
+            end_date: Optional[str] = None
+            ) -> Tuple[bool, Union[List[Dict], Exception]]:
+        '''Open and overdue deadline counts per client, busiest client first.'''
+        def load() -> Tuple[bool, Union[List[Dict], Exception]]:
+            success, clients = self.deadline_load_repo.get_load_by_client(start_date, end_date)
+            if not success:
+                return (False, clients)
+            return (True, sorted(clients, key=lambda client: (-client['open_count'], client['client_code'])))
+        return self.deadline_load_repo.db_handler.cached(
+            ('deadline_service', 'load_by_client', start_date, end_date),
+            ('deadlines', 'cases', 'clients'),
+            load
+        )
+
+    def generate_statutory_deadlines(
+            self,
+            today: Optional[date] = None,
+            horizon_months: int = DEADLINE_HORIZON_MONTHS
+            ) -> Tuple[bool, Union[Dict[str, int], Exception]]:
+        '''
+        Derives the statutory deadlines of every open case from its filing date (see
+        utils.deadline_rules) that fall due from today to horizon_months ahead, and
+        inserts those whose (case, description) is not stored yet in one batch. The stored
+        keys are read and the batch inserted in one write transaction, so concurrent runs
+        (two sessions, a double submit, another process) never insert the same deadline twice.
+        Returns the number of cases read, deadlines computed and deadlines inserted.
+        '''
+        try:
+            import numpy as np
+            from utils.deadline_rules import DEADLINE_TYPE, RULES, add_months, compute_deadlines, missing_mask
+        except ImportError as e:
+            return (False, e)
+        if horizon_months <= 0:
+            return (False, ValueError('Horizon must be a positive number of months.'))
+        success, cases = self.cases_repo.get_all_open_filed_cases('columnar')
+        if not success:
+            return (False, cases)
+        start = np.datetime64(today or date.today(), 'D')
+        end = add_months(np.array([start]), horizon_months)[0]
+        case_ids, rule_indexes, due_dates = compute_deadlines(cases, start, end)
+        descriptions = [rule.description for rule in RULES]
+        try:
+            # The writer lock keeps out this process' other threads, BEGIN IMMEDIATE other processes
+            with self.deadlines_repo.db_handler as conn:
+                if not conn.in_transaction:
+                    conn.execute('BEGIN IMMEDIATE')
+                success, existing = self.deadlines_repo.get_all_deadline_keys('columnar')
+                if not success:
+                    return (False, existing)
+                missing = missing_mask(case_ids, rule_indexes, existing['case_id'], existing['description'])
+
+                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                records = [
+                    {
+                        'case_id': case_id,
+                        'description': descriptions[rule_index],
+                        'due_date': due_date,
+                        'deadline_type': DEADLINE_TYPE,
+                        'status': 'Pending',
+                        'completed': 0,
+                        'created_at': timestamp,
+                        'updated_at': timestamp,
+                    }
+                    for case_id, rule_index, due_date in zip(
+                        case_ids[missing].tolist(), rule_indexes[missing].tolist(), due_dates[missing].astype(str).tolist()
+                    )
+                ]
+                success, ids = self.deadlines_repo.insert_many(records)
+        except sqlite3.Error as e:
+            return (False, e)
+        if not success:
+            return (False, ids)
+        return (True, {'cases': len(cases['case_id']), 'computed': len(case_ids), 'inserted': len(ids)})
+
+
+def main() -> None:
+    from gui.create_services import create_services
+
+    parser = argparse.ArgumentParser(description="Mark pending deadlines whose due date has passed as 'Overdue'.")
+    parser.add_argument('--full', action='store_true', help='Sweep and record the sweep even when nothing changed.')
+    parser.add_argument('--every', type=int, nargs='?', const=OVERDUE_SWEEP_INTERVAL_SECONDS, default=None, metavar='SECONDS',
+                        help=f'Keep running and sweep every SECONDS (default {OVERDUE_SWEEP_INTERVAL_SECONDS}).')
+    args = parser.parse_args()
+
+    deadline_service = create_services()[2]
+    full = args.full
+    while True:
+        success, result = deadline_service.sweep_overdue_deadlines(full=full)
+        if not success:
+            raise SystemExit(f'Overdue sweep failed: {result}')
+        print(f"{datetime.now():%Y-%m-%d %H:%M:%S} {result['marked']} deadlines marked overdue (due before {result['swept_before']})")
+        if args.every is None:
+            break
+        full = False
+        time.sleep(args.every)
+
+
+if __name__ == '__main__':
+    main()
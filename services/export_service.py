@@ -0,0 +1,300 @@
+import argparse
+import csv
+import importlib.util
+import io
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, IO, Iterator, List, Optional, Tuple, Union
+
+from config.settings import EXPORT_BATCH_SIZE, EXPORT_PARQUET_ROW_GROUP_ROWS
+from repos.clients_repo import ClientsRepo
+from repos.cases_repo import CasesRepo
+from repos.deadlines_repo import DeadlinesRepo
+from repos.records import INTEGER_COLUMNS
+
+# Export format -> (MIME type, file extension)
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    'csv': ('text/csv', '.csv'),
+    'jsonl': ('application/x-ndjson', '.jsonl'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+}
+# The joined view: every deadline with its case and client
+DOCKET = 'docket'
+EXPORT_DATASETS = ('clients', 'cases', 'deadlines', DOCKET)
+
+Batches = Iterator[Tuple[Tuple[str, ...], List[tuple]]]
+
+@dataclass
+class ExportProgress:
+    rows_written: int = 0
+    bytes_written: int = 0
+
+@dataclass
+class ExportReport:
+    dataset: str
+    export_format: str
+    rows: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+
+def parquet_available() -> bool:
+    '''Parquet needs the optional pyarrow package.'''
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+class ExportService():
+    '''
+    Streams clients, cases, deadlines or the docket (deadlines joined with their case and
+    client) to CSV, JSON Lines or Parquet. Rows come from the repos' iter_all_*_batches
+    in fetchmany batches and are encoded batch by batch into byte chunks, so the memory
+    of an export does not grow with its size: one batch for CSV and JSON Lines, one row
+    group (EXPORT_PARQUET_ROW_GROUP_ROWS rows) for Parquet.
+    '''
+    def __init__(
+            self,
+            clients_repo: ClientsRepo,
+            cases_repo: CasesRepo,
+            deadlines_repo: DeadlinesRepo,
+            batch_size: int = EXPORT_BATCH_SIZE
+            ):
+        self.clients_repo = clients_repo
+        self.cases_repo = cases_repo
+        self.deadlines_repo = deadlines_repo
+        self.batch_size = batch_size
+
+    # --- Public API --- #
+    def get_formats(self) -> List[str]:
+        '''The export formats available in this environment.'''
+        return [name for name in EXPORT_FORMATS if name != 'parquet' or parquet_available()]
+
+    def get_filters(self, dataset: str) -> List[str]:
+        '''Names of the filters the dataset accepts (the page_filters of its repo).'''
+        return list(self._repo(dataset).page_filters)
+
+    def parse_filters(self, raw_filters: Dict[str, str]) -> Dict[str, object]:
+        '''
+        Filters typed as text (CLI, form fields): blanks dropped, integer columns converted.
+        Raises ValueError for an integer column given something else.
+        '''
+        filters = {}
+        for name, value in raw_filters.items():
+            value = str(value).strip()
+            if not value:
+                continue
+            if name in INTEGER_COLUMNS:
+                try:
+                    value = int(value)
+                except ValueError:
+                    raise ValueError(f'{name} must be an integer')
+            filters[name] = value
+        return filters
+
+    def file_name(self, dataset: str, export_format: str) -> str:
+        return f'{dataset}{EXPORT_FORMATS[export_format][1]}'
+
+    def stream_export(
+            self,
+            dataset: str,
+            export_format: str,
+            filters: Optional[Dict[str, object]] = None,
+            progress_callback: Optional[Callable[[ExportProgress], None]] = None
+            ) -> Tuple[bool, Union[Iterator[bytes], Exception]]:
+        '''
+        Returns a generator of the export's byte chunks. The dataset, format and filters
+        are checked here; database errors are raised while iterating. A database reader
+        is held until the generator is exhausted or closed.
+        '''
+        try:
+            if export_format not in EXPORT_FORMATS:
+                raise ValueError(f'Unknown export format: {export_format}')
+            if export_format == 'parquet' and not parquet_available():
+                raise ImportError('Parquet exports need pyarrow (pip install pyarrow)')
+            batches = self._batches(dataset, filters)
+        except (ValueError, ImportError) as e:
+            return (False, e)
+        encoder = {'csv': _csv_chunks, 'jsonl': _jsonl_chunks, 'parquet': _parquet_chunks}[export_format]
+        return (True, _tracked(encoder(batches), progress_callback))
+
+    def export_to_file(
+            self,
+            dataset: str,
+            export_format: str,
+            destination: Union[str, Path, IO[bytes]],
+            filters: Optional[Dict[str, object]] = None,
+            progress_callback: Optional[Callable[[ExportProgress], None]] = None
+            ) -> Tuple[bool, Union[ExportReport, Exception]]:
+        '''Writes the export to a path or binary file object.'''
+        progress = ExportProgress()
+
+        def on_chunk(current: ExportProgress) -> None:
+            progress.rows_written, progress.bytes_written = current.rows_written, current.bytes_written
+            if progress_callback:
+                progress_callback(current)
+
+        start = time.perf_counter()
+        success, chunks = self.stream_export(dataset, export_format, filters, on_chunk)
+        if not success:
+            return (False, chunks)
+        try:
+            if isinstance(destination, (str, Path)):
+                with open(destination, 'wb') as out:
+                    out.writelines(chunks)
+            else:
+                destination.writelines(chunks)
+        except Exception as e:
+            return (False, e)
+        finally:
+            chunks.close()
+        return (True, ExportReport(dataset, export_format, progress.rows_written, progress.bytes_written, time.perf_counter() - start))
+
+    # --- Internals --- #
+    def _repo(self, dataset: str):
+        if dataset == 'clients':
+            return self.clients_repo
+        if dataset == 'cases':
+            return self.cases_repo
+        if dataset in ('deadlines', DOCKET):
+            return self.deadlines_repo
+        raise ValueError(f'Unknown dataset: {dataset}')
+
+    def _batches(self, dataset: str, filters: Optional[Dict[str, object]]) -> Batches:
+        repo = self._repo(dataset)
+        if dataset == DOCKET:
+            return repo.iter_all_docket_batches(filters, self.batch_size)
+        return getattr(repo, f'iter_all_{dataset}_batches')(filters, self.batch_size)
+
+
+# --- Encoders: (columns, rows) batches in, byte chunks out, one chunk per batch or row group --- #
+def _tracked(chunks: Iterator[Tuple[int, bytes]], progress_callback: Optional[Callable[[ExportProgress], None]]) -> Iterator[bytes]:
+    '''Drops the row counts of an encoder's (rows, chunk) pairs, reporting them to progress_callback.'''
+    progress = ExportProgress()
+    try:
+        for rows, chunk in chunks:
+            progress.rows_written += rows
+            progress.bytes_written += len(chunk)
+            if progress_callback:
+                progress_callback(progress)
+            if chunk:
+                yield chunk
+    finally:
+        # Closing the export closes the encoder, which releases the database reader
+        chunks.close()
+
+def _csv_chunks(batches: Batches) -> Iterator[Tuple[int, bytes]]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    try:
+        header = True
+        for columns, rows in batches:
+            if header:
+                writer.writerow(columns)
+                header = False
+            writer.writerows(rows)
+            yield (len(rows), buffer.getvalue().encode('utf-8'))
+            buffer.seek(0)
+            buffer.truncate()
+    finally:
+        batches.close()
+
+def _jsonl_chunks(batches: Batches) -> Iterator[Tuple[int, bytes]]:
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    try:
+        for columns, rows in batches:
+            lines = [encode(dict(zip(columns, row))) for row in rows]
+            yield (len(rows), ''.join(line + '\n' for line in lines).encode('utf-8'))
+    finally:
+        batches.close()
+
+class _ChunkSink(io.RawIOBase):
+    '''Write-only file the Parquet writer writes to; take() drains what it wrote so far.'''
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        chunk, self._chunks = b''.join(self._chunks), []
+        return chunk
+
+def _parquet_chunks(batches: Batches, row_group_rows: int = EXPORT_PARQUET_ROW_GROUP_ROWS) -> Iterator[Tuple[int, bytes]]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    writer = None
+    pending, pending_rows = [], 0
+    try:
+        for columns, rows in batches:
+            if writer is None:
+                # The tables' INTEGER columns as int64, everything else (dates included) as text
+                schema = pa.schema([(name, pa.int64() if name in INTEGER_COLUMNS else pa.string()) for name in columns])
+                writer = pq.ParquetWriter(sink, schema)
+            if rows:
+                # Each batch becomes Arrow columns at once; the Python rows are released
+                values = zip(*rows)
+                pending.append(pa.record_batch([pa.array(column, type=field.type) for column, field in zip(values, schema)], schema=schema))
+                pending_rows += len(rows)
+            if pending_rows >= row_group_rows:
+                writer.write_table(pa.Table.from_batches(pending), row_group_size=pending_rows)
+                yield (pending_rows, sink.take())
+                pending, pending_rows = [], 0
+        if writer is not None:
+            if pending:
+                writer.write_table(pa.Table.from_batches(pending), row_group_size=pending_rows)
+            writer.close()
+            yield (pending_rows, sink.take())
+    finally:
+        batches.close()
+
+
+def main() -> None:
+    from gui.create_services import create_export_service
+
+    parser = argparse.ArgumentParser(description='Export clients, cases, deadlines or the docket in constant memory.')
+    parser.add_argument('dataset', choices=EXPORT_DATASETS)
+    parser.add_argument('--format', dest='export_format', choices=list(EXPORT_FORMATS), default='csv')
+    parser.add_argument('--out', type=Path, help='Output file; standard output when omitted')
+    parser.add_argument('--filter', action='append', default=[], metavar='NAME=VALUE', help='A filter of the dataset, repeatable')
+    args = parser.parse_args()
+
+    raw_filters = {}
+    for item in args.filter:
+        name, separator, value = item.partition('=')
+        if not separator:
+            raise SystemExit(f'Filters are NAME=VALUE, got: {item}')
+        raw_filters[name] = value
+
+    export_service = create_export_service()
+    try:
+        filters = export_service.parse_filters(raw_filters)
+    except ValueError as e:
+        raise SystemExit(f'Invalid filter: {e}')
+    destination = args.out if args.out else sys.stdout.buffer
+    success, report = export_service.export_to_file(args.dataset, args.export_format, destination, filters or None)
+    if not success:
+        raise SystemExit(f'Export failed: {report}')
+    print(
+        f'{report.rows} {args.dataset} rows exported as {args.export_format}: {report.bytes / 1e6:.1f} MB '
+        f'in {report.seconds:.2f} s ({report.rows / max(report.seconds, 1e-9):,.0f} rows/s).',
+        file=sys.stderr
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+import argparse
+import csv
+import io
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, IO, Iterator, List, Optional, Tuple, Union
+
+from repos.base_repo import BaseRepo, RecordImportError
+from repos.clients_repo import ClientsRepo
+from repos.cases_repo import CasesRepo
+from services.clients_service import ClientsService
+from services.cases_service import CasesService
+
+DEFAULT_CHUNK_SIZE = 1000
+
+@dataclass
+class ImportRowError:
+    row_number: int
+    identifier: str
+    message: str
+
+@dataclass
+class ImportProgress:
+    rows_read: int = 0
+    rows_imported: int = 0
+    rows_failed: int = 0
+    chunks_written: int = 0
+    total_bytes: Optional[int] = None
+    bytes_read: int = 0
+
+    @property
+    def fraction(self) -> Optional[float]:
+        '''Share of the input consumed so far, when the input size is known.'''
+        if not self.total_bytes:
+            return None
+        return min(self.bytes_read / self.total_bytes, 1.0)
+
+@dataclass
+class ImportReport:
+    total_rows: int = 0
+    imported: int = 0
+    committed: bool = False
+    errors: List[ImportRowError] = field(default_factory=list)
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+
+class ImportService():
+    '''
+    Streams CSV uploads into the database in chunks. Rows are validated through the
+    services' prepare_new_* methods, checked against the database once per chunk, and
+    written with executemany inside a single transaction (see BaseRepo.import_records).
+    '''
+    def __init__(
+            self,
+            clients_repo: ClientsRepo,
+            cases_repo: CasesRepo,
+            clients_service: ClientsService,
+            cases_service: CasesService,
+            chunk_size: int = DEFAULT_CHUNK_SIZE
+            ):
+        self.clients_repo = clients_repo
+        self.cases_repo = cases_repo
+        self.clients_service = clients_service
+        self.cases_service = cases_service
+        self.chunk_size = chunk_size
+
+    # --- Public API --- #
+    def import_clients(
+            self,
+            csv_file: Union[str, Path, IO],
+            progress_callback: Optional[Callable[[ImportProgress], None]] = None,
+            stop_on_error: bool = False
+            ) -> Tuple[bool, Union[ImportReport, Exception]]:
+        '''Imports clients from a CSV path or file object.'''
+        return self._import(
+            csv_file,
+            self.clients_repo,
+            self.clients_service.prepare_new_client,
+            self._check_clients_chunk,
+            'name',
+            progress_callback,
+            stop_on_error
+        )
+
+    def import_cases(
+            self,
+            csv_file: Union[str, Path, IO],
+            progress_callback: Optional[Callable[[ImportProgress], None]] = None,
+            stop_on_error: bool = False
+            ) -> Tuple[bool, Union[ImportReport, Exception]]:
+        '''Imports cases from a CSV path or file object.'''
+        return self._import(
+            csv_file,
+            self.cases_repo,
+            self.cases_service.prepare_new_case,
+            self._check_cases_chunk,
+            'client_ref',
+            progress_callback,
+            stop_on_error
+        )
+
+    # --- Batch validation against the database, one query per chunk --- #
+    def _check_clients_chunk(self, chunk: List[Tuple[int, dict]], seen: set) -> Tuple[bool, Union[Dict[int, str], Exception]]:
+        codes = [record.get('client_code') for _, record in chunk if record.get('client_code')]
+        success, taken = self.clients_repo.get_existing_client_codes(list(set(codes)))
+        if not success:
+            return (False, taken)
+        errors = {}
+        for row_number, record in chunk:
+            code = record.get('client_code')
+            if not code:
+                errors[row_number] = 'Client code is required.'
+            elif code in taken:
+                errors[row_number] = f'Client code {code} already exists.'
+            elif code in seen:
+                errors[row_number] = f'Client code {code} is repeated in the file.'
+            else:
+                seen.add(code)
+        return (True, errors)
+
+    def _check_cases_chunk(self, chunk: List[Tuple[int, dict]], seen: set) -> Tuple[bool, Union[Dict[int, str], Exception]]:
+        errors = {}
+        for row_number, record in chunk:
+            try:
+                record['client_id'] = int(record['client_id'])
+            except (TypeError, ValueError):
+                errors[row_number] = f"Client ID {record['client_id']} is not a number."
+        client_ids = {record['client_id'] for row_number, record in chunk if row_number not in errors}
+        success, existing = self.clients_repo.get_existing_client_ids(list(client_ids))
+        if not success:
+            return (False, existing)
+        for row_number, record in chunk:
+            if row_number in errors:
+                continue
+            key = (record['client_id'], record['client_ref'].lower())
+            if record['client_id'] not in existing:
+                errors[row_number] = f"Client ID {record['client_id']} does not exist."
+            elif key in seen:
+                errors[row_number] = f"Client ref {record['client_ref']} is repeated in the file."
+            else:
+                seen.add(key)
+        return (True, errors)
+
+    # --- Streaming pipeline --- #
+    def _import(
+            self,
+            csv_file: Union[str, Path, IO],
+            repo: BaseRepo,
+            prepare: Callable[[dict], Tuple[bool, Union[dict, Exception]]],
+            check_chunk: Callable[[List[Tuple[int, dict]], set], Tuple[bool, Union[Dict[int, str], Exception]]],
+            identifier_field: str,
+            progress_callback: Optional[Callable[[ImportProgress], None]],
+            stop_on_error: bool
+            ) -> Tuple[bool, Union[ImportReport, Exception]]:
+        report = ImportReport()
+        progress = ImportProgress()
+        identifiers = {}
+
+        def add_error(row_number: int, message: str) -> None:
+            report.errors.append(ImportRowError(row_number, identifiers.get(row_number, 'N/A'), message))
+            progress.rows_failed += 1
+            if stop_on_error:
+                raise ValueError(f'Row {row_number}: {message}')
+
+        def validated_chunks() -> Iterator[List[Tuple[int, dict]]]:
+            seen = set()
+            for raw_chunk in self._read_chunks(text_stream, progress):
+                chunk = []
+                for row_number, row in raw_chunk:
+                    identifiers[row_number] = row.get(identifier_field) or 'N/A'
+                    if None in row:
+                        add_error(row_number, 'Row has more fields than the header.')
+                        continue
+                    success, result = prepare(row)
+                    if success:
+                        chunk.append((row_number, result))
+                    else:
+                        add_error(row_number, str(result))
+                success, chunk_errors = check_chunk(chunk, seen)
+                if not success:
+                    raise chunk_errors
+                for row_number, message in chunk_errors.items():
+                    add_error(row_number, message)
+                yield [(row_number, record) for row_number, record in chunk if row_number not in chunk_errors]
+
+        def on_chunk(inserted: int, failed: int) -> None:
+            progress.rows_imported += inserted
+            progress.rows_failed += failed
+            progress.chunks_written += 1
+            if progress_callback is not None:
+                progress_callback(progress)
+
+        try:
+            text_stream, total_bytes = self._open_text_stream(csv_file)
+        except (OSError, UnicodeError) as e:
+            return (False, e)
+        progress.total_bytes = total_bytes
+        try:
+            success, result = repo.import_records(validated_chunks(), stop_on_error, on_chunk)
+        except (csv.Error, UnicodeError) as e:
+            return (False, e)
+        finally:
+            if isinstance(csv_file, (str, Path)):
+                text_stream.close()
+            elif text_stream is not csv_file:
+                # Leave the caller's binary file open
+                text_stream.detach()
+
+        report.total_rows = progress.rows_read
+        if success:
+            inserted, failures = result
+            report.imported = inserted
+            report.committed = True
+            for row_number, error in failures:
+                report.errors.append(ImportRowError(row_number, identifiers.get(row_number, 'N/A'), str(error)))
+        elif isinstance(result, RecordImportError):
+            report.errors.append(ImportRowError(result.row_number, identifiers.get(result.row_number, 'N/A'), str(result.error)))
+        elif not (isinstance(result, ValueError) and stop_on_error and report.errors):
+            return (False, result)
+        report.errors.sort(key=lambda error: error.row_number)
+        return (True, report)
+
+    def _read_chunks(self, text_stream: IO[str], progress: ImportProgress) -> Iterator[List[Tuple[int, dict]]]:
+        '''Yields lists of (row_number, row) of at most chunk_size rows, reading lazily.'''
+        reader = csv.DictReader(text_stream)
+        chunk = []
+        for row_number, row in enumerate(reader, start=1):
+            chunk.append((row_number, row))
+            progress.rows_read = row_number
+            if len(chunk) >= self.chunk_size:
+                progress.bytes_read = self._bytes_read(text_stream)
+                yield chunk
+                chunk = []
+        if chunk:
+            progress.bytes_read = progress.total_bytes or self._bytes_read(text_stream)
+            yield chunk
+
+    @staticmethod
+    def _bytes_read(text_stream: IO[str]) -> int:
+        buffer = getattr(text_stream, 'buffer', None)
+        try:
+            return buffer.tell() if buffer is not None else 0
+        except (OSError, ValueError):
+            return 0
+
+    @staticmethod
+    def _open_text_stream(csv_file: Union[str, Path, IO]) -> Tuple[IO[str], Optional[int]]:
+        '''Returns a text stream over the CSV and its size in bytes, if known.'''
+        if isinstance(csv_file, (str, Path)):
+            path = Path(csv_file)
+            return open(path, 'r', encoding='utf-8-sig', newline=''), path.stat().st_size
+        if isinstance(csv_file, io.TextIOBase):
+            return csv_file, None
+        # Binary file objects, e.g. Streamlit's UploadedFile
+        csv_file.seek(0)
+        total_bytes = getattr(csv_file, 'size', None)
+        return io.TextIOWrapper(csv_file, encoding='utf-8-sig', newline=''), total_bytes
+
+
+def main() -> None:
+    from gui.create_services import create_services
+
+    parser = argparse.ArgumentParser(description='Import clients or cases from a CSV file.')
+    parser.add_argument('kind', choices=['clients', 'cases'])
+    parser.add_argument('csv_path', type=Path)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--stop-on-error', action='store_true')
+    args = parser.parse_args()
+
+    import_service = create_services()[3]
+    import_service.chunk_size = args.chunk_size
+    importer = import_service.import_clients if args.kind == 'clients' else import_service.import_cases
+
+    def print_progress(progress: ImportProgress) -> None:
+        print(f'{progress.rows_read} rows read, {progress.rows_imported} imported, {progress.rows_failed} failed')
+
+    success, report = importer(args.csv_path, print_progress, args.stop_on_error)
+    if not success:
+        raise SystemExit(f'Import failed: {report}')
+    for error in report.errors:
+        print(f'Row {error.row_number} ({error.identifier}): {error.message}')
+    state = 'committed' if report.committed else 'rolled back'
+    print(f'{report.imported} of {report.total_rows} {args.kind} imported ({state}).')
+
+
+if __name__ == '__main__':
+    main()
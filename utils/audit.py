@@ -0,0 +1,79 @@
+# utils/audit.py
+'''
+Hash chain shared by audit_records and audit_logs.
+
+Every row stores hash = sha256(previous_hash + its chained fields) and the hash of the
+row before it in previous_hash; the first row of a chain has previous_hash NULL.
+Rows are chained in id order.
+'''
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# chain table -> (id column, columns covered by the hash, in hashing order)
+CHAINS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    'audit_records': ('audit_record_id', ('table_name', 'action', 'table_record_id', 'new_value', 'timestamp')),
+    'audit_logs': ('audit_log_id', ('log_level', 'action', 'description', 'timestamp')),
+}
+
+
+@dataclass
+class ChainBreak:
+    '''The first row whose links do not match.'''
+    row_id: int
+    reason: str
+
+
+def chain_hash(previous_hash: Optional[str], values: Sequence) -> str:
+    '''Hash of one row from the previous row's hash and the row's chained values.'''
+    payload = json.dumps([previous_hash, *values], ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def encode_value(values: dict) -> str:
+    '''Canonical JSON for the new_value column, so the same change always hashes the same.'''
+    return json.dumps(values, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def chain_rows(chain: str, previous_hash: Optional[str], rows: List[dict]) -> Optional[str]:
+    '''Fills in hash and previous_hash of rows in one pass, in order. Returns the new tail hash.'''
+    _, fields = CHAINS[chain]
+    for row in rows:
+        row['previous_hash'] = previous_hash
+        row['hash'] = previous_hash = chain_hash(previous_hash, [row[field] for field in fields])
+    return previous_hash
+
+
+def verify_rows(
+        chain: str,
+        previous_hash: Optional[str],
+        rows: Iterable[dict],
+        max_breaks: Optional[int] = 1
+        ) -> Tuple[int, Optional[int], Optional[str], List[ChainBreak]]:
+    '''
+    Re-hashes rows (in id order) starting from previous_hash, the hash of the row before
+    the first one. Returns (rows checked, last id, last hash, breaks).
+
+    Stops at the max_breaks-th break (None: never), with the last id and hash of the last
+    row that verified. Otherwise a broken row's stored hash links the rows after it, so
+    one tampered or missing row is reported once rather than for the rest of the chain.
+    '''
+    id_field, fields = CHAINS[chain]
+    checked = 0
+    last_id = None
+    breaks = []
+    for row in rows:
+        reason = None
+        if row['previous_hash'] != previous_hash:
+            reason = 'previous_hash does not match the previous row'
+        elif row['hash'] != chain_hash(previous_hash, [row[field] for field in fields]):
+            reason = 'hash does not match the row contents'
+        if reason is not None:
+            breaks.append(ChainBreak(row[id_field], reason))
+            if max_breaks is not None and len(breaks) >= max_breaks:
+                return (checked, last_id, previous_hash, breaks)
+        checked += 1
+        last_id = row[id_field]
+        previous_hash = row['hash']
+    return (checked, last_id, previous_hash, breaks)
@@ -0,0 +1,108 @@
+# utils/cache.py
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Set, Tuple
+
+_MISSING = object()
+
+
+class QueryCache:
+    '''
+    Thread-safe LRU cache for query results, bounded by the number of entries.
+
+    Every entry is tagged with the tables it was read from. invalidate(tables) drops the
+    entries that depend on them and bumps a per-table generation, so a load that started
+    before the invalidation cannot store its (now stale) result afterwards.
+    Cached values are shared between callers and must be treated as read-only.
+    '''
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._dependencies: Dict[Hashable, Tuple[str, ...]] = {}
+        self._keys_by_table: Dict[str, Set[Hashable]] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get_or_load(
+            self,
+            key: Hashable,
+            tables: Tuple[str, ...],
+            loader: Callable[[], Tuple[bool, Any]]
+            ) -> Tuple[bool, Any]:
+        '''Returns the cached (True, value) for key, or calls loader and caches a successful result.'''
+        if not self.enabled:
+            return loader()
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is not _MISSING:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return (True, value)
+            self.misses += 1
+            generations = tuple(self._generations.get(table, 0) for table in tables)
+        success, value = loader()
+        if success:
+            with self._lock:
+                if generations == tuple(self._generations.get(table, 0) for table in tables):
+                    self._store(key, tables, value)
+        return (success, value)
+
+    def invalidate(self, tables: Iterable[str]) -> None:
+        '''Drops every entry read from any of the given tables.'''
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+                for key in self._keys_by_table.pop(table, set()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def generations(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        '''Current generation of each table: bumped by every invalidate() that names it.'''
+        with self._lock:
+            return tuple(self._generations.get(table, 0) for table in tables)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._dependencies.clear()
+            self._keys_by_table.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    # --- Internals, called with the lock held --- #
+    def _store(self, key: Hashable, tables: Tuple[str, ...], value: Any) -> None:
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = value
+        self._dependencies[key] = tables
+        for table in tables:
+            self._keys_by_table.setdefault(table, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        del self._entries[key]
+        for table in self._dependencies.pop(key, ()):
+            keys = self._keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
@@ -0,0 +1,164 @@
+# utils/deadline_rules.py
+'''
+Statutory deadline rules, evaluated with NumPy over whole columns of cases.
+
+Every rule adds a month offset to the filing date of the cases it applies to (by IP
+right, jurisdiction and procedure). Month arithmetic follows the usual docketing
+convention: the same day of the target month, clipped to its last day (31 Jan + 1 month
+is 28/29 Feb), or the last day of the month itself for end_of_month rules (EP renewal
+fees fall due at the end of the month containing the anniversary).
+
+EP validation and US maintenance fees (due 3.5, 7.5 and 11.5 years after grant; US
+patents pay no annuities) run from the grant date, which the cases table does not store,
+so they are not derived here.
+'''
+import itertools
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class DeadlineRule:
+    description: str
+    months: int
+    ipr_types: Tuple[str, ...]
+    jurisdictions: Optional[Tuple[str, ...]] = None  # None: any
+    excluded_jurisdictions: Tuple[str, ...] = ()
+    procedure_types: Optional[Tuple[str, ...]] = None  # None: any
+    end_of_month: bool = False
+
+
+RULES: List[DeadlineRule] = [
+    # Paris Convention priority periods
+    DeadlineRule('Priority year ends', 12, ('PAT', 'UM'), excluded_jurisdictions=('WO',), procedure_types=('prosecution',)),
+    DeadlineRule('Priority period ends (6 months)', 6, ('TM', 'DES'), procedure_types=('prosecution',)),
+    # PCT applications: national and regional phase entry
+    DeadlineRule('PCT national phase entry (30 months)', 30, ('PAT',), jurisdictions=('WO',)),
+    DeadlineRule('PCT regional phase entry EP (31 months)', 31, ('PAT',), jurisdictions=('WO',)),
+    # Patent annuities: the fee for year n is due at the (n-1)th anniversary
+    *[
+        DeadlineRule(
+            f'Annuity year {year}', (year - 1) * 12, ('PAT',),
+            jurisdictions=('EP',), procedure_types=('prosecution',), end_of_month=True
+        )
+        for year in range(3, 21)
+    ],
+    *[
+        DeadlineRule(
+            f'Annuity year {year}', (year - 1) * 12, ('PAT',),
+            excluded_jurisdictions=('EP', 'WO', 'US'), procedure_types=('prosecution',)
+        )
+        for year in range(3, 21)
+    ],
+    # Trademark and design renewals
+    *[DeadlineRule(f'Trademark renewal ({years} years)', years * 12, ('TM',)) for years in range(10, 101, 10)],
+    *[DeadlineRule(f'Design renewal ({years} years)', years * 12, ('DES',)) for years in range(5, 26, 5)],
+]
+
+DEADLINE_TYPE = 'statutory'
+
+
+def add_months(dates: np.ndarray, months: int, end_of_month: bool = False) -> np.ndarray:
+    '''dates (datetime64[D]) plus a number of months, clipped to the end of the target month.'''
+    month_starts = dates.astype('datetime64[M]')
+    target = month_starts + np.timedelta64(months, 'M')
+    next_month_start = (target + np.timedelta64(1, 'M')).astype('datetime64[D]')
+    if end_of_month:
+        return next_month_start - np.timedelta64(1, 'D')
+    target_start = target.astype('datetime64[D]')
+    day_offset = dates - month_starts.astype('datetime64[D]')
+    return np.minimum(target_start + day_offset, next_month_start - np.timedelta64(1, 'D'))
+
+
+def compute_deadlines(
+        cases: Dict[str, list],
+        start: np.datetime64,
+        end: np.datetime64,
+        rules: List[DeadlineRule] = RULES
+        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    Evaluates rules over columnar cases (case_id, filing_date, jurisdiction, ipr_type,
+    procedure_type) and keeps the deadlines due from start to end inclusive.
+    Returns (case_ids, rule indexes into rules, due dates), one entry per deadline.
+    '''
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype='datetime64[D]'))
+    case_ids = np.asarray(cases['case_id'], dtype=np.int64)
+    filing_dates = np.asarray(cases['filing_date'], dtype='datetime64[D]')
+    jurisdictions = np.asarray(cases['jurisdiction'], dtype=object)
+    ipr_types = np.asarray(cases['ipr_type'], dtype=object)
+    procedure_types = np.asarray(cases['procedure_type'], dtype=object)
+    has_date = ~np.isnat(filing_dates)
+    if not has_date.any():
+        return empty
+
+    # Dates as integers: months since the epoch plus the day within the month. A table of
+    # month start days then turns every rule into integer additions and lookups.
+    month_numbers = filing_dates.astype('datetime64[M]').astype(np.int64)
+    days = filing_dates.astype(np.int64)
+    first_month = int(month_numbers[has_date].min())
+    last_month = int(month_numbers[has_date].max()) + max(rule.months for rule in rules) + 1
+    month_start_days = np.arange(first_month, last_month + 1).astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    month_offsets = month_numbers - first_month
+    day_in_month = days - month_start_days[np.where(has_date, month_offsets, 0)]
+    start_day = np.datetime64(start, 'D').astype(np.int64)
+    end_day = np.datetime64(end, 'D').astype(np.int64)
+
+    # The selections only depend on the rule's filters, which many rules share
+    selections: Dict[tuple, tuple] = {}
+    out_case_ids, out_rules, out_days = [], [], []
+    for index, rule in enumerate(rules):
+        filters = (rule.ipr_types, rule.jurisdictions, rule.excluded_jurisdictions, rule.procedure_types)
+        selection = selections.get(filters)
+        if selection is None:
+            mask = has_date & np.isin(ipr_types, rule.ipr_types)
+            if rule.jurisdictions is not None:
+                mask &= np.isin(jurisdictions, rule.jurisdictions)
+            if rule.excluded_jurisdictions:
+                mask &= ~np.isin(jurisdictions, rule.excluded_jurisdictions)
+            if rule.procedure_types is not None:
+                mask &= np.isin(procedure_types, rule.procedure_types)
+            selection = selections[filters] = (case_ids[mask], month_offsets[mask], day_in_month[mask])
+        selected_ids, selected_months, selected_days = selection
+        if not len(selected_ids):
+            continue
+        target = selected_months + rule.months
+        next_month_start = month_start_days[target + 1]
+        if rule.end_of_month:
+            due_days = next_month_start - 1
+        else:
+            due_days = np.minimum(month_start_days[target] + selected_days, next_month_start - 1)
+        in_window = (due_days >= start_day) & (due_days <= end_day)
+        count = int(in_window.sum())
+        if not count:
+            continue
+        out_case_ids.append(selected_ids[in_window])
+        out_days.append(due_days[in_window])
+        out_rules.append(np.full(count, index, dtype=np.int64))
+    if not out_case_ids:
+        return empty
+    return (np.concatenate(out_case_ids), np.concatenate(out_rules), np.concatenate(out_days).astype('datetime64[D]'))
+
+
+def missing_mask(
+        case_ids: np.ndarray,
+        rule_indexes: np.ndarray,
+        existing_case_ids: list,
+        existing_descriptions: list,
+        rules: List[DeadlineRule] = RULES
+        ) -> np.ndarray:
+    '''True for the computed deadlines whose (case_id, description) is not stored yet.'''
+    if not len(existing_case_ids):
+        return np.ones(len(case_ids), dtype=bool)
+    # Rules for different jurisdictions may share a description, so keys use description numbers
+    description_numbers = {description: number for number, description in enumerate(dict.fromkeys(rule.description for rule in rules))}
+    rule_numbers = np.array([description_numbers[rule.description] for rule in rules], dtype=np.int64)
+    existing_numbers = np.fromiter(
+        map(description_numbers.get, existing_descriptions, itertools.repeat(-1)), dtype=np.int64, count=len(existing_descriptions)
+    )
+    known = existing_numbers >= 0
+    # One integer key per (case, description) pair
+    width = len(description_numbers)
+    existing_keys = np.asarray(existing_case_ids, dtype=np.int64)[known] * width + existing_numbers[known]
+    return ~np.isin(case_ids * width + rule_numbers[rule_indexes], existing_keys)
@@ -0,0 +1,274 @@
+# utils/query_plan_check.py
+'''
+EXPLAIN QUERY PLAN regression harness for the repo layer.
+
+Builds a throwaway, populated database, calls every public read method of every repo,
+captures the statements they run and fails when a plan falls back to a full table SCAN
+or to a USE TEMP B-TREE sort. Run it headless with:
+
+    python -m utils.query_plan_check
+'''
+import inspect
+import re
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Tuple, Union
+
+from database_handler.database_handler import DatabaseHandler
+from repos.audit_checkpoint_repo import AuditCheckpointsRepo
+from repos.audit_log_repo import AuditLogsRepo
+from repos.audit_record_repo import AuditRecordsRepo
+from repos.base_repo import BaseRepo
+from repos.cases_repo import CasesRepo
+from repos.clients_repo import ClientsRepo
+from repos.deadline_load_repo import DeadlineLoadRepo
+from repos.deadline_sweep_repo import DeadlineSweepsRepo
+from repos.deadlines_repo import DeadlinesRepo
+
+REPO_CLASSES = [ClientsRepo, CasesRepo, DeadlinesRepo, DeadlineSweepsRepo, DeadlineLoadRepo, AuditRecordsRepo, AuditLogsRepo, AuditCheckpointsRepo]
+
+# Public methods with these prefixes are read paths and get their plans checked
+READ_METHOD_PREFIXES = ('get_', 'iter_')
+
+# Arguments used to call read methods with required parameters; one call per tuple
+SAMPLE_ARGS: Dict[str, List[tuple]] = {
+    'get_client_by_id': [(1,)],
+    'get_active_clients_page': [(), (('Client 0050', 50), 20), (None, 20, {'country': 'DE'})],
+    'get_existing_client_codes': [(['C01', 'C02'],)],
+    'get_existing_client_ids': [([1, 2],)],
+    'get_case_by_id': [(1,)],
+    'get_search_page': [('"case"*',), ('"ref 001"*', (20,), 20)],
+    'get_open_cases_page': [
+        (), ((100,), 20), (None, 20, {'client_id': 3}), ((100,), 20, {'status': 'filed', 'jurisdiction': 'EP'})
+    ],
+    'get_cases_by_client': [(1,)],
+    'get_open_cases_by_client': [(1,)],
+    'get_cases_by_jurisdiction': [('EP',)],
+    'get_cases_by_procedure': [('prosecution',)],
+    'get_cases_by_ipr_type': [('PAT',)],
+    'get_cases_by_status': [('filed',)],
+    'get_deadline_by_id': [(1,)],
+    'get_open_deadlines_by_case': [(1,)],
+    'get_open_deadlines_board': [(), ('2030-01-01', '2030-12-31', 50)],
+    'get_open_deadlines_board_page': [
+        (), (('2030-06-01', 10), 20), (None, 20, {'case_id': 5}), (None, 20, {'client_id': 3, 'due_to': '2030-12-31'}),
+        (None, 20, {'deadline_type': 'statutory', 'due_from': '2030-06-01'})
+    ],
+    'get_audit_record_by_id': [(1,)],
+    'get_audit_log_by_id': [(1,)],
+    'get_audit_logs_by_level': [('PERF',), ('INFO', 10)],
+    'get_audit_logs_by_action': [('backup',), ('slow_query', 10)],
+    'iter_audit_records_after': [(), (10, 20)],
+    'iter_audit_logs_after': [(), (10, 20)],
+    'get_last_checkpoint': [('audit_records',)],
+    'get_checkpoints': [('audit_records',)],
+    'iter_all_clients_batches': [(), ({'country': 'DE'},)],
+    'iter_all_cases_batches': [
+        (), ({'client_id': 3},), ({'status': 'filed'},), ({'status': 'granted', 'jurisdiction': 'EP'},), ({'ipr_type': 'TM'},)
+    ],
+    'iter_all_deadlines_batches': [
+        (), ({'case_id': 5},), ({'client_id': 3},), ({'status': 'Pending'},), ({'due_from': '2030-06-01', 'due_to': '2030-12-31'},),
+        ({'deadline_type': 'client'},)
+    ],
+    'iter_all_docket_batches': [
+        (), ({'case_id': 5},), ({'client_id': 3},), ({'status': 'Overdue'},), ({'due_from': '2030-06-01', 'due_to': '2030-12-31'},),
+        ({'deadline_type': 'client', 'due_from': '2030-06-01'},)
+    ],
+    'get_load_by_day': [('2030-01-01', '2030-12-31')],
+    'get_load_by_client': [(), (None, '2030-12-31'), ('2030-01-01', '2030-12-31')],
+}
+
+# Plans that read a whole table without an index, e.g. 'SCAN cases' or 'SCAN c'
+FULL_SCAN_PATTERN = re.compile(r'^SCAN \w+$')
+TEMP_B_TREE_MARKER = 'USE TEMP B-TREE'
+
+# Sorts accepted because an equality filter bounds their input: (repo, method, filter) -> reason.
+# Only calls passing that filter are exempt, and only in that method
+BOUNDED_SORTS = {
+    ('DeadlinesRepo', 'get_open_deadlines_board_page', 'client_id'): "the client filter of the deadline board sorts one client's open deadlines",
+    ('CasesRepo', 'iter_all_cases_batches', 'client_id'): "the client filter of the case export sorts one client's cases",
+    ('DeadlinesRepo', 'iter_all_deadlines_batches', 'case_id'): "the case filter of the deadline export sorts one case's deadlines",
+    ('DeadlinesRepo', 'iter_all_deadlines_batches', 'client_id'): "the client filter of the deadline export sorts one client's deadlines",
+    ('DeadlinesRepo', 'iter_all_docket_batches', 'case_id'): "the case filter of the docket export sorts one case's deadlines",
+    ('DeadlinesRepo', 'iter_all_docket_batches', 'client_id'): "the client filter of the docket export sorts one client's deadlines",
+}
+
+JURISDICTIONS = ['EP', 'DE', 'US', 'IT', 'FR', 'GB', 'CN', 'JP']
+STATUSES = ['filed', 'pending', 'granted', 'refused', 'withdrawn', 'expired']
+IPR_TYPES = ['PAT', 'TM', 'DES', 'UM']
+PROCEDURE_TYPES = ['prosecution', 'opposition', 'general counselling']
+NOW = '2030-01-01 09:00:00'
+
+
+def populate_database(conn: sqlite3.Connection, clients: int = 200, cases_per_client: int = 5, deadlines_per_case: int = 3) -> None:
+    '''Fills an empty database with a small but index-relevant dataset.'''
+    conn.executemany(
+        'INSERT INTO clients (client_code, name, country, is_active, deactivated_at, created_at, updated_at) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [
+            (f'C{i:02d}' if i < 100 else f'{i:03d}', f'Client {i:04d}', 'DE', int(i % 10 != 0), None if i % 10 else NOW, NOW, NOW)
+            for i in range(1, clients + 1)
+        ]
+    )
+    case_rows = []
+    for client_id in range(1, clients + 1):
+        for n in range(cases_per_client):
+            i = client_id * cases_per_client + n
+            is_open = int(i % 7 != 0)
+            case_rows.append((
+                client_id, f'REF-{n:03d}', f'Case {i}', JURISDICTIONS[i % len(JURISDICTIONS)],
+                STATUSES[i % len(STATUSES)], IPR_TYPES[i % len(IPR_TYPES)], PROCEDURE_TYPES[i % len(PROCEDURE_TYPES)],
+                f'{2020 + i % 10}-{1 + i % 12:02d}-15', is_open, None if is_open else NOW, NOW, NOW
+            ))
+    conn.executemany(
+        'INSERT INTO cases (client_id, client_ref, title, jurisdiction, status, ipr_type, procedure_type, '
+        'filing_date, is_open, closed_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        case_rows
+    )
+    deadline_rows = []
+    for case_id in range(1, len(case_rows) + 1):
+        for n in range(deadlines_per_case):
+            i = case_id * deadlines_per_case + n
+            done = i % 4 == 0
+            deadline_rows.append((
+                case_id, f'Deadline {i}', f'{2030 + i % 3}-{1 + i % 12:02d}-{1 + i % 28:02d}',
+                ['statutory', 'client', 'internal'][i % 3], 'Done' if done else 'Pending',
+                int(done), NOW if done else None, NOW, NOW
+            ))
+    conn.executemany(
+        'INSERT INTO deadlines (case_id, description, due_date, deadline_type, status, completed, '
+        'completed_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        deadline_rows
+    )
+    conn.executemany(
+        'INSERT INTO audit_records (table_name, action, table_record_id, new_value, timestamp, hash, previous_hash) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [('cases', 'insert', i, '{}', NOW, f'h{i}', f'h{i - 1}' if i > 1 else None) for i in range(1, 101)]
+    )
+    conn.executemany(
+        'INSERT INTO audit_logs (log_level, action, description, timestamp, hash, previous_hash) VALUES (?, ?, ?, ?, ?, ?)',
+        [('INFO', 'backup', f'Backup {i}', NOW, f'h{i}', f'h{i - 1}' if i > 1 else None) for i in range(1, 101)]
+    )
+    conn.commit()
+
+
+def _read_methods(repo: BaseRepo) -> List[str]:
+    return sorted(
+        name for name, _ in inspect.getmembers(type(repo), inspect.isfunction)
+        if name.startswith(READ_METHOD_PREFIXES)
+    )
+
+
+def _has_required_params(method) -> bool:
+    return any(
+        param.default is inspect.Parameter.empty
+        and param.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+        for param in inspect.signature(method).parameters.values()
+    )
+
+
+def _active_filters(args: tuple) -> FrozenSet[str]:
+    '''Names of the page filters a sample call passes (its dict argument), None values left out.'''
+    filters = next((arg for arg in args if isinstance(arg, dict)), {})
+    return frozenset(name for name, value in filters.items() if value is not None)
+
+
+def _plan_problems(repo_name: str, method_name: str, filters: FrozenSet[str], plan: List[str]) -> List[str]:
+    problems = []
+    bounded_sort = any((repo_name, method_name, name) in BOUNDED_SORTS for name in filters)
+    for detail in plan:
+        if TEMP_B_TREE_MARKER in detail and not bounded_sort:
+            problems.append(detail)
+        elif FULL_SCAN_PATTERN.match(detail) and not method_name.startswith(('get_all_', 'iter_all_')):
+            # get_all_* / iter_all_* return the whole table by contract, so a full scan is expected there
+            problems.append(detail)
+    return problems
+
+
+def check_query_plans() -> Tuple[bool, Union[List[Dict], Exception]]:
+    '''
+    Runs every public read method of every repo against a populated database and
+    explains each statement it executes. Returns (all_plans_ok, results), where every
+    result holds the repo, method, statement, plan details and the offending details.
+    '''
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_handler = DatabaseHandler(Path(tmp_dir) / 'query_plans.db')
+        try:
+            with db_handler as conn:
+                populate_database(conn)
+                statements = []
+                conn.set_trace_callback(statements.append)
+                results = []
+                for repo_class in REPO_CLASSES:
+                    repo = repo_class(db_handler)
+                    for method_name in _read_methods(repo):
+                        method = getattr(repo, method_name)
+                        if method_name in SAMPLE_ARGS:
+                            arg_sets = SAMPLE_ARGS[method_name]
+                        elif _has_required_params(method):
+                            results.append({
+                                'repo': repo_class.__name__,
+                                'method': method_name,
+                                'statement': None,
+                                'plan': [],
+                                'problems': ['No sample arguments registered in SAMPLE_ARGS'],
+                            })
+                            continue
+                        else:
+                            arg_sets = [()]
+                        for args in arg_sets:
+                            statements.clear()
+                            if method_name.startswith('iter_'):
+                                # Streaming methods raise instead of returning (success, result)
+                                try:
+                                    success, result = True, sum(1 for _ in method(*args))
+                                except sqlite3.Error as e:
+                                    success, result = False, e
+                            else:
+                                success, result = method(*args)
+                            if not success:
+                                results.append({
+                                    'repo': repo_class.__name__,
+                                    'method': method_name,
+                                    'statement': None,
+                                    'plan': [],
+                                    'problems': [f'Call failed: {result}'],
+                                })
+                                continue
+                            for statement in [s for s in statements if s.lstrip().upper().startswith(('SELECT', 'WITH'))]:
+                                plan = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {statement}').fetchall()]
+                                results.append({
+                                    'repo': repo_class.__name__,
+                                    'method': method_name,
+                                    'statement': ' '.join(statement.split()),
+                                    'plan': plan,
+                                    'problems': _plan_problems(repo_class.__name__, method_name, _active_filters(args), plan),
+                                })
+                conn.set_trace_callback(None)
+        except sqlite3.Error as e:
+            return (False, e)
+        finally:
+            db_handler.close()
+    return (not any(result['problems'] for result in results), results)
+
+
+def main() -> None:
+    success, results = check_query_plans()
+    if isinstance(results, Exception):
+        print(f'Query plan check could not run: {results}')
+        sys.exit(1)
+    for result in results:
+        status = 'FAIL' if result['problems'] else 'ok'
+        print(f"[{status}] {result['repo']}.{result['method']}: {' | '.join(result['plan']) or '-'}")
+        for problem in result['problems']:
+            print(f'       -> {problem}')
+            if result['statement']:
+                print(f"          {result['statement']}")
+    print('All query plans use indexes.' if success else 'Some queries fall back to full scans or temp B-trees.')
+    sys.exit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+# utils/query_stats.py
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Upper bounds of the latency histogram buckets, in milliseconds; one more bucket holds the rest
+HISTOGRAM_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+@dataclass
+class MethodStats:
+    '''Everything measured for one repo method since the last reset.'''
+    method: str
+    calls: int = 0
+    errors: int = 0
+    rows: int = 0
+    statements: int = 0
+    slow: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    histogram: List[int] = field(default_factory=lambda: [0] * (len(HISTOGRAM_BOUNDS_MS) + 1))
+    # The SQL of the last call, with its '?' placeholders: bound values are never kept
+    statement: str = ''
+
+    def percentile_ms(self, fraction: float) -> float:
+        '''Upper bound of the bucket holding the given fraction of the calls; the maximum for the last bucket.'''
+        wanted = fraction * self.calls
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BOUNDS_MS, self.histogram):
+            seen += count
+            if count and seen >= wanted:
+                return float(bound)
+        return self.max_seconds * 1000
+
+    def as_dict(self) -> dict:
+        return {
+            'method': self.method,
+            'calls': self.calls,
+            'errors': self.errors,
+            'slow': self.slow,
+            'total_ms': self.total_seconds * 1000,
+            'mean_ms': self.total_seconds * 1000 / self.calls if self.calls else 0.0,
+            'p50_ms': self.percentile_ms(0.5),
+            'p95_ms': self.percentile_ms(0.95),
+            'max_ms': self.max_seconds * 1000,
+            'rows': self.rows,
+            'statements': self.statements,
+            'histogram': list(self.histogram),
+            'statement': ' '.join(self.statement.split()),
+        }
+
+
+@dataclass
+class QueryCall:
+    '''One repo call, as seen by a recording.'''
+    method: str
+    statement: str
+    seconds: float
+    rows: int
+    failed: bool
+
+
+class Measurement:
+    '''One call in progress: the trace callback counts the statements it runs.'''
+    __slots__ = ('method', 'statement', 'statements', 'rows', 'failed', 'last_traced')
+
+    def __init__(self, method: str, statement: str):
+        self.method = method
+        self.statement = statement
+        self.statements = 0
+        self.rows = 0
+        self.failed = False
+        self.last_traced = None
+
+
+class QueryStats:
+    '''
+    Per-method query statistics, kept in memory by the DatabaseHandler.
+
+    The repo helpers wrap every call in measure(method, statement): it records the call's
+    latency in a histogram, the rows it returned or wrote, and the statements SQLite ran
+    for it, counted by trace(), the connections' trace callback. Nested measurements
+    (an audit write inside an insert) are timed inclusively; statements go to the innermost.
+
+    Calls of at least slow_query_ms are also queued for slow_query_hook, which
+    flush_slow_queries() hands them to outside of any write block.
+
+    recording() collects the calls of one thread as QueryCall objects, whether or not the
+    statistics are enabled (the render profiler uses it). The helpers measure while
+    active: enabled, or with a recording open. While disabled nothing is aggregated, and
+    the handler removes the trace callback.
+    '''
+    def __init__(self, enabled: bool = False, slow_query_ms: float = 250.0):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._recordings = 0
+        self.active = False
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self.slow_query_hook: Optional[Callable[[List[dict]], object]] = None
+        self.dropped_slow_queries = 0
+        self._methods: Dict[str, MethodStats] = {}
+        self._slow_queries: List[dict] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: bool) -> None:
+        with self._lock:
+            self._enabled = value
+            self.active = value or self._recordings > 0
+
+    # --- Measuring, called by the repo helpers and the trace callback --- #
+    @contextmanager
+    def measure(self, method: str, statement: str) -> Iterator[Measurement]:
+        '''Times the block as one call of method; set rows (and failed) on the yielded measurement.'''
+        stack = self._stack()
+        measurement = Measurement(method, statement)
+        stack.append(measurement)
+        start = time.perf_counter()
+        try:
+            yield measurement
+        except BaseException:
+            measurement.failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            self._record(measurement, elapsed)
+
+    @contextmanager
+    def recording(self) -> Iterator[List[QueryCall]]:
+        '''Collects every repo call this thread makes inside the block; an enclosing recording gets them too.'''
+        calls: List[QueryCall] = []
+        outer = getattr(self._local, 'recording', None)
+        self._local.recording = calls
+        with self._lock:
+            self._recordings += 1
+            self.active = True
+        try:
+            yield calls
+        finally:
+            self._local.recording = outer
+            if outer is not None:
+                outer.extend(calls)
+            with self._lock:
+                self._recordings -= 1
+                self.active = self._enabled or self._recordings > 0
+
+    def trace(self, statement: str) -> None:
+        '''Trace callback: counts a statement for the innermost measurement of this thread.'''
+        stack = getattr(self._local, 'stack', None)
+        # Statements of virtual tables start with '--'; a trigger step repeats its statement's text
+        if stack and not statement.startswith('--'):
+            measurement = stack[-1]
+            # The text carries the bound values: only its hash is kept
+            traced = hash(statement)
+            if traced != measurement.last_traced:
+                measurement.statements += 1
+                measurement.last_traced = traced
+
+    def _stack(self) -> List[Measurement]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, measurement: Measurement, elapsed: float) -> None:
+        recording = getattr(self._local, 'recording', None)
+        if recording is not None:
+            recording.append(QueryCall(measurement.method, measurement.statement, elapsed, measurement.rows, measurement.failed))
+        if not self._enabled:
+            return
+        slow = elapsed * 1000 >= self.slow_query_ms
+        bucket = next((i for i, bound in enumerate(HISTOGRAM_BOUNDS_MS) if elapsed * 1000 <= bound), len(HISTOGRAM_BOUNDS_MS))
+        with self._lock:
+            stats = self._methods.get(measurement.method)
+            if stats is None:
+                stats = self._methods[measurement.method] = MethodStats(measurement.method)
+            stats.calls += 1
+            stats.errors += measurement.failed
+            stats.rows += measurement.rows
+            stats.statements += measurement.statements
+            stats.total_seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+            stats.histogram[bucket] += 1
+            stats.statement = measurement.statement
+            # What the slow-query log writes is measured too, but never logged again
+            if slow and not getattr(self._local, 'flushing', False):
+                stats.slow += 1
+                self._slow_queries.append({
+                    'method': measurement.method,
+                    'ms': elapsed * 1000,
+                    'rows': measurement.rows,
+                    'statement': ' '.join(measurement.statement.split()),
+                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                })
+
+    # --- Slow-query log --- #
+    def has_slow_queries(self) -> bool:
+        return bool(self._slow_queries)
+
+    def flush_slow_queries(self) -> Optional[object]:
+        '''Hands the queued slow calls to slow_query_hook and returns its result; None when there was nothing to do.'''
+        hook = self.slow_query_hook
+        if hook is None or getattr(self._local, 'flushing', False):
+            return None
+        with self._lock:
+            slow_queries, self._slow_queries = self._slow_queries, []
+        if not slow_queries:
+            return None
+        self._local.flushing = True
+        try:
+            result = hook(slow_queries)
+        finally:
+            self._local.flushing = False
+        if isinstance(result, tuple) and result and result[0] is False:
+            with self._lock:
+                self.dropped_slow_queries += len(slow_queries)
+        return result
+
+    # --- Reading and resetting --- #
+    def top(self, limit: Optional[int] = None, order_by: str = 'total_ms') -> List[dict]:
+        '''Per-method statistics as dicts (see MethodStats.as_dict), largest order_by first.'''
+        with self._lock:
+            methods = [stats.as_dict() for stats in self._methods.values()]
+        methods.sort(key=lambda stats: stats[order_by], reverse=True)
+        return methods[:limit] if limit is not None else methods
+
+    def reset(self) -> None:
+        with self._lock:
+            self._methods.clear()
+            self._slow_queries.clear()
+            self.dropped_slow_queries = 0
@@ -0,0 +1,29 @@
+# utils/search.py
+'''
+Turns what a user types into a search box into an FTS5 MATCH expression.
+
+Every whitespace-separated word becomes a quoted phrase of its tokens with a prefix
+marker, and all words must match: 'ep 3456 pump valv' -> '"ep"* "3456"* "pump"* "valv"*',
+'REF-0012' -> '"REF 0012"*'. Quoting keeps FTS5 operators and punctuation in the input
+from being parsed as query syntax.
+'''
+import re
+from typing import Optional
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Snippet markup: matched terms are bolded for st.markdown
+SNIPPET_START = '**'
+SNIPPET_END = '**'
+SNIPPET_ELLIPSIS = '…'
+SNIPPET_TOKENS = 12
+
+
+def fts_query(text: str) -> Optional[str]:
+    '''MATCH expression for text, or None when it holds nothing searchable.'''
+    phrases = []
+    for word in text.split():
+        tokens = TOKEN_PATTERN.findall(word)
+        if tokens:
+            phrases.append('"' + ' '.join(tokens) + '"*')
+    return ' '.join(phrases) or None